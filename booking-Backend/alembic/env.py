@@ -6,12 +6,9 @@ from sqlalchemy import pool
 from alembic import context
 
 from app.database import Base
-import os
-from dotenv import load_dotenv
-from app.database import Base
+from app.core.config import get_settings
 import app.models
 
-load_dotenv()
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -25,7 +22,7 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
+SQLALCHEMY_DATABASE_URL = get_settings().database_url
 config.set_main_option("sqlalchemy.url", SQLALCHEMY_DATABASE_URL) # Add this
 target_metadata = Base.metadata # Change target_metadata = None to this
 
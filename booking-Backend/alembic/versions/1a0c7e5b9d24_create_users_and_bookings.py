@@ -0,0 +1,71 @@
+"""create users and bookings
+
+Revision ID: 1a0c7e5b9d24
+Revises:
+Create Date: 2025-08-10 15:42:08.116327
+
+The first tables of the app, which older installs got from create_all.
+Where they already exist they are left as they are, so databases that
+were stamped at a later revision are unaffected.
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1a0c7e5b9d24'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    # Offline (--sql) runs cannot look, and emit the full script
+    if context.is_offline_mode():
+        return False
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_table('users'):
+        op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('phone_number', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+        op.create_index(op.f('ix_users_name'), 'users', ['name'], unique=False)
+        op.create_index(op.f('ix_users_phone_number'), 'users', ['phone_number'], unique=True)
+    if not _has_table('bookings'):
+        op.create_table('bookings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('date', sa.Date(), nullable=True),
+        sa.Column('session', sa.String(), nullable=True),
+        sa.Column('timeslot', sa.Time(), nullable=True),
+        sa.Column('order_number', sa.Integer(), nullable=True),
+        sa.Column('turn_number', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('date', 'timeslot', name='_date_timeslot_uc')
+        )
+        op.create_index(op.f('ix_bookings_id'), 'bookings', ['id'], unique=False)
+        op.create_index(op.f('ix_bookings_date'), 'bookings', ['date'], unique=False)
+        op.create_index(op.f('ix_bookings_session'), 'bookings', ['session'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_bookings_session'), table_name='bookings')
+    op.drop_index(op.f('ix_bookings_date'), table_name='bookings')
+    op.drop_index(op.f('ix_bookings_id'), table_name='bookings')
+    op.drop_table('bookings')
+    op.drop_index(op.f('ix_users_phone_number'), table_name='users')
+    op.drop_index(op.f('ix_users_name'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_table('users')
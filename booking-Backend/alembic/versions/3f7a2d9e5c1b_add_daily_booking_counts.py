@@ -0,0 +1,38 @@
+"""add daily booking counts
+
+Revision ID: 3f7a2d9e5c1b
+Revises: 9c2e4f1a7b3d
+Create Date: 2025-09-04 16:48:03.127764
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f7a2d9e5c1b'
+down_revision: Union[str, Sequence[str], None] = '9c2e4f1a7b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_booking_counts',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('session', sa.String(), nullable=False),
+    sa.Column('booking_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('date', 'session')
+    )
+    op.execute(
+        "INSERT INTO daily_booking_counts (date, session, booking_count) "
+        "SELECT date, session, COUNT(*) FROM bookings "
+        "WHERE session IS NOT NULL GROUP BY date, session"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('daily_booking_counts')
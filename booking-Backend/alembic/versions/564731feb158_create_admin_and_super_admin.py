@@ -1,7 +1,7 @@
 """create admin and super admin
 
 Revision ID: 564731feb158
-Revises: 
+Revises: 1a0c7e5b9d24
 Create Date: 2025-08-17 17:30:24.799223
 
 """
@@ -13,7 +13,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision: str = '564731feb158'
-down_revision: Union[str, Sequence[str], None] = None
+down_revision: Union[str, Sequence[str], None] = '1a0c7e5b9d24'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
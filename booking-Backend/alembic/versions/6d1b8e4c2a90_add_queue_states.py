@@ -0,0 +1,34 @@
+"""add queue states
+
+Revision ID: 6d1b8e4c2a90
+Revises: 3f7a2d9e5c1b
+Create Date: 2025-09-06 10:21:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d1b8e4c2a90'
+down_revision: Union[str, Sequence[str], None] = '3f7a2d9e5c1b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('queue_states',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('session', sa.String(), nullable=False),
+    sa.Column('current_turn', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('date', 'session')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('queue_states')
@@ -0,0 +1,40 @@
+"""add session counters
+
+Revision ID: 9c2e4f1a7b3d
+Revises: 564731feb158
+Create Date: 2025-09-02 10:12:41.318502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c2e4f1a7b3d'
+down_revision: Union[str, Sequence[str], None] = '564731feb158'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('session_counters',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('session', sa.String(), nullable=False),
+    sa.Column('last_order_number', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('date', 'session')
+    )
+    # Seed the counters from existing bookings so new order numbers continue
+    # where the old MAX(order_number) lookup left off.
+    op.execute(
+        "INSERT INTO session_counters (date, session, last_order_number) "
+        "SELECT date, session, MAX(order_number) FROM bookings "
+        "WHERE session IS NOT NULL GROUP BY date, session"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('session_counters')
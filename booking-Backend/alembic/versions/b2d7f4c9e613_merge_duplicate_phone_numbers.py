@@ -0,0 +1,106 @@
+"""merge duplicate phone numbers
+
+Revision ID: b2d7f4c9e613
+Revises: f3b6d0a2c958
+Create Date: 2025-09-18 14:26:51.730942
+
+Phone numbers used to be stored as typed, so 0712345678, +94712345678 and
+94712345678 could be three users. Every number is rewritten in its
+canonical form (see app/phones.py), and users that share one are merged into
+the oldest of them: their bookings, archived ones included, move to it and
+the others are deleted.
+
+The merge cannot be undone; downgrading leaves the users as they are.
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d7f4c9e613'
+down_revision: Union[str, Sequence[str], None] = 'f3b6d0a2c958'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The canonicalization of app/phones.py as of this revision, in SQL (of a column
+# 'cleaned' with the separators removed) and in Python
+CANONICAL_PHONE_SQL = (
+    "CASE WHEN cleaned LIKE '+%' THEN substr(cleaned, 2)"
+    " WHEN cleaned LIKE '00%' THEN substr(cleaned, 3)"
+    " WHEN cleaned LIKE '0%' AND length(cleaned) = 10 THEN '94' || substr(cleaned, 2)"
+    " ELSE cleaned END"
+)
+
+
+def _canonical_phone(phone_number: str) -> str:
+    cleaned = re.sub(r"[\s\-().]", "", phone_number.strip())
+    if cleaned.startswith("+"):
+        return cleaned[1:]
+    if cleaned.startswith("00"):
+        return cleaned[2:]
+    if cleaned.startswith("0") and len(cleaned) == 10:
+        return "94" + cleaned[1:]
+    return cleaned
+
+
+def _merge_postgres():
+    # Set-based, so it also works in offline (--sql) runs
+    op.execute(
+        "CREATE TEMPORARY TABLE user_phone_merge AS"
+        " SELECT id, canonical, min(id) OVER (PARTITION BY canonical) AS keep_id"
+        f" FROM (SELECT id, {CANONICAL_PHONE_SQL} AS canonical FROM ("
+        r"  SELECT id, regexp_replace(phone_number, '[\s().-]', '', 'g') AS cleaned"
+        "  FROM users WHERE phone_number IS NOT NULL) AS c) AS u"
+    )
+    for bookings in ('bookings', 'archive.bookings'):
+        op.execute(
+            f"UPDATE {bookings} AS b SET user_id = m.keep_id FROM user_phone_merge AS m"
+            " WHERE b.user_id = m.id AND m.id <> m.keep_id"
+        )
+    op.execute("DELETE FROM users AS u USING user_phone_merge AS m WHERE u.id = m.id AND m.id <> m.keep_id")
+    op.execute(
+        "UPDATE users AS u SET phone_number = m.canonical FROM user_phone_merge AS m"
+        " WHERE u.id = m.id AND u.phone_number <> m.canonical"
+    )
+    op.execute("DROP TABLE user_phone_merge")
+
+
+def _merge_in_python():
+    bind = op.get_bind()
+    users = bind.execute(sa.text(
+        "SELECT id, phone_number FROM users WHERE phone_number IS NOT NULL ORDER BY id"
+    )).all()
+
+    keep_ids = {}
+    merged = []    # (duplicate id, kept id)
+    rewritten = [] # (kept id, canonical number) where it differs from the stored one
+    for user_id, phone_number in users:
+        canonical = _canonical_phone(phone_number)
+        keep_id = keep_ids.setdefault(canonical, user_id)
+        if keep_id != user_id:
+            merged.append({"id": user_id, "keep_id": keep_id})
+        elif canonical != phone_number:
+            rewritten.append({"id": user_id, "phone_number": canonical})
+
+    if merged:
+        bind.execute(sa.text("UPDATE bookings SET user_id = :keep_id WHERE user_id = :id"), merged)
+        bind.execute(sa.text("DELETE FROM users WHERE id = :id"), merged)
+    if rewritten:
+        bind.execute(sa.text("UPDATE users SET phone_number = :phone_number WHERE id = :id"), rewritten)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        _merge_postgres()
+    else:
+        _merge_in_python()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    pass
@@ -0,0 +1,54 @@
+"""add schedule tables
+
+Revision ID: b8e3f5a17c42
+Revises: 6d1b8e4c2a90
+Create Date: 2025-09-08 11:02:37.904615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e3f5a17c42'
+down_revision: Union[str, Sequence[str], None] = '6d1b8e4c2a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Left empty, the template falls back to SESSIONS in app/core/config.py
+    op.create_table('schedule_templates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('weekday', sa.Integer(), nullable=False),
+    sa.Column('session', sa.String(), nullable=False),
+    sa.Column('start_time', sa.Time(), nullable=False),
+    sa.Column('end_time', sa.Time(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('weekday', 'session', name='_weekday_session_uc')
+    )
+    op.create_index(op.f('ix_schedule_templates_id'), 'schedule_templates', ['id'], unique=False)
+    op.create_table('schedule_exceptions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('session', sa.String(), nullable=True),
+    sa.Column('closed', sa.Boolean(), nullable=False),
+    sa.Column('start_time', sa.Time(), nullable=True),
+    sa.Column('end_time', sa.Time(), nullable=True),
+    sa.Column('note', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_schedule_exceptions_id'), 'schedule_exceptions', ['id'], unique=False)
+    op.create_index(op.f('ix_schedule_exceptions_date'), 'schedule_exceptions', ['date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_schedule_exceptions_date'), table_name='schedule_exceptions')
+    op.drop_index(op.f('ix_schedule_exceptions_id'), table_name='schedule_exceptions')
+    op.drop_table('schedule_exceptions')
+    op.drop_index(op.f('ix_schedule_templates_id'), table_name='schedule_templates')
+    op.drop_table('schedule_templates')
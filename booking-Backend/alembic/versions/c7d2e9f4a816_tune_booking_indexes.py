@@ -0,0 +1,46 @@
+"""tune booking indexes
+
+Revision ID: c7d2e9f4a816
+Revises: e4a9c1d7b2f6
+Create Date: 2025-09-12 16:05:19.482710
+
+Matches the bookings indexes to the queries in app/crud.py:
+
+- (doctor_id, date, timeslot), unique: slot lookups and a day's bookings
+- (doctor_id, date, session, timeslot): turn counting, shifting and renumbering
+- (doctor_id, date, turn_number, session): the dashboard list in turn order
+  and turn-range reminders, both without a sort
+- (user_id): a patient's bookings, and merging patients
+
+The single-column session and turn_number indexes served none of them.
+benchmarks/query_plans.py checks that the plans stay this way.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2e9f4a816'
+down_revision: Union[str, Sequence[str], None] = 'e4a9c1d7b2f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_bookings_doctor_date_turn_session', 'bookings',
+                    ['doctor_id', 'date', 'turn_number', 'session'], unique=False)
+    op.create_index(op.f('ix_bookings_user_id'), 'bookings', ['user_id'], unique=False)
+    op.drop_index(op.f('ix_bookings_turn_number'), table_name='bookings')
+    op.drop_index(op.f('ix_bookings_session'), table_name='bookings')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_bookings_session'), 'bookings', ['session'], unique=False)
+    op.create_index(op.f('ix_bookings_turn_number'), 'bookings', ['turn_number'], unique=False)
+    op.drop_index(op.f('ix_bookings_user_id'), table_name='bookings')
+    op.drop_index('ix_bookings_doctor_date_turn_session', table_name='bookings')
@@ -0,0 +1,34 @@
+"""add booking versions
+
+Revision ID: d5a8c3e1f047
+Revises: b2d7f4c9e613
+Create Date: 2025-09-19 11:08:27.504316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8c3e1f047'
+down_revision: Union[str, Sequence[str], None] = 'b2d7f4c9e613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Days without a row are at version 0, so existing bookings need no seeding
+    op.create_table('booking_versions',
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('doctor_id', 'date')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('booking_versions')
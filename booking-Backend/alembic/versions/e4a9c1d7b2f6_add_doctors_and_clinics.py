@@ -0,0 +1,211 @@
+"""add doctors and clinics
+
+Revision ID: e4a9c1d7b2f6
+Revises: b8e3f5a17c42
+Create Date: 2025-09-10 09:14:52.337081
+
+Every booking, counter, queue and schedule row gains a doctor_id. Existing
+rows go to a default doctor (id 1) at a default clinic (id 1), which is also
+the doctor used by requests that name none.
+
+On Postgres the bookings table can instead be rebuilt hash-partitioned by
+doctor, so each doctor's rows (and indexes) stay small:
+
+    alembic -x doctor_partitions=8 upgrade head
+
+Column and constraint changes go through batch operations, which are plain
+ALTER TABLE statements on Postgres and table copies on SQLite (development).
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9c1d7b2f6'
+down_revision: Union[str, Sequence[str], None] = 'b8e3f5a17c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables whose primary key becomes (doctor_id, date, session)
+KEYED_BY_SESSION = ('session_counters', 'daily_booking_counts', 'queue_states')
+
+BOOKING_COLUMNS = "id, doctor_id, user_id, date, session, timeslot, order_number, turn_number"
+
+
+def _doctor_partitions() -> int:
+    return int(context.get_x_argument(as_dictionary=True).get('doctor_partitions', 0))
+
+
+def _add_doctor_column(table: str):
+    # The server default fills existing rows; new rows get theirs from the app
+    with op.batch_alter_table(table) as batch_op:
+        batch_op.add_column(sa.Column('doctor_id', sa.Integer(), nullable=False, server_default='1'))
+    with op.batch_alter_table(table) as batch_op:
+        batch_op.alter_column('doctor_id', server_default=None)
+
+
+def _set_session_key(table: str, columns, is_postgres: bool):
+    with op.batch_alter_table(table) as batch_op:
+        # SQLite's primary key has no name; the table copy replaces it
+        if is_postgres:
+            batch_op.drop_constraint(f'{table}_pkey', type_='primary')
+        batch_op.create_primary_key(f'{table}_pkey', columns)
+
+
+def _partition_bookings(partitions: int):
+    """Rebuilds bookings as a table hash-partitioned by doctor_id."""
+    op.execute("ALTER TABLE bookings RENAME TO bookings_unpartitioned")
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY NONE")
+    # A partitioned table's primary key must contain the partition key
+    op.execute(
+        "CREATE TABLE bookings ("
+        " id INTEGER NOT NULL DEFAULT nextval('bookings_id_seq'),"
+        " doctor_id INTEGER NOT NULL REFERENCES doctors (id),"
+        " user_id INTEGER REFERENCES users (id),"
+        " date DATE, session VARCHAR, timeslot TIME,"
+        " order_number INTEGER, turn_number INTEGER,"
+        " PRIMARY KEY (doctor_id, id)"
+        ") PARTITION BY HASH (doctor_id)"
+    )
+    for remainder in range(partitions):
+        op.execute(
+            f"CREATE TABLE bookings_doctor_p{remainder} PARTITION OF bookings "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        )
+    op.execute(f"INSERT INTO bookings ({BOOKING_COLUMNS}) SELECT {BOOKING_COLUMNS} FROM bookings_unpartitioned")
+    op.execute("DROP TABLE bookings_unpartitioned")
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY bookings.id")
+    for column in ('id', 'date', 'session', 'turn_number'):
+        op.create_index(f'ix_bookings_{column}', 'bookings', [column], unique=False)
+
+
+def _unpartition_bookings():
+    op.execute("ALTER TABLE bookings RENAME TO bookings_partitioned")
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY NONE")
+    op.execute(
+        "CREATE TABLE bookings ("
+        " id INTEGER NOT NULL DEFAULT nextval('bookings_id_seq') PRIMARY KEY,"
+        " doctor_id INTEGER NOT NULL,"
+        " user_id INTEGER REFERENCES users (id),"
+        " date DATE, session VARCHAR, timeslot TIME,"
+        " order_number INTEGER, turn_number INTEGER"
+        ")"
+    )
+    op.execute(f"INSERT INTO bookings ({BOOKING_COLUMNS}) SELECT {BOOKING_COLUMNS} FROM bookings_partitioned")
+    op.execute("DROP TABLE bookings_partitioned")
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY bookings.id")
+    for column in ('id', 'date', 'session', 'turn_number'):
+        op.create_index(f'ix_bookings_{column}', 'bookings', [column], unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    # 1. Clinics and doctors, with the default doctor that owns existing data
+    op.create_table('clinics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_clinics_id'), 'clinics', ['id'], unique=False)
+    op.create_table('doctors',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('clinic_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('active', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['clinic_id'], ['clinics.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_doctors_id'), 'doctors', ['id'], unique=False)
+    op.create_index(op.f('ix_doctors_clinic_id'), 'doctors', ['clinic_id'], unique=False)
+    op.execute("INSERT INTO clinics (id, name) VALUES (1, 'Main clinic')")
+    op.execute("INSERT INTO doctors (id, clinic_id, name, active) VALUES (1, 1, 'Default doctor', TRUE)")
+    if is_postgres:
+        op.execute("SELECT setval(pg_get_serial_sequence('clinics', 'id'), 1)")
+        op.execute("SELECT setval(pg_get_serial_sequence('doctors', 'id'), 1)")
+
+    # 2. Bookings: unique per (doctor, date, timeslot), indexes led by doctor_id
+    _add_doctor_column('bookings')
+    partitions = _doctor_partitions()
+    if partitions and is_postgres:
+        _partition_bookings(partitions)
+    else:
+        with op.batch_alter_table('bookings') as batch_op:
+            batch_op.drop_constraint('_date_timeslot_uc', type_='unique')
+            batch_op.create_foreign_key('bookings_doctor_id_fkey', 'doctors', ['doctor_id'], ['id'])
+    with op.batch_alter_table('bookings') as batch_op:
+        batch_op.create_unique_constraint('_doctor_date_timeslot_uc', ['doctor_id', 'date', 'timeslot'])
+    op.create_index('ix_bookings_doctor_date_session_timeslot', 'bookings',
+                    ['doctor_id', 'date', 'session', 'timeslot'], unique=False)
+
+    # 3. Counters, rollups and queue state are keyed by doctor first
+    for table in KEYED_BY_SESSION:
+        _add_doctor_column(table)
+        _set_session_key(table, ['doctor_id', 'date', 'session'], is_postgres)
+
+    # 4. Each doctor has their own weekly template and exceptions
+    _add_doctor_column('schedule_templates')
+    with op.batch_alter_table('schedule_templates') as batch_op:
+        batch_op.create_foreign_key('schedule_templates_doctor_id_fkey', 'doctors', ['doctor_id'], ['id'])
+        batch_op.drop_constraint('_weekday_session_uc', type_='unique')
+        batch_op.create_unique_constraint('_doctor_weekday_session_uc', ['doctor_id', 'weekday', 'session'])
+
+    _add_doctor_column('schedule_exceptions')
+    with op.batch_alter_table('schedule_exceptions') as batch_op:
+        batch_op.create_foreign_key('schedule_exceptions_doctor_id_fkey', 'doctors', ['doctor_id'], ['id'])
+    op.drop_index(op.f('ix_schedule_exceptions_date'), table_name='schedule_exceptions')
+    op.create_index('ix_schedule_exceptions_doctor_date', 'schedule_exceptions', ['doctor_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema. Only rows of the default doctor can survive it."""
+    bind = op.get_bind()
+    is_postgres = bind.dialect.name == 'postgresql'
+
+    op.execute("DELETE FROM schedule_exceptions WHERE doctor_id <> 1")
+    op.drop_index('ix_schedule_exceptions_doctor_date', table_name='schedule_exceptions')
+    op.create_index(op.f('ix_schedule_exceptions_date'), 'schedule_exceptions', ['date'], unique=False)
+    with op.batch_alter_table('schedule_exceptions') as batch_op:
+        batch_op.drop_constraint('schedule_exceptions_doctor_id_fkey', type_='foreignkey')
+        batch_op.drop_column('doctor_id')
+
+    op.execute("DELETE FROM schedule_templates WHERE doctor_id <> 1")
+    with op.batch_alter_table('schedule_templates') as batch_op:
+        batch_op.drop_constraint('_doctor_weekday_session_uc', type_='unique')
+        batch_op.create_unique_constraint('_weekday_session_uc', ['weekday', 'session'])
+        batch_op.drop_constraint('schedule_templates_doctor_id_fkey', type_='foreignkey')
+        batch_op.drop_column('doctor_id')
+
+    for table in KEYED_BY_SESSION:
+        op.execute(f"DELETE FROM {table} WHERE doctor_id <> 1")
+        _set_session_key(table, ['date', 'session'], is_postgres)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('doctor_id')
+
+    op.execute("DELETE FROM bookings WHERE doctor_id <> 1")
+    partitioned = is_postgres and bind.execute(
+        sa.text("SELECT relkind FROM pg_class WHERE relname = 'bookings'")
+    ).scalar() == 'p'
+    if partitioned:
+        _unpartition_bookings()
+        with op.batch_alter_table('bookings') as batch_op:
+            batch_op.create_unique_constraint('_date_timeslot_uc', ['date', 'timeslot'])
+            batch_op.drop_column('doctor_id')
+    else:
+        op.drop_index('ix_bookings_doctor_date_session_timeslot', table_name='bookings')
+        with op.batch_alter_table('bookings') as batch_op:
+            batch_op.drop_constraint('_doctor_date_timeslot_uc', type_='unique')
+            batch_op.drop_constraint('bookings_doctor_id_fkey', type_='foreignkey')
+            batch_op.create_unique_constraint('_date_timeslot_uc', ['date', 'timeslot'])
+            batch_op.drop_column('doctor_id')
+
+    op.drop_index(op.f('ix_doctors_clinic_id'), table_name='doctors')
+    op.drop_index(op.f('ix_doctors_id'), table_name='doctors')
+    op.drop_table('doctors')
+    op.drop_index(op.f('ix_clinics_id'), table_name='clinics')
+    op.drop_table('clinics')
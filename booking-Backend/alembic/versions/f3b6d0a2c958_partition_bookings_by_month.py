@@ -0,0 +1,206 @@
+"""partition bookings by month
+
+Revision ID: f3b6d0a2c958
+Revises: c7d2e9f4a816
+Create Date: 2025-09-15 10:37:26.904183
+
+On Postgres, bookings becomes a table range-partitioned by date with one
+partition per month (bookings_y2025m09, ...), from the month of the oldest
+booking through MONTHS_AHEAD months past the current one, plus
+bookings_default for anything outside them. If bookings was hash-partitioned
+by doctor (-x doctor_partitions=N in e4a9c1d7b2f6), each month is in turn
+hash-partitioned by doctor with the same modulus.
+
+It also creates the archive schema: archive.bookings, to which
+archive_bookings.py attaches months it takes out of the live table, and
+archive.archived_months, which records every archived month. Later months are
+added with 'python archive_bookings.py create-partitions'.
+
+Offline (--sql) runs cannot look at the data: months start at the current one
+(or -x partition_start=YYYY-MM) and -x doctor_partitions=N sets the doctor
+sub-partitions. Older rows land in bookings_default until create-partitions
+is run for them.
+
+Other databases have no partitioning; there only bookings.date becomes NOT
+NULL, as it is on Postgres as the partition key.
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b6d0a2c958'
+down_revision: Union[str, Sequence[str], None] = 'c7d2e9f4a816'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+BOOKING_COLUMNS = "id, doctor_id, user_id, date, session, timeslot, order_number, turn_number"
+
+
+def _x_argument(name: str):
+    return context.get_x_argument(as_dictionary=True).get(name)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _scalar(sql: str):
+    return op.get_bind().execute(sa.text(sql)).scalar()
+
+
+def _doctor_partitions() -> int:
+    """The modulus of the current hash partitioning of bookings by doctor, 0 if none."""
+    if context.is_offline_mode():
+        return int(_x_argument('doctor_partitions') or 0)
+    if _scalar("SELECT partstrat FROM pg_partitioned_table WHERE partrelid = 'bookings'::regclass") != 'h':
+        return 0
+    return _scalar("SELECT count(*) FROM pg_inherits WHERE inhparent = 'bookings'::regclass")
+
+
+def _monthly_doctor_partitions() -> int:
+    """The number of doctor sub-partitions in each month, 0 if months are not sub-partitioned."""
+    if context.is_offline_mode():
+        return int(_x_argument('doctor_partitions') or 0)
+    return _scalar(
+        "SELECT count(*) FROM pg_inherits WHERE inhparent = ("
+        " SELECT c.oid FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid"
+        " WHERE i.inhparent = 'bookings'::regclass AND c.relkind = 'p' LIMIT 1)"
+    )
+
+
+def _first_month() -> date:
+    start = _x_argument('partition_start')
+    if start:
+        year, month = start.split('-')
+        return date(int(year), int(month), 1)
+    today = date.today().replace(day=1)
+    if context.is_offline_mode():
+        return today
+    oldest = _scalar("SELECT min(date) FROM bookings")
+    return min(oldest.replace(day=1), today) if oldest else today
+
+
+def _create_table(name: str, partition_by: str = ""):
+    # Constraints and indexes are added once the rows are in
+    op.execute(
+        f"CREATE TABLE {name} ("
+        " id INTEGER NOT NULL DEFAULT nextval('bookings_id_seq'),"
+        " doctor_id INTEGER NOT NULL,"
+        " user_id INTEGER,"
+        " date DATE NOT NULL, session VARCHAR, timeslot TIME,"
+        " order_number INTEGER, turn_number INTEGER"
+        f"){' PARTITION BY ' + partition_by if partition_by else ''}"
+    )
+
+
+def _create_month(month: date, doctor_partitions: int):
+    name = f"bookings_y{month:%Y}m{month:%m}"
+    bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+    if not doctor_partitions:
+        op.execute(f"CREATE TABLE {name} PARTITION OF bookings {bounds}")
+        return
+    op.execute(f"CREATE TABLE {name} PARTITION OF bookings {bounds} PARTITION BY HASH (doctor_id)")
+    for remainder in range(doctor_partitions):
+        op.execute(
+            f"CREATE TABLE {name}_p{remainder} PARTITION OF {name} "
+            f"FOR VALUES WITH (MODULUS {doctor_partitions}, REMAINDER {remainder})"
+        )
+
+
+def _add_constraints_and_indexes(primary_key: str):
+    op.execute(f"ALTER TABLE bookings ADD CONSTRAINT bookings_pkey PRIMARY KEY ({primary_key})")
+    op.create_foreign_key('bookings_doctor_id_fkey', 'bookings', 'doctors', ['doctor_id'], ['id'])
+    op.create_foreign_key('bookings_user_id_fkey', 'bookings', 'users', ['user_id'], ['id'])
+    op.create_unique_constraint('_doctor_date_timeslot_uc', 'bookings', ['doctor_id', 'date', 'timeslot'])
+    op.create_index(op.f('ix_bookings_id'), 'bookings', ['id'], unique=False)
+    op.create_index(op.f('ix_bookings_date'), 'bookings', ['date'], unique=False)
+    op.create_index(op.f('ix_bookings_user_id'), 'bookings', ['user_id'], unique=False)
+    op.create_index('ix_bookings_doctor_date_session_timeslot', 'bookings',
+                    ['doctor_id', 'date', 'session', 'timeslot'], unique=False)
+    op.create_index('ix_bookings_doctor_date_turn_session', 'bookings',
+                    ['doctor_id', 'date', 'turn_number', 'session'], unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        with op.batch_alter_table('bookings') as batch_op:
+            batch_op.alter_column('date', existing_type=sa.Date(), nullable=False)
+        return
+    doctor_partitions = _doctor_partitions()
+    first_month = _first_month()
+    last_month = date.today().replace(day=1)
+    for _ in range(MONTHS_AHEAD):
+        last_month = _next_month(last_month)
+
+    # 1. The partitioned table with a partition per month, and a default one
+    op.execute("ALTER TABLE bookings RENAME TO bookings_unpartitioned")
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY NONE")
+    _create_table("bookings", "RANGE (date)")
+    month = first_month
+    while month <= last_month:
+        _create_month(month, doctor_partitions)
+        month = _next_month(month)
+    op.execute("CREATE TABLE bookings_default PARTITION OF bookings DEFAULT")
+
+    # 2. Move the rows, then build the keys and indexes once per partition
+    op.execute(f"INSERT INTO bookings ({BOOKING_COLUMNS}) SELECT {BOOKING_COLUMNS} FROM bookings_unpartitioned")
+    op.execute("DROP TABLE bookings_unpartitioned")
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY bookings.id")
+    # A partitioned table's primary key must contain every partition key
+    _add_constraints_and_indexes("doctor_id, id, date" if doctor_partitions else "id, date")
+
+    # 3. The archive: months taken out of the live table, never written by the API
+    op.execute("CREATE SCHEMA IF NOT EXISTS archive")
+    op.execute(
+        "CREATE TABLE archive.bookings ("
+        " id INTEGER NOT NULL, doctor_id INTEGER NOT NULL, user_id INTEGER,"
+        " date DATE NOT NULL, session VARCHAR, timeslot TIME,"
+        " order_number INTEGER, turn_number INTEGER"
+        ") PARTITION BY RANGE (date)"
+    )
+    op.create_table('archived_months',
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('exported_to', sa.String(), nullable=True),
+    sa.Column('dropped', sa.Boolean(), nullable=False, server_default=sa.false()),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('month'),
+    schema='archive'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema. Archived months come back into bookings; exported and dropped ones do not."""
+    if op.get_bind().dialect.name != 'postgresql':
+        with op.batch_alter_table('bookings') as batch_op:
+            batch_op.alter_column('date', existing_type=sa.Date(), nullable=True)
+        return
+    doctor_partitions = _monthly_doctor_partitions()
+
+    op.execute("ALTER TABLE bookings RENAME TO bookings_by_month")
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY NONE")
+    if doctor_partitions:
+        # Back to the hash partitioning of e4a9c1d7b2f6
+        _create_table("bookings", "HASH (doctor_id)")
+        for remainder in range(doctor_partitions):
+            op.execute(
+                f"CREATE TABLE bookings_doctor_p{remainder} PARTITION OF bookings "
+                f"FOR VALUES WITH (MODULUS {doctor_partitions}, REMAINDER {remainder})"
+            )
+    else:
+        _create_table("bookings")
+    op.execute(f"INSERT INTO bookings ({BOOKING_COLUMNS}) SELECT {BOOKING_COLUMNS} FROM bookings_by_month")
+    op.execute(f"INSERT INTO bookings ({BOOKING_COLUMNS}) SELECT {BOOKING_COLUMNS} FROM archive.bookings")
+    op.execute("DROP TABLE bookings_by_month")
+    op.execute("DROP SCHEMA archive CASCADE")
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY bookings.id")
+    op.alter_column('bookings', 'date', nullable=True)
+    _add_constraints_and_indexes("doctor_id, id" if doctor_partitions else "id")
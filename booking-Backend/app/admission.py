@@ -0,0 +1,145 @@
+# app/admission.py
+"""
+Admission control for the booking write path.
+
+When booking opens, far more patients submit at once than the database can
+usefully serve, and most of them race for the same early slots. Booking
+requests therefore pass a per-worker gate that lets BOOKING_MAX_CONCURRENCY
+transactions run at a time; the rest wait in strict arrival order. Requests
+beyond BOOKING_QUEUE_SIZE, or that wait longer than BOOKING_QUEUE_WAIT_SECONDS,
+are turned away with their queue position and an estimated wait.
+
+Before queueing, and again once admitted, the request is checked against the
+availability cache and the slot holds, so a slot or day that is already taken
+is refused without a database write.
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import date, time as dt_time
+from functools import lru_cache
+
+from . import availability, database, holds
+from .core.config import get_settings
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a booking request cannot get a turn in time."""
+
+    def __init__(self, queue_position: int, estimated_wait_seconds: float):
+        super().__init__("The booking queue is full, please try again shortly.")
+        self.queue_position = queue_position
+        self.estimated_wait_seconds = estimated_wait_seconds
+
+
+class SlotUnavailableError(Exception):
+    """Raised when the requested slot, or every slot of the day, is already booked."""
+
+
+class AdmissionGate:
+    """A FIFO gate allowing at most 'max_active' holders at a time."""
+
+    # Weight of the newest sample in the moving average of hold times
+    _SMOOTHING = 0.2
+
+    def __init__(self, max_active: int, max_waiting: int, max_wait_seconds: float):
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.max_wait_seconds = max_wait_seconds
+        self._active = 0
+        self._waiters: deque = deque()
+        self._avg_hold_seconds = 0.05
+
+    def estimated_wait(self, queue_position: int) -> float:
+        return queue_position * self._avg_hold_seconds / self.max_active
+
+    def status(self) -> dict:
+        return {
+            "active": self._active,
+            "waiting": len(self._waiters),
+            "max_active": self.max_active,
+            "max_waiting": self.max_waiting,
+            "estimated_wait_seconds": round(self.estimated_wait(len(self._waiters) + 1), 2),
+        }
+
+    async def _acquire(self):
+        if self._active < self.max_active and not self._waiters:
+            self._active += 1
+            return
+
+        queue_position = len(self._waiters) + 1
+        if queue_position > self.max_waiting:
+            raise AdmissionRejectedError(queue_position, self.estimated_wait(queue_position))
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.max_wait_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The turn was handed over just as we gave up; pass it on
+                self._release()
+            else:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            queue_position = len(self._waiters) + 1
+            raise AdmissionRejectedError(queue_position, self.estimated_wait(queue_position))
+
+    def _release(self):
+        # The turn goes straight to the longest-waiting request, so the active
+        # count only drops when nobody is queued.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def admit(self):
+        await self._acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            held = time.monotonic() - started
+            self._avg_hold_seconds += self._SMOOTHING * (held - self._avg_hold_seconds)
+            self._release()
+
+
+@lru_cache(maxsize=1)
+def get_booking_gate() -> AdmissionGate:
+    settings = get_settings()
+    return AdmissionGate(
+        max_active=settings.booking_max_concurrency,
+        max_waiting=settings.booking_queue_size,
+        max_wait_seconds=settings.booking_queue_wait_seconds,
+    )
+
+
+async def _ensure_available(doctor_id: int, booking_date: date, timeslot: dt_time, session_name: str):
+    # A short-lived read session, so a queued request never holds a pooled connection
+    async with database.AsyncReadSessionLocal() as db:
+        day = await availability.get_day_availability(db, doctor_id, booking_date)
+    if availability.is_fully_booked(day):
+        raise SlotUnavailableError("All slots for this date are already booked.")
+    if availability.is_slot_booked(day, session_name, timeslot):
+        raise SlotUnavailableError("This timeslot is already booked.")
+    if await holds.is_held(doctor_id, booking_date, timeslot):
+        raise SlotUnavailableError("This timeslot is currently held by another patient.")
+
+
+@asynccontextmanager
+async def booking_admission(doctor_id: int, booking_date: date, timeslot: dt_time, session_name: str):
+    """
+    Waits for a turn to run a booking transaction.
+    Raises SlotUnavailableError or AdmissionRejectedError instead of admitting
+    a request that would only end in a conflict or a timeout.
+    """
+    await _ensure_available(doctor_id, booking_date, timeslot, session_name)
+    async with get_booking_gate().admit():
+        # Bookings committed while this request waited are already in the cache
+        await _ensure_available(doctor_id, booking_date, timeslot, session_name)
+        yield
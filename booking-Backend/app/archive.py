@@ -0,0 +1,129 @@
+# app/archive.py
+"""
+Read-only access to archived bookings.
+
+On Postgres, bookings is partitioned by month. archive_bookings.py detaches old
+months from the live table and attaches them to archive.bookings (or exports
+and drops them), recording each month in archive.archived_months. Live queries
+never plan over archived months; the dashboard reads an archived date from
+archive.bookings instead, on its own read-only connection.
+
+Which months are archived is cached per worker for ARCHIVE_CACHE_TTL_SECONDS,
+and cleared early when the CLI announces an archiving run. Other databases
+have no archive and every date is live.
+"""
+import logging
+import threading
+import time as clock
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import (Boolean, Column, Date, DateTime, Integer, MetaData, String, Table, Time, func, select,
+                        text)
+from sqlalchemy.exc import DBAPIError
+
+from . import database, models
+from .core.config import ARCHIVE_CACHE_TTL_SECONDS, ARCHIVE_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+# Kept out of Base.metadata so create_all never tries to build them
+archive_metadata = MetaData(schema=ARCHIVE_SCHEMA)
+
+archived_bookings = Table(
+    "bookings", archive_metadata,
+    Column("id", Integer, nullable=False),
+    Column("doctor_id", Integer, nullable=False),
+    Column("user_id", Integer),
+    Column("date", Date, nullable=False),
+    Column("session", String),
+    Column("timeslot", Time),
+    Column("order_number", Integer),
+    Column("turn_number", Integer),
+)
+
+archived_months = Table(
+    "archived_months", archive_metadata,
+    Column("month", Date, primary_key=True),
+    Column("row_count", Integer, nullable=False),
+    Column("exported_to", String),
+    Column("dropped", Boolean, nullable=False),
+    Column("archived_at", DateTime, nullable=False),
+)
+
+_lock = threading.Lock()
+# First day after the newest archived month; None when nothing is archived
+_archived_before: Optional[date] = None
+_loaded_at: Optional[float] = None
+# Bumped by invalidate(); a load that raced with an archiving run is not cached
+_generation = 0
+
+
+def invalidate():
+    """Forgets which months are archived; called when archive_bookings.py has run."""
+    global _loaded_at, _generation
+    with _lock:
+        _loaded_at = None
+        _generation += 1
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+async def archived_before() -> Optional[date]:
+    """Dates before this one live in the archive; None while nothing is archived."""
+    global _archived_before, _loaded_at
+    engine = database.get_replica_engine()
+    if engine.dialect.name != "postgresql":
+        return None
+    with _lock:
+        if _loaded_at is not None and clock.monotonic() - _loaded_at < ARCHIVE_CACHE_TTL_SECONDS:
+            return _archived_before
+        generation = _generation
+
+    try:
+        async with engine.connect() as conn:
+            newest = (await conn.execute(select(func.max(archived_months.c.month)))).scalar()
+    except DBAPIError:
+        # No archive schema yet (the partitioning migration has not run)
+        logger.debug("No booking archive found", exc_info=True)
+        newest = None
+    loaded = next_month(newest) if newest is not None else None
+
+    with _lock:
+        if generation == _generation:
+            _archived_before = loaded
+            _loaded_at = clock.monotonic()
+    return loaded
+
+
+async def is_archived(day: date) -> bool:
+    boundary = await archived_before()
+    return boundary is not None and day < boundary
+
+
+async def get_bookings_for_date(doctor_id: int, target_date: date) -> List[dict]:
+    """
+    A doctor's archived bookings on a date with their users, ordered by turn number,
+    in the shape of schemas.Booking. Empty for months that were exported and dropped.
+    """
+    users = models.User.__table__
+    async with database.get_replica_engine().connect() as conn:
+        await conn.execute(text("SET TRANSACTION READ ONLY"))
+        result = await conn.execute(
+            select(archived_bookings, users.c.name, users.c.phone_number)
+            .join(users, users.c.id == archived_bookings.c.user_id)
+            .where(archived_bookings.c.doctor_id == doctor_id, archived_bookings.c.date == target_date)
+            .order_by(archived_bookings.c.turn_number.asc())
+        )
+        rows = result.mappings().all()
+
+    return [
+        {
+            "id": row["id"], "doctor_id": row["doctor_id"], "date": row["date"], "timeslot": row["timeslot"],
+            "session": row["session"], "order_number": row["order_number"], "turn_number": row["turn_number"],
+            "user": {"id": row["user_id"], "name": row["name"], "phone_number": row["phone_number"]},
+        }
+        for row in rows
+    ]
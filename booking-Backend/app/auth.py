@@ -1,31 +1,98 @@
 # app/auth.py
-import os
+import asyncio
+import secrets
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from dotenv import load_dotenv
+from functools import lru_cache
 
-load_dotenv()
+from .core.config import get_settings
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+class HashingOverloadedError(Exception):
+    """Raised when too many hash operations are already queued."""
+
+
+@lru_cache(maxsize=1)
+def get_pwd_context() -> CryptContext:
+    # Hashes with a different cost than BCRYPT_ROUNDS are flagged for rehashing,
+    # which happens on the next successful login.
+    rounds = get_settings().bcrypt_rounds
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_desired_rounds=rounds,
+        bcrypt__max_desired_rounds=rounds,
+    )
+
+# Hashing runs on its own small thread pool (bcrypt releases the GIL), so a burst
+# of logins cannot take threads or event-loop time from the booking endpoints.
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_pending_hashes = 0
+# Checked against when the account does not exist; see verify_missing_account_async
+_dummy_hash: Optional[str] = None
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=get_settings().auth_hash_workers,
+            thread_name_prefix="bcrypt"
+        )
+    return _hash_executor
+
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+async def _run_hashing(func, *args):
+    """Runs a bcrypt operation on the dedicated executor, refusing work beyond the pending limit."""
+    global _pending_hashes
+    if _pending_hashes >= get_settings().auth_hash_max_pending:
+        raise HashingOverloadedError("Too many login attempts are being processed, please try again shortly.")
+    _pending_hashes += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        _pending_hashes -= 1
+
+async def verify_password_async(plain_password, hashed_password):
+    """
+    Verifies a password off the event loop.
+    Returns (is_valid, new_hash); new_hash is set when the stored hash should be
+    replaced because its cost no longer matches BCRYPT_ROUNDS.
+    """
+    return await _run_hashing(get_pwd_context().verify_and_update, plain_password, hashed_password)
+
+async def verify_missing_account_async(plain_password):
+    """
+    Does the same bcrypt work as verify_password_async for a username that
+    does not exist, so response times do not tell which accounts exist.
+    Always fails.
+    """
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await get_password_hash_async(secrets.token_urlsafe(16))
+    await _run_hashing(get_pwd_context().verify_and_update, plain_password, _dummy_hash)
+    return False, None
+
+async def get_password_hash_async(password):
+    return await _run_hashing(get_pwd_context().hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.now(timezone.utc) + timedelta(minutes=get_settings().access_token_expire_minutes)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    settings = get_settings()
+    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
\ No newline at end of file
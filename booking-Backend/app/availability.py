@@ -0,0 +1,260 @@
+# app/availability.py
+"""
+Per-doctor, per-date slot availability served from an in-process cache.
+
+Each cached (doctor, date) holds one bitmap per session ('1' = booked) laid out by that
+day's schedule (see app/schedule.py). The booking write paths update the bitmap
+after committing, so a cache hit never touches the database. Entries also
+expire after AVAILABILITY_CACHE_TTL_SECONDS to bound staleness when several
+workers are running.
+
+Entries remember the booking version (see crud.get_booking_versions) they are
+known to be current for, which the read endpoints build their ETags from
+without a query (cached_version). A reader that passes a newer version from
+the database reloads an entry that is behind it, so a response labelled with
+a version never shows less than that version's bookings. An entry that misses
+a write loses its version and is read from the database again.
+"""
+import threading
+import time as clock
+from collections import OrderedDict
+from datetime import date, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, schedule
+from .core.config import (SLOT_DURATION_MINUTES,
+                          AVAILABILITY_CACHE_TTL_SECONDS,
+                          AVAILABILITY_CACHE_MAX_DATES)
+
+
+# Slot layout of a day on the default hours (SESSIONS); real days follow their schedule
+SESSION_SLOTS: Dict[str, List[time]] = {
+    name: schedule.build_session_slots(start, end)
+    for name, start, end in schedule.DEFAULT_HOURS
+}
+
+
+class _DayEntry:
+    __slots__ = ("schedule", "bitmaps", "loaded_at", "version")
+
+    def __init__(self, day_schedule: schedule.DaySchedule, bitmaps: Dict[str, bytearray],
+                 version: Optional[int] = None):
+        self.schedule = day_schedule
+        self.bitmaps = bitmaps
+        self.loaded_at = clock.monotonic()
+        # The booking version the bitmaps include at least (None = unknown)
+        self.version = version
+
+
+_lock = threading.Lock()
+_cache: "OrderedDict[Tuple[int, date], _DayEntry]" = OrderedDict()
+# Loads in flight per (doctor, date), and the writes seen while any of them
+# ran; a load that raced with a write is not cached. Both only hold keys that
+# are being loaded, so they stay as small as the number of concurrent misses.
+_loading: Dict[Tuple[int, date], int] = {}
+_write_seq: Dict[Tuple[int, date], int] = {}
+# Bumped when every day is invalidated at once
+_epoch = 0
+
+
+def _empty_bitmaps(day_schedule: schedule.DaySchedule) -> Dict[str, bytearray]:
+    return {name: bytearray(b"0" * len(slots)) for name, slots in day_schedule.slots.items()}
+
+
+async def _load_day(db: AsyncSession, doctor_id: int, day: date, version: Optional[int]) -> _DayEntry:
+    """Builds the bitmaps for a doctor's day with a single two-column query."""
+    day_schedule = await schedule.get_day_schedule(db, doctor_id, day)
+    bitmaps = _empty_bitmaps(day_schedule)
+    if day_schedule.is_closed:
+        return _DayEntry(day_schedule, bitmaps, version)
+    result = await db.execute(
+        select(models.Booking.session, models.Booking.timeslot).where(
+            models.Booking.doctor_id == doctor_id,
+            models.Booking.date == day
+        )
+    )
+    for session_name, timeslot in result.all():
+        index = day_schedule.slot_index(session_name, timeslot)
+        if index is not None:
+            bitmaps[session_name][index] = ord("1")
+    return _DayEntry(day_schedule, bitmaps, version)
+
+
+def _serialize(doctor_id: int, day: date, entry: _DayEntry) -> dict:
+    return {
+        "doctor_id": doctor_id,
+        "date": day,
+        "slot_minutes": SLOT_DURATION_MINUTES,
+        "sessions": [
+            {
+                "session": name,
+                "start": start,
+                "end": end,
+                "bitmap": entry.bitmaps[name].decode(),
+                "free": entry.bitmaps[name].count(b"0"),
+            }
+            for name, start, end in entry.schedule.hours
+        ],
+    }
+
+
+def _session_slot_index(session_entry: dict, timeslot: time):
+    """Index of 'timeslot' in a serialized session's bitmap, or None."""
+    start = session_entry["start"]
+    offset = (timeslot.hour * 60 + timeslot.minute) - (start.hour * 60 + start.minute)
+    if offset < 0 or offset % SLOT_DURATION_MINUTES or timeslot.second:
+        return None
+    index = offset // SLOT_DURATION_MINUTES
+    return index if index < len(session_entry["bitmap"]) else None
+
+
+def build_range_availability(doctor_id: int, start_date: date, end_date: date, counts,
+                             schedules: Dict[date, schedule.DaySchedule]) -> dict:
+    """
+    Returns a doctor's free and total slot counts per session for every date in a range.
+    'counts' are (date, session, bookings) rows from crud.get_booking_counts_by_session
+    and 'schedules' come from schedule.get_schedules for the same doctor and range.
+    """
+    booked = {(day, session_name): count for day, session_name, count in counts}
+    days = []
+    current = start_date
+    while current <= end_date:
+        days.append({
+            "date": current,
+            "sessions": [
+                {
+                    "session": name,
+                    "total": len(slots),
+                    "free": max(len(slots) - booked.get((current, name), 0), 0),
+                }
+                for name, slots in schedules[current].slots.items()
+            ],
+        })
+        current += timedelta(days=1)
+    return {"doctor_id": doctor_id, "start_date": start_date, "end_date": end_date, "days": days}
+
+
+def _is_current(entry: _DayEntry, version: Optional[int]) -> bool:
+    if clock.monotonic() - entry.loaded_at >= AVAILABILITY_CACHE_TTL_SECONDS:
+        return False
+    return version is None or (entry.version is not None and entry.version >= version)
+
+
+def cached_version(doctor_id: int, day: date) -> Optional[int]:
+    """The booking version of a cached day, or None when it has to be read from the database."""
+    with _lock:
+        entry = _cache.get((doctor_id, day))
+        if entry is None or not _is_current(entry, None):
+            return None
+        return entry.version
+
+
+async def get_day_availability(db: AsyncSession, doctor_id: int, day: date,
+                               version: Optional[int] = None) -> dict:
+    """
+    Returns the availability of every session of a doctor's day, loading it on a
+    cache miss. With the day's booking 'version' (read before calling), a cached
+    day that is behind it is reloaded too.
+    """
+    key = (doctor_id, day)
+    with _lock:
+        entry = _cache.get(key)
+        if entry and _is_current(entry, version):
+            _cache.move_to_end(key)
+            return _serialize(doctor_id, day, entry)
+        seq_before = (_epoch, _write_seq.get(key, 0))
+        _loading[key] = _loading.get(key, 0) + 1
+
+    try:
+        entry = await _load_day(db, doctor_id, day, version)
+    finally:
+        with _lock:
+            raced = (_epoch, _write_seq.get(key, 0)) != seq_before
+            _loading[key] -= 1
+            if not _loading[key]:
+                del _loading[key]
+                _write_seq.pop(key, None)
+
+    with _lock:
+        if not raced:
+            _cache[key] = entry
+            _cache.move_to_end(key)
+            while len(_cache) > AVAILABILITY_CACHE_MAX_DATES:
+                _cache.popitem(last=False)
+        return _serialize(doctor_id, day, entry)
+
+
+def is_slot_booked(day_availability: dict, session_name: str, timeslot: time) -> bool:
+    """Whether 'timeslot' is marked booked in a get_day_availability() result."""
+    for entry in day_availability["sessions"]:
+        if entry["session"] == session_name:
+            index = _session_slot_index(entry, timeslot)
+            return index is not None and entry["bitmap"][index] == "1"
+    return False
+
+
+def is_fully_booked(day_availability: dict) -> bool:
+    return all(entry["free"] == 0 for entry in day_availability["sessions"])
+
+
+def with_held_slots(day_availability: dict, held: Dict[str, List[time]]) -> dict:
+    """Returns a copy of a get_day_availability() result with held slots shown as taken."""
+    if not held:
+        return day_availability
+    sessions = []
+    for entry in day_availability["sessions"]:
+        bitmap = bytearray(entry["bitmap"].encode())
+        for slot in held.get(entry["session"], ()):
+            index = _session_slot_index(entry, slot)
+            if index is not None:
+                bitmap[index] = ord("1")
+        sessions.append({**entry, "bitmap": bitmap.decode(), "free": bitmap.count(b"0")})
+    return {**day_availability, "sessions": sessions}
+
+
+def _note_write(key: Tuple[int, date]):
+    """Makes loads of 'key' that are in flight discard their result. Call with _lock held."""
+    if key in _loading:
+        _write_seq[key] = _write_seq.get(key, 0) + 1
+
+
+def mark_booked(doctor_id: int, day: date, timeslot: time, session_name: str, version: Optional[int] = None):
+    """
+    Records a committed booking in the cached bitmap for its doctor and day, if cached.
+    'version' is the day's booking version after the write that made it.
+    """
+    key = (doctor_id, day)
+    with _lock:
+        _note_write(key)
+        entry = _cache.get(key)
+        if entry is None:
+            return
+        index = entry.schedule.slot_index(session_name, timeslot)
+        if index is None:
+            del _cache[key]
+            return
+        entry.bitmaps[session_name][index] = ord("1")
+        # The entry is current for the new version only if it had every earlier write
+        if version is not None and entry.version is not None and entry.version >= version - 1:
+            entry.version = max(entry.version, version)
+        else:
+            entry.version = None
+
+
+def invalidate(doctor_id: int, day: date):
+    """Drops a doctor's day from the cache so the next read reloads it."""
+    key = (doctor_id, day)
+    with _lock:
+        _note_write(key)
+        _cache.pop(key, None)
+
+
+def invalidate_all():
+    """Drops every cached day, e.g. after the schedule changed."""
+    global _epoch
+    with _lock:
+        _epoch += 1
+        _cache.clear()
@@ -1,6 +1,12 @@
 # app/core/config.py
 
+import os
+from dataclasses import dataclass
 from datetime import time
+from functools import lru_cache
+from typing import Optional
+
+from dotenv import load_dotenv
 
 # --- Booking Time Settings ---
 
@@ -25,4 +31,201 @@ SESSIONS = {
         "start": time(17, 0, 0), # 5 PM
         "end": time(23, 59, 59) # Up to midnight
     }
-}
\ No newline at end of file
+}
+
+# --- Doctors ---
+# Requests that name no doctor are booked with this one, so single-doctor
+# deployments and older clients keep working unchanged.
+DEFAULT_DOCTOR_ID = 1
+DEFAULT_CLINIC_ID = 1
+
+# Doctors (and their clinics) are cached per worker for this long
+DOCTOR_CACHE_TTL_SECONDS = 60
+
+# --- Users ---
+# Phone number -> user entries kept per worker for returning patients
+USER_CACHE_MAX_ENTRIES = 10000
+
+# --- Availability Cache ---
+# Seconds a cached day of slot availability is trusted before it is reloaded.
+# Writes on this worker update the cache directly; the TTL bounds how long
+# bookings made on other workers can go unseen.
+AVAILABILITY_CACHE_TTL_SECONDS = 5
+
+# Maximum number of (doctor, date) days kept in the availability cache
+AVAILABILITY_CACHE_MAX_DATES = 256
+
+# Longest date range (in days, inclusive) served by the range availability endpoint
+AVAILABILITY_MAX_RANGE_DAYS = 62
+
+# --- Session Notifications ---
+# Largest number of turns one /admin/notify-session call may cover
+SESSION_NOTIFY_MAX_RECIPIENTS = 100
+
+# Seconds /admin/notify-session waits for delivery before reporting what is still pending
+SESSION_NOTIFY_WAIT_SECONDS = 30
+
+# --- Batch Import ---
+# Most rows one /admin/bookings/import call may carry
+BOOKING_IMPORT_MAX_ROWS = 1000
+
+# --- Idempotency Keys ---
+# How long the response to a booking request sent with an Idempotency-Key is replayed
+IDEMPOTENCY_TTL_SECONDS = 24 * 60 * 60
+# How long a key stays claimed by a request that is still running (or whose worker died)
+IDEMPOTENCY_PENDING_SECONDS = 60
+# How long a duplicate waits for the first request to finish before answering 409
+IDEMPOTENCY_WAIT_SECONDS = 10
+# Polling interval while the first request runs on another worker
+IDEMPOTENCY_POLL_SECONDS = 0.1
+
+# --- Schedule ---
+# Compiled day schedules are cached per (doctor, date) and refreshed at least this often
+SCHEDULE_CACHE_TTL_SECONDS = 300
+SCHEDULE_CACHE_MAX_DATES = 400
+
+# --- Live Slot Events ---
+# Postgres NOTIFY channel shared by all workers
+SLOT_EVENTS_CHANNEL = "slot_events"
+# Events buffered per streaming client before it is told to resync
+SLOT_EVENTS_QUEUE_SIZE = 100
+# Seconds between keep-alive comments on an idle stream
+SLOT_EVENTS_HEARTBEAT_SECONDS = 15
+# How often a worker looks for its expired holds to announce them as 'freed'
+HOLD_SWEEP_INTERVAL_SECONDS = 1
+
+# --- Login Throttling ---
+# Attempts allowed per window before /admin/login answers 429 without hashing
+LOGIN_THROTTLE_WINDOW_SECONDS = 300
+LOGIN_MAX_ATTEMPTS_PER_IP = 20
+LOGIN_MAX_ATTEMPTS_PER_USERNAME = 5
+
+# --- Booking Partitions and Archive (Postgres) ---
+# Monthly bookings partitions are created this many months past the current one
+BOOKING_PARTITION_MONTHS_AHEAD = 3
+
+# Schema holding archived months, attached to archive.bookings and read-only for the API
+ARCHIVE_SCHEMA = "archive"
+
+# Seconds a worker trusts its idea of which months are archived; archive_bookings.py
+# also tells running workers directly
+ARCHIVE_CACHE_TTL_SECONDS = 300
+
+# --- Booking Export ---
+# Rows fetched per round trip from the server-side cursor of /admin/bookings/export
+EXPORT_BATCH_ROWS = 2000
+
+
+# --- Environment Settings ---
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Deployment configuration, read from the environment (and .env) once per process."""
+
+    # Database
+    database_url: Optional[str]
+    async_database_url: Optional[str]
+    read_replica_url: Optional[str]
+    async_read_replica_url: Optional[str]
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout: float          # Seconds to wait for a free connection
+    db_pool_recycle: int            # Seconds before a connection is replaced
+    db_pool_pre_ping: bool
+    db_statement_timeout_ms: int    # 0 disables the timeout
+    # Create missing tables at startup; set to false when Alembic manages the schema
+    auto_create_schema: bool
+
+    # Authentication
+    secret_key: Optional[str]
+    algorithm: Optional[str]
+    access_token_expire_minutes: int
+    bcrypt_rounds: int
+    auth_hash_workers: int
+    auth_hash_max_pending: int
+
+    # Booking admission control (waiting room in front of the booking writes)
+    booking_max_concurrency: int    # Booking transactions allowed at once per worker
+    booking_queue_size: int         # Requests allowed to wait for a turn
+    booking_queue_wait_seconds: float
+
+    # Short-lived state (slot holds); in-process unless a redis:// URL is given
+    ttl_store_url: Optional[str]
+    slot_hold_seconds: int
+
+    # Queue engine: patients this many turns ahead of the one being served get a reminder (0 disables)
+    queue_reminder_turns_ahead: int
+
+    # Text.lk SMS gateway
+    textlk_api_token: Optional[str]
+    textlk_sender_id: Optional[str]
+    textlk_api_url: str
+    sms_connect_timeout: float
+    sms_read_timeout: float
+    sms_max_connections: int
+    sms_dispatch_concurrency: int
+    sms_queue_size: int
+    sms_max_retries: int
+    sms_backoff_base_seconds: float
+    sms_backoff_max_seconds: float
+    sms_breaker_failure_threshold: int
+    sms_breaker_reset_seconds: float
+
+    # Diagnostics: adds X-DB-Query-Count and X-DB-Time-Ms to every response
+    debug_query_stats: bool
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        load_dotenv()
+        return cls(
+            database_url=os.getenv("DATABASE_URL"),
+            async_database_url=os.getenv("ASYNC_DATABASE_URL"),
+            read_replica_url=os.getenv("READ_REPLICA_URL"),
+            async_read_replica_url=os.getenv("ASYNC_READ_REPLICA_URL"),
+            db_pool_size=int(os.getenv("DB_POOL_SIZE", 10)),
+            db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 20)),
+            db_pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+            db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+            db_pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+            db_statement_timeout_ms=int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0)),
+            auto_create_schema=_env_bool("AUTO_CREATE_SCHEMA", True),
+            secret_key=os.getenv("SECRET_KEY"),
+            algorithm=os.getenv("ALGORITHM"),
+            access_token_expire_minutes=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30)),
+            bcrypt_rounds=int(os.getenv("BCRYPT_ROUNDS", 12)),
+            auth_hash_workers=int(os.getenv("AUTH_HASH_WORKERS", 2)),
+            auth_hash_max_pending=int(os.getenv("AUTH_HASH_MAX_PENDING", 16)),
+            booking_max_concurrency=int(os.getenv("BOOKING_MAX_CONCURRENCY", 8)),
+            booking_queue_size=int(os.getenv("BOOKING_QUEUE_SIZE", 200)),
+            booking_queue_wait_seconds=float(os.getenv("BOOKING_QUEUE_WAIT_SECONDS", 10)),
+            ttl_store_url=os.getenv("TTL_STORE_URL"),
+            slot_hold_seconds=int(os.getenv("SLOT_HOLD_SECONDS", 120)),
+            queue_reminder_turns_ahead=int(os.getenv("QUEUE_REMINDER_TURNS_AHEAD", 3)),
+            textlk_api_token=os.getenv("TEXTLK_API_TOKEN"),
+            textlk_sender_id=os.getenv("TEXTLK_SENDER_ID"),
+            textlk_api_url=os.getenv("TEXTLK_API_URL", "https://app.text.lk/api/http/sms/send"),
+            sms_connect_timeout=float(os.getenv("SMS_CONNECT_TIMEOUT", 3)),
+            sms_read_timeout=float(os.getenv("SMS_READ_TIMEOUT", 10)),
+            sms_max_connections=int(os.getenv("SMS_MAX_CONNECTIONS", 10)),
+            sms_dispatch_concurrency=int(os.getenv("SMS_DISPATCH_CONCURRENCY", 4)),
+            sms_queue_size=int(os.getenv("SMS_QUEUE_SIZE", 1000)),
+            sms_max_retries=int(os.getenv("SMS_MAX_RETRIES", 3)),
+            sms_backoff_base_seconds=float(os.getenv("SMS_BACKOFF_BASE_SECONDS", 0.5)),
+            sms_backoff_max_seconds=float(os.getenv("SMS_BACKOFF_MAX_SECONDS", 10)),
+            sms_breaker_failure_threshold=int(os.getenv("SMS_BREAKER_FAILURE_THRESHOLD", 5)),
+            sms_breaker_reset_seconds=float(os.getenv("SMS_BREAKER_RESET_SECONDS", 30)),
+            debug_query_stats=_env_bool("DEBUG_QUERY_STATS", False),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """The process-wide settings, parsed on first use."""
+    return Settings.from_env()
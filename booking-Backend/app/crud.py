@@ -1,153 +1,653 @@
 # app/crud.py
 
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, make_transient_to_detached
 from datetime import date, time, timedelta
-from typing import List
+from typing import Dict, List
 
-from . import models, schemas
-from .core.config import SESSIONS
+from . import models, schemas, archive, availability, doctors, schedule, slot_events, users
 from . import auth
+from .core.config import DEFAULT_CLINIC_ID, DEFAULT_DOCTOR_ID
+
+
+class SlotAlreadyBookedError(Exception):
+    """Raised when the (doctor, date, timeslot) unique constraint rejects a booking."""
+
+
+def _dialect_insert(db: AsyncSession):
+    """Returns the INSERT construct that supports ON CONFLICT for the bound database."""
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite_insert
+    return pg_insert
 
 # --- User CRUD ---
 
-def get_user(db: Session, user_id: int):
-    return db.query(models.User).filter(models.User.id == user_id).first()
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.get(models.User, user_id)
 
-def get_user_by_phone(db: Session, phone_number: str):
-    return db.query(models.User).filter(models.User.phone_number == phone_number).first()
+async def get_user_by_phone(db: AsyncSession, phone_number: str):
+    """
+    Finds a user by canonical phone number. Returning patients come from the
+    worker's cache and are attached to the session without a query.
+    """
+    cached = users.lookup(phone_number)
+    if cached is not None:
+        user_id, name = cached
+        db_user = models.User(id=user_id, name=name, phone_number=phone_number)
+        make_transient_to_detached(db_user)
+        return await db.merge(db_user, load=False)
 
-def create_user(db: Session, user: schemas.UserCreate):
+    result = await db.execute(select(models.User).where(models.User.phone_number == phone_number))
+    db_user = result.scalars().first()
+    if db_user:
+        users.remember(db_user.id, db_user.name, db_user.phone_number)
+    return db_user
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
     db_user = models.User(name=user.name, phone_number=user.phone_number)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    users.invalidate([db_user.phone_number])
+    return db_user
+
+async def get_or_create_user(db: AsyncSession, user: schemas.UserCreate):
+    """
+    Finds a user by phone number or adds a new one to the current transaction.
+    The new row is flushed, not committed, so it is rolled back together with
+    a booking that fails.
+    """
+    db_user = await get_user_by_phone(db, phone_number=user.phone_number)
+    if db_user:
+        return db_user
+
+    db_user = models.User(name=user.name, phone_number=user.phone_number)
+    users.invalidate([user.phone_number])
+    try:
+        async with db.begin_nested():
+            db.add(db_user)
+    except IntegrityError:
+        # Another request registered the same phone number first
+        return await get_user_by_phone(db, phone_number=user.phone_number)
     return db_user
 
 # --- Booking CRUD ---
 
-def get_booking_by_slot(db: Session, booking_date: date, timeslot: time):
-    """Check if a specific timeslot on a specific date is already booked."""
-    return db.query(models.Booking).filter(
+async def get_booking(db: AsyncSession, booking_id: int):
+    """Gets a booking together with its user."""
+    result = await db.execute(
+        select(models.Booking).options(joinedload(models.Booking.user)).where(models.Booking.id == booking_id)
+    )
+    return result.scalars().first()
+
+async def get_booking_by_slot(db: AsyncSession, doctor_id: int, booking_date: date, timeslot: time):
+    """Check if a doctor's timeslot on a specific date is already booked."""
+    result = await db.execute(select(models.Booking).where(
+        models.Booking.doctor_id == doctor_id,
         models.Booking.date == booking_date,
         models.Booking.timeslot == timeslot
-    ).first()
-
-def get_session_for_timeslot(timeslot: time) -> str | None:
-    """Determine the session for a given timeslot from config."""
-    for session_name, timings in SESSIONS.items():
-        if timings["start"] <= timeslot < timings["end"]:
-            return session_name
-    return None
-
-def get_next_order_number(db: Session, booking_date: date, session: str) -> int:
-    """Calculate the next order number for a given session on a specific date."""
-    last_booking = db.query(models.Booking).filter(
-        models.Booking.date == booking_date,
-        models.Booking.session == session
-    ).order_by(models.Booking.order_number.desc()).first()
+    ))
+    return result.scalars().first()
+
+async def get_bookings_with_users_for_date(db: AsyncSession, doctor_id: int, target_date: date) -> List[models.Booking]:
+    """Gets a doctor's bookings for a specific date with their users in one query."""
+    result = await db.execute(
+        select(models.Booking).options(joinedload(models.Booking.user)).where(
+            models.Booking.doctor_id == doctor_id,
+            models.Booking.date == target_date
+        )
+    )
+    return list(result.scalars().all())
 
-    if last_booking:
-        return last_booking.order_number + 1
-    return 1
+async def get_bookings_for_turns(db: AsyncSession, doctor_id: int, booking_date: date, session: str,
+                                 turn_from: int, turn_to: int) -> List[models.Booking]:
+    """Gets the bookings with turn numbers in [turn_from, turn_to] for a doctor's session, users included."""
+    result = await db.execute(
+        select(models.Booking).options(joinedload(models.Booking.user)).where(
+            models.Booking.doctor_id == doctor_id,
+            models.Booking.date == booking_date,
+            models.Booking.session == session,
+            models.Booking.turn_number >= turn_from,
+            models.Booking.turn_number <= turn_to
+        ).order_by(models.Booking.turn_number.asc())
+    )
+    return list(result.scalars().all())
+
+async def allocate_order_number(db: AsyncSession, doctor_id: int, booking_date: date, session: str,
+                                count: int = 1) -> int:
+    """
+    Atomically reserves the next order number (or the next `count` of them, returning
+    the last) for a doctor's session on a date. The upsert locks the counter row until
+    the surrounding transaction ends, so concurrent bookings for the same session are
+    serialised here.
+    """
+    insert = _dialect_insert(db)
+    stmt = insert(models.SessionCounter).values(
+        doctor_id=doctor_id,
+        date=booking_date,
+        session=session,
+        last_order_number=count
+    ).on_conflict_do_update(
+        index_elements=[models.SessionCounter.doctor_id, models.SessionCounter.date, models.SessionCounter.session],
+        set_={"last_order_number": models.SessionCounter.last_order_number + count}
+    ).returning(models.SessionCounter.last_order_number)
+    return (await db.execute(stmt)).scalar_one()
+
+async def increment_daily_booking_count(db: AsyncSession, doctor_id: int, booking_date: date, session: str,
+                                        count: int = 1):
+    """Adds bookings (one by default) to the daily rollup within the current transaction."""
+    insert = _dialect_insert(db)
+    stmt = insert(models.DailyBookingCount).values(
+        doctor_id=doctor_id,
+        date=booking_date,
+        session=session,
+        booking_count=count
+    ).on_conflict_do_update(
+        index_elements=[models.DailyBookingCount.doctor_id, models.DailyBookingCount.date,
+                        models.DailyBookingCount.session],
+        set_={"booking_count": models.DailyBookingCount.booking_count + count}
+    )
+    await db.execute(stmt)
 
-def update_turn_numbers_for_session(db: Session, booking_date: date, session: str):
+async def lock_queue_state(db: AsyncSession, doctor_id: int, day: date, session: str) -> models.QueueState:
     """
-    Recalculates and updates the turn number for all bookings in a given session,
-    ordered by their timeslot.
+    Returns a session's queue row locked until the transaction ends. The row is
+    first created if missing, since FOR UPDATE locks nothing on a row that does
+    not exist yet and two first advances would both insert it.
     """
-    # 1. Get all bookings for the session, ordered chronologically
-    session_bookings = db.query(models.Booking).filter(
+    insert = _dialect_insert(db)
+    await db.execute(
+        insert(models.QueueState).values(doctor_id=doctor_id, date=day, session=session, current_turn=0)
+        .on_conflict_do_nothing(
+            index_elements=[models.QueueState.doctor_id, models.QueueState.date, models.QueueState.session]
+        )
+    )
+    result = await db.execute(
+        select(models.QueueState).where(
+            models.QueueState.doctor_id == doctor_id,
+            models.QueueState.date == day,
+            models.QueueState.session == session
+        ).with_for_update().execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+async def bump_booking_versions(db: AsyncSession, doctor_id: int, dates) -> Dict[date, int]:
+    """
+    Increments the booking version of a doctor's dates within the current transaction
+    and returns the new versions. Called last by the write paths, as the row stays
+    locked until commit.
+    """
+    insert = _dialect_insert(db)
+    stmt = insert(models.BookingVersion).values(
+        [{"doctor_id": doctor_id, "date": booking_date, "version": 1} for booking_date in sorted(set(dates))]
+    ).on_conflict_do_update(
+        index_elements=[models.BookingVersion.doctor_id, models.BookingVersion.date],
+        set_={"version": models.BookingVersion.version + 1}
+    ).returning(models.BookingVersion.date, models.BookingVersion.version)
+    return dict((await db.execute(stmt)).all())
+
+async def get_booking_versions(db: AsyncSession, doctor_id: int, dates) -> Dict[date, int]:
+    """The booking version of each of a doctor's dates (0 for a date never written)."""
+    dates = set(dates)
+    result = await db.execute(
+        select(models.BookingVersion.date, models.BookingVersion.version).where(
+            models.BookingVersion.doctor_id == doctor_id,
+            models.BookingVersion.date.in_(dates)
+        )
+    )
+    versions = dict.fromkeys(dates, 0)
+    versions.update(result.all())
+    return versions
+
+async def renumber_session_turns(db: AsyncSession, doctor_id: int, booking_date: date, session: str):
+    """
+    Sets the turn numbers of a doctor's session by timeslot in one UPDATE, within
+    the current transaction.
+    """
+    session_filter = (
+        models.Booking.doctor_id == doctor_id,
         models.Booking.date == booking_date,
         models.Booking.session == session
-    ).order_by(models.Booking.timeslot.asc()).all()
-
-    # 2. Iterate and update the turn number based on the order
-    for index, booking in enumerate(session_bookings):
-        booking.turn_number = index + 1
-    
-    # 3. Commit the changes to the database
-    db.commit()
-
-def create_booking(db: Session, booking: schemas.BookingCreate):
-    # 1. Determine the session for the given timeslot
-    session_name = get_session_for_timeslot(booking.timeslot)
-    if not session_name:
-        return None 
-
-    # 2. Calculate the next order number for this session and date
-    next_order = get_next_order_number(
-        db=db,
-        booking_date=booking.date,
-        session=session_name
-    )
-
-    # 3. Create the new booking record (turn_number is initially null)
-    db_booking = models.Booking(
-        user_id=booking.user_id,
-        date=booking.date,
-        timeslot=booking.timeslot,
-        session=session_name,
-        order_number=next_order,
-        turn_number=0  # <-- Set a temporary value like 0 or None
-    )
-    db.add(db_booking)
-    db.commit()
-    # At this point, the new booking is saved in the database
-
-    # --- NEW LOGIC TO ADD ---
-    # 4. Update turn numbers for the entire session
-    update_turn_numbers_for_session(
-        db=db,
-        booking_date=booking.date,
-        session=session_name
-    )
-    # --- END OF NEW LOGIC ---
-
-    # 5. Refresh the instance to get the updated turn_number
-    db.refresh(db_booking)
+    )
+    ranked = select(
+        models.Booking.id,
+        func.row_number().over(order_by=models.Booking.timeslot).label("turn")
+    ).where(*session_filter).subquery()
+    await db.execute(
+        update(models.Booking).where(*session_filter, models.Booking.id == ranked.c.id)
+        .values(turn_number=ranked.c.turn),
+        execution_options={"synchronize_session": False}
+    )
+
+async def create_booking(db: AsyncSession, booking: schemas.BookingCreate):
+    """
+    Creates a booking in a single transaction.
+    Returns None if the timeslot is not a bookable slot on that date's schedule
+    and raises SlotAlreadyBookedError if the slot is taken.
+    """
+    # 1. Determine the session for the given timeslot from the doctor's schedule
+    doctor_id = booking.doctor_id
+    day_schedule = await schedule.get_day_schedule(db, doctor_id, booking.date)
+    if not day_schedule.is_slot_start(booking.timeslot):
+        return None
+    session_name = day_schedule.session_for(booking.timeslot)
+
+    # The endpoints have already loaded the user, so this is an identity-map hit
+    db_user = await db.get(models.User, booking.user_id)
+
+    try:
+        # 2. Reserve the order number; this also serialises writers for the session
+        next_order = await allocate_order_number(
+            db=db,
+            doctor_id=doctor_id,
+            booking_date=booking.date,
+            session=session_name
+        )
+
+        # 3. The turn number is the slot's position among the session's bookings
+        #    (COUNT(*) so the session index alone can answer it)
+        earlier_bookings = (await db.execute(select(func.count()).select_from(models.Booking).where(
+            models.Booking.doctor_id == doctor_id,
+            models.Booking.date == booking.date,
+            models.Booking.session == session_name,
+            models.Booking.timeslot < booking.timeslot
+        ))).scalar_one()
+
+        # 4. Insert; the _doctor_date_timeslot_uc constraint rejects a taken slot
+        db_booking = models.Booking(
+            doctor_id=doctor_id,
+            user=db_user,
+            date=booking.date,
+            timeslot=booking.timeslot,
+            session=session_name,
+            order_number=next_order,
+            turn_number=earlier_bookings + 1
+        )
+        db.add(db_booking)
+        await db.flush()
+
+        # 5. Shift only the bookings that come after the new timeslot
+        await db.execute(
+            update(models.Booking).where(
+                models.Booking.doctor_id == doctor_id,
+                models.Booking.date == booking.date,
+                models.Booking.session == session_name,
+                models.Booking.timeslot > booking.timeslot
+            ).values(turn_number=models.Booking.turn_number + 1),
+            execution_options={"synchronize_session": False}
+        )
+
+        # 6. Keep the dashboard rollup in step with the new booking
+        await increment_daily_booking_count(db=db, doctor_id=doctor_id, booking_date=booking.date, session=session_name)
+
+        # 7. Bump the day's version, which the read endpoints' ETags are built from
+        versions = await bump_booking_versions(db=db, doctor_id=doctor_id, dates=[booking.date])
+
+        # 8. Tell live subscribers in every worker, once the booking commits
+        event = slot_events.slot_event("booked", doctor_id, booking.date, session_name, booking.timeslot,
+                                       version=versions[booking.date])
+        await slot_events.notify_in_transaction(db, event)
+
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise SlotAlreadyBookedError(f"{booking.date} {booking.timeslot} is already booked")
+
+    availability.mark_booked(doctor_id, booking.date, booking.timeslot, session_name, versions[booking.date])
+    slot_events.broker.deliver_local(event)
     return db_booking
 
+async def import_bookings(db: AsyncSession, doctor_id: int, rows: List[schemas.BookingImportRow]) -> List[dict]:
+    """
+    Books many (name, phone, date, timeslot) rows for one doctor in a single transaction.
+    Users are upserted with one statement and bookings added with one multi-row INSERT
+    that skips taken slots; order numbers, counters, the rollup and turn numbers are
+    then updated once per affected session. Returns one result per row, in row order.
+    """
+    results: List[dict] = [None] * len(rows)
+    pending = []  # (row index, row, session)
+    first_row_for_slot = {}
+
+    # 1. Check every row against the doctor's schedule and the rest of the batch
+    for index, row in enumerate(rows):
+        if await archive.is_archived(row.date):
+            results[index] = {"row": index, "status": "invalid", "detail": "The date is in an archived month."}
+            continue
+        day_schedule = await schedule.get_day_schedule(db, doctor_id, row.date)
+        if not day_schedule.is_slot_start(row.timeslot):
+            results[index] = {"row": index, "status": "invalid",
+                              "detail": "The timeslot is not a bookable slot on the doctor's schedule."}
+            continue
+        slot = (row.date, row.timeslot)
+        if slot in first_row_for_slot:
+            results[index] = {"row": index, "status": "conflict",
+                              "detail": f"Same slot as row {first_row_for_slot[slot]}."}
+            continue
+        first_row_for_slot[slot] = index
+        pending.append((index, row, day_schedule.session_for(row.timeslot)))
+    if not pending:
+        return results
+
+    insert = _dialect_insert(db)
+    sessions = sorted({(row.date, session_name) for _, row, session_name in pending})
+
+    # 2. Lock the counters of every affected session first, in a fixed order, as a
+    #    single booking does before it inserts
+    for booking_date, session_name in sessions:
+        await allocate_order_number(db, doctor_id, booking_date, session_name, count=0)
+
+    # 3. Upsert the users in one statement; existing users keep their names
+    names = {}
+    for _, row, _ in pending:
+        names.setdefault(row.phone_number, row.name)
+    await db.execute(
+        insert(models.User).values([{"name": name, "phone_number": phone} for phone, name in names.items()])
+        .on_conflict_do_nothing(index_elements=[models.User.phone_number])
+    )
+    users.invalidate(names)
+    user_ids = dict((await db.execute(
+        select(models.User.phone_number, models.User.id).where(models.User.phone_number.in_(list(names)))
+    )).all())
+
+    # 4. Insert the bookings in one statement; taken slots are skipped rather than failing the batch
+    inserted = await db.execute(
+        insert(models.Booking).values([
+            {"doctor_id": doctor_id, "user_id": user_ids[row.phone_number], "date": row.date,
+             "timeslot": row.timeslot, "session": session_name}
+            for _, row, session_name in pending
+        ]).on_conflict_do_nothing(
+            index_elements=[models.Booking.doctor_id, models.Booking.date, models.Booking.timeslot]
+        ).returning(models.Booking.id, models.Booking.date, models.Booking.timeslot)
+    )
+    booking_ids = {(booking_date, timeslot): booking_id for booking_id, booking_date, timeslot in inserted.all()}
+
+    # 5. Once per session: order numbers in row order, counter, rollup and turn numbers
+    order_numbers = []
+    for booking_date, session_name in sessions:
+        booked = [
+            (index, row) for index, row, row_session in pending
+            if row.date == booking_date and row_session == session_name and (row.date, row.timeslot) in booking_ids
+        ]
+        if not booked:
+            continue
+        last_order = await allocate_order_number(db, doctor_id, booking_date, session_name, count=len(booked))
+        for offset, (index, row) in enumerate(booked):
+            booking_id = booking_ids[(row.date, row.timeslot)]
+            order_numbers.append({"b_id": booking_id, "b_date": row.date,
+                                  "b_order": last_order - len(booked) + 1 + offset})
+            results[index] = {"row": index, "status": "booked", "booking_id": booking_id, "session": session_name}
+        await increment_daily_booking_count(db, doctor_id, booking_date, session_name, count=len(booked))
+        await renumber_session_turns(db, doctor_id, booking_date, session_name)
+
+    if order_numbers:
+        bookings = models.Booking.__table__
+        await db.execute(
+            update(bookings).where(bookings.c.id == bindparam("b_id"), bookings.c.date == bindparam("b_date"))
+            .values(order_number=bindparam("b_order")),
+            order_numbers
+        )
+
+    # 6. Bump the version of every date that got bookings, once each
+    booked_rows = [(row, session_name) for index, row, session_name in pending if results[index] is not None]
+    versions = {}
+    if booked_rows:
+        versions = await bump_booking_versions(db, doctor_id, [row.date for row, _ in booked_rows])
+
+    # 7. Tell live subscribers in every worker, once the bookings commit
+    events = [
+        slot_events.slot_event("booked", doctor_id, row.date, session_name, row.timeslot, version=versions[row.date])
+        for row, session_name in booked_rows
+    ]
+    await slot_events.notify_many_in_transaction(db, events)
+    await db.commit()
+
+    for index, row, session_name in pending:
+        if results[index] is None:
+            results[index] = {"row": index, "status": "conflict", "detail": "The slot is already booked."}
+        else:
+            availability.mark_booked(doctor_id, row.date, row.timeslot, session_name, versions[row.date])
+    for event in events:
+        slot_events.broker.deliver_local(event)
+    return results
+
 
 # --- Admin CRUD ---
-def get_admin_by_username(db: Session, username: str):
-    return db.query(models.Admin).filter(models.Admin.username == username).first()
+async def get_admin_by_username(db: AsyncSession, username: str):
+    result = await db.execute(select(models.Admin).where(models.Admin.username == username))
+    return result.scalars().first()
 
-def get_admins(db: Session):
-    return db.query(models.Admin).all()
+async def get_admins(db: AsyncSession):
+    result = await db.execute(select(models.Admin))
+    return result.scalars().all()
 
-def create_admin(db: Session, admin: schemas.AdminCreate):
-    hashed_password = auth.get_password_hash(admin.password)
+async def create_admin(db: AsyncSession, admin: schemas.AdminCreate):
+    hashed_password = await auth.get_password_hash_async(admin.password)
     db_admin = models.Admin(username=admin.username, hashed_password=hashed_password)
     db.add(db_admin)
-    db.commit()
-    db.refresh(db_admin)
+    await db.commit()
+    await db.refresh(db_admin)
     return db_admin
 
-def delete_admin(db: Session, admin_id: int):
-    db_admin = db.query(models.Admin).filter(models.Admin.id == admin_id).first()
+async def delete_admin(db: AsyncSession, admin_id: int):
+    db_admin = await db.get(models.Admin, admin_id)
     if db_admin:
-        db.delete(db_admin)
-        db.commit()
+        await db.delete(db_admin)
+        await db.commit()
         return True
     return False
 
+async def update_password_hash(db: AsyncSession, account, new_hash: str):
+    """Stores a rehashed password for an Admin or SuperAdmin."""
+    account.hashed_password = new_hash
+    await db.commit()
+
 # --- Super Admin CRUD ---
-def get_super_admin_by_username(db: Session, username: str):
-    return db.query(models.SuperAdmin).filter(models.SuperAdmin.username == username).first()
+async def get_super_admin_by_username(db: AsyncSession, username: str):
+    result = await db.execute(select(models.SuperAdmin).where(models.SuperAdmin.username == username))
+    return result.scalars().first()
 
 
-def get_bookings_for_date(db: Session, target_date: date) -> List[models.Booking]:
-    """Gets all bookings for a specific date, ordered by turn number."""
-    return db.query(models.Booking).filter(models.Booking.date == target_date).order_by(models.Booking.turn_number.asc()).all()
+async def get_bookings_for_date(db: AsyncSession, doctor_id: int, target_date: date) -> List[models.Booking]:
+    """Gets a doctor's bookings for a specific date with their users, ordered by turn number."""
+    result = await db.execute(
+        select(models.Booking).options(joinedload(models.Booking.user)).where(
+            models.Booking.doctor_id == doctor_id,
+            models.Booking.date == target_date
+        ).order_by(models.Booking.turn_number.asc())
+    )
+    return list(result.scalars().all())
+
+async def get_session_counts_for_date(db: AsyncSession, doctor_id: int, target_date: date) -> dict:
+    """Counts the bookings of each of a doctor's sessions on a date from the daily rollup."""
+    result = await db.execute(
+        select(models.DailyBookingCount.session, models.DailyBookingCount.booking_count).where(
+            models.DailyBookingCount.doctor_id == doctor_id,
+            models.DailyBookingCount.date == target_date
+        )
+    )
+    return {session: count for session, count in result.all()}
 
-def get_booking_counts_for_last_n_days(db: Session, n_days: int) -> List[dict]:
-    """Calculates the total number of bookings for each of the last N days."""
+def trend_dates(n_days: int) -> List[date]:
+    """The last N days, including today, in chronological order."""
     today = date.today()
-    trend_data = []
-    for i in range(n_days):
-        current_date = today - timedelta(days=i)
-        count = db.query(models.Booking).filter(models.Booking.date == current_date).count()
-        trend_data.append({"date": current_date.isoformat(), "bookings": count})
-    
-    # Return in chronological order
-    return list(reversed(trend_data))
+    return [today - timedelta(days=n_days - 1 - i) for i in range(n_days)]
+
+async def get_booking_counts_for_last_n_days(db: AsyncSession, doctor_id: int, n_days: int) -> List[dict]:
+    """
+    Returns a doctor's total number of bookings for each of the last N days (including today)
+    from the daily rollup table, in chronological order.
+    """
+    days = trend_dates(n_days)
+    start_date, today = days[0], days[-1]
+    result = await db.execute(
+        select(
+            models.DailyBookingCount.date,
+            func.sum(models.DailyBookingCount.booking_count)
+        ).where(
+            models.DailyBookingCount.doctor_id == doctor_id,
+            models.DailyBookingCount.date >= start_date,
+            models.DailyBookingCount.date <= today
+        ).group_by(models.DailyBookingCount.date)
+    )
+    counts = {day: int(total) for day, total in result.all()}
+
+    return [{"date": day.isoformat(), "bookings": counts.get(day, 0)} for day in days]
+
+async def get_booking_counts_by_session(db: AsyncSession, doctor_id: int,
+                                        start_date: date, end_date: date) -> List[tuple]:
+    """Counts a doctor's bookings per (date, session) over an inclusive date range from the daily rollup."""
+    result = await db.execute(
+        select(
+            models.DailyBookingCount.date,
+            models.DailyBookingCount.session,
+            models.DailyBookingCount.booking_count
+        ).where(
+            models.DailyBookingCount.doctor_id == doctor_id,
+            models.DailyBookingCount.date >= start_date,
+            models.DailyBookingCount.date <= end_date
+        )
+    )
+    return result.all()
+
+
+# --- Schedule CRUD ---
+async def _after_schedule_change():
+    """Drops the compiled schedules and availability here and in every other worker."""
+    schedule.invalidate()
+    availability.invalidate_all()
+    await slot_events.broker.publish({"type": "schedule"})
+
+async def get_schedule_exceptions(db: AsyncSession, doctor_id: int,
+                                  start_date: date, end_date: date) -> List[models.ScheduleException]:
+    result = await db.execute(
+        select(models.ScheduleException).where(
+            models.ScheduleException.doctor_id == doctor_id,
+            models.ScheduleException.date >= start_date,
+            models.ScheduleException.date <= end_date
+        ).order_by(models.ScheduleException.date, models.ScheduleException.id)
+    )
+    return list(result.scalars().all())
+
+async def replace_weekday_hours(db: AsyncSession, doctor_id: int, weekday: int, hours: schedule.SessionHours):
+    """
+    Sets the sessions of one of a doctor's weekdays (none = closed). The
+    doctor's first edit also stores the default hours for the other weekdays,
+    which keep them.
+    """
+    template_rows = (await db.execute(
+        select(func.count(models.ScheduleTemplate.id)).where(models.ScheduleTemplate.doctor_id == doctor_id)
+    )).scalar_one()
+    if not template_rows:
+        for other_weekday in range(7):
+            if other_weekday != weekday:
+                db.add_all(
+                    models.ScheduleTemplate(doctor_id=doctor_id, weekday=other_weekday, session=name,
+                                            start_time=start, end_time=end)
+                    for name, start, end in schedule.DEFAULT_HOURS
+                )
+    else:
+        await db.execute(delete(models.ScheduleTemplate).where(
+            models.ScheduleTemplate.doctor_id == doctor_id,
+            models.ScheduleTemplate.weekday == weekday
+        ))
+
+    db.add_all(
+        models.ScheduleTemplate(doctor_id=doctor_id, weekday=weekday, session=name, start_time=start, end_time=end)
+        for name, start, end in hours
+    )
+    await db.commit()
+    await _after_schedule_change()
+
+async def create_schedule_exception(db: AsyncSession, exception: schemas.ScheduleExceptionCreate) -> models.ScheduleException:
+    db_exception = models.ScheduleException(
+        doctor_id=exception.doctor_id,
+        date=exception.date,
+        session=exception.session,
+        closed=exception.closed,
+        start_time=exception.start_time,
+        end_time=exception.end_time,
+        note=exception.note
+    )
+    db.add(db_exception)
+    await db.commit()
+    await _after_schedule_change()
+    return db_exception
+
+async def get_schedule_exception(db: AsyncSession, exception_id: int):
+    return await db.get(models.ScheduleException, exception_id)
+
+async def delete_schedule_exception(db: AsyncSession, exception_id: int) -> bool:
+    db_exception = await db.get(models.ScheduleException, exception_id)
+    if not db_exception:
+        return False
+    await db.delete(db_exception)
+    await db.commit()
+    await _after_schedule_change()
+    return True
+
+
+# --- Doctor and Clinic CRUD ---
+async def _after_doctor_change():
+    """Drops the cached doctors here and in every other worker."""
+    doctors.invalidate()
+    await slot_events.broker.publish({"type": "doctors"})
+
+async def get_clinics(db: AsyncSession) -> List[models.Clinic]:
+    result = await db.execute(select(models.Clinic).order_by(models.Clinic.id))
+    return list(result.scalars().all())
+
+async def get_clinic(db: AsyncSession, clinic_id: int):
+    return await db.get(models.Clinic, clinic_id)
+
+async def get_clinic_by_name(db: AsyncSession, name: str):
+    result = await db.execute(select(models.Clinic).where(models.Clinic.name == name))
+    return result.scalars().first()
+
+async def create_clinic(db: AsyncSession, clinic: schemas.ClinicCreate) -> models.Clinic:
+    db_clinic = models.Clinic(name=clinic.name)
+    db.add(db_clinic)
+    await db.commit()
+    await db.refresh(db_clinic)
+    return db_clinic
+
+async def get_doctors(db: AsyncSession) -> List[models.Doctor]:
+    """Every doctor, including those no longer taking bookings."""
+    result = await db.execute(select(models.Doctor).order_by(models.Doctor.id))
+    return list(result.scalars().all())
+
+async def get_doctor(db: AsyncSession, doctor_id: int):
+    return await db.get(models.Doctor, doctor_id)
+
+async def create_doctor(db: AsyncSession, doctor: schemas.DoctorCreate) -> models.Doctor:
+    db_doctor = models.Doctor(clinic_id=doctor.clinic_id, name=doctor.name, active=True)
+    db.add(db_doctor)
+    await db.commit()
+    await db.refresh(db_doctor)
+    await _after_doctor_change()
+    return db_doctor
+
+async def update_doctor(db: AsyncSession, db_doctor: models.Doctor, doctor: schemas.DoctorUpdate) -> models.Doctor:
+    if doctor.name is not None:
+        db_doctor.name = doctor.name
+    if doctor.clinic_id is not None:
+        db_doctor.clinic_id = doctor.clinic_id
+    if doctor.active is not None:
+        db_doctor.active = doctor.active
+    await db.commit()
+    await db.refresh(db_doctor)
+    await _after_doctor_change()
+    return db_doctor
+
+async def ensure_default_doctor(db: AsyncSession):
+    """Creates the default clinic and doctor on a fresh database (Alembic does this in migrations)."""
+    if await db.get(models.Doctor, DEFAULT_DOCTOR_ID):
+        return
+    if not await db.get(models.Clinic, DEFAULT_CLINIC_ID):
+        db.add(models.Clinic(id=DEFAULT_CLINIC_ID, name="Main clinic"))
+        await db.flush()
+    db.add(models.Doctor(id=DEFAULT_DOCTOR_ID, clinic_id=DEFAULT_CLINIC_ID, name="Default doctor", active=True))
+    await db.commit()
@@ -1,24 +1,142 @@
 # app/database.py
 
-import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+from . import query_stats
+from .core.config import Settings, get_settings
+from .pool_metrics import InstrumentedAsyncQueuePool, describe_pool
 
-# Load environment variables from .env file
-load_dotenv()
+Base = declarative_base()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+# Async drivers for the sync URLs used by scripts and Alembic
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
-if not DATABASE_URL:
-    raise ValueError("No DATABASE_URL set for connection")
 
-engine = create_engine(DATABASE_URL)
+def _to_async_url(url: str) -> str:
+    """Swaps the driver of a sync database URL for its async counterpart."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases")
+    return parsed.set(drivername=_ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
+def _make_async_engine(url: str, settings: Settings):
+    """Creates an async engine with the configured pool and statement timeout."""
+    connect_args = {}
+    if settings.db_statement_timeout_ms and make_url(url).get_backend_name() == "postgresql":
+        connect_args["server_settings"] = {"statement_timeout": str(settings.db_statement_timeout_ms)}
+
+    async_db_engine = create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args,
+    )
+    query_stats.install(async_db_engine.sync_engine)
+    return async_db_engine
+
+
+def _require_database_url(settings: Settings) -> str:
+    if not settings.database_url:
+        raise ValueError("No DATABASE_URL set for connection")
+    return settings.database_url
+
+
+# Engines are built on first use (normally in the app lifespan), so importing
+# this module needs neither a configured environment nor a database.
+_sync_engine = None
+_sync_sessionmaker = None
+_async_engine = None
+_replica_engine = None
+_async_sessionmaker = None
+_read_sessionmaker = None
+
+
+# --- Sync engine: create_superadmin.py, Alembic and other scripts ---
+def get_engine():
+    global _sync_engine, _sync_sessionmaker
+    if _sync_engine is None:
+        settings = get_settings()
+        _sync_engine = create_engine(_require_database_url(settings), pool_pre_ping=settings.db_pool_pre_ping)
+        query_stats.install(_sync_engine)
+        _sync_sessionmaker = sessionmaker(autocommit=False, autoflush=False, bind=_sync_engine)
+    return _sync_engine
+
+def SessionLocal():
+    """Creates a sync session."""
+    get_engine()
+    return _sync_sessionmaker()
+
+
+# --- Async engines: the API ---
+def init_async_engines():
+    """Builds the primary and (optional) replica async engines once per process."""
+    global _async_engine, _replica_engine, _async_sessionmaker, _read_sessionmaker
+    if _async_engine is not None:
+        return
+    settings = get_settings()
+    async_url = settings.async_database_url or _to_async_url(_require_database_url(settings))
+    replica_url = settings.async_read_replica_url or (
+        _to_async_url(settings.read_replica_url) if settings.read_replica_url else None
+    )
+
+    _async_engine = _make_async_engine(async_url, settings)
+    # Without a replica, reads simply share the primary engine
+    _replica_engine = _make_async_engine(replica_url, settings) if replica_url else _async_engine
+
+    # expire_on_commit=False so committed objects can still be serialised without
+    # an implicit (and, under asyncio, forbidden) lazy reload.
+    _async_sessionmaker = async_sessionmaker(bind=_async_engine, autoflush=False, expire_on_commit=False)
+    _read_sessionmaker = async_sessionmaker(bind=_replica_engine, autoflush=False, expire_on_commit=False)
+
+def get_async_engine():
+    init_async_engines()
+    return _async_engine
+
+def get_replica_engine():
+    init_async_engines()
+    return _replica_engine
+
+def AsyncSessionLocal():
+    """Creates an async session on the primary."""
+    init_async_engines()
+    return _async_sessionmaker()
+
+def AsyncReadSessionLocal():
+    """Creates an async session on the replica (or the primary when none is configured)."""
+    init_async_engines()
+    return _read_sessionmaker()
+
+def get_listen_dsn():
+    """A plain asyncpg DSN for the primary, for LISTEN connections; None unless it is Postgres."""
+    url = get_async_engine().url
+    if url.get_backend_name() != "postgresql":
+        return None
+    return url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+async def dispose_engines():
+    """Closes every pooled connection; called when the app shuts down."""
+    global _sync_engine, _sync_sessionmaker, _async_engine, _replica_engine, _async_sessionmaker, _read_sessionmaker
+    if _replica_engine is not None and _replica_engine is not _async_engine:
+        await _replica_engine.dispose()
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _sync_engine is not None:
+        _sync_engine.dispose()
+    _sync_engine = _sync_sessionmaker = None
+    _async_engine = _replica_engine = _async_sessionmaker = _read_sessionmaker = None
+
 
 # Dependency to get a DB session in path operations
 def get_db():
@@ -26,4 +144,23 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Async dependency used by the API endpoints
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Async dependency for read-only endpoints; routed to the replica when configured
+async def get_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+def get_pool_stats() -> dict:
+    """Pool gauges and checkout wait totals for the primary and (if any) replica engines."""
+    primary, replica = get_async_engine(), get_replica_engine()
+    return {
+        "primary": describe_pool("primary", primary.pool),
+        "replica": describe_pool("replica", replica.pool) if replica is not primary else None,
+    }
@@ -0,0 +1,64 @@
+# app/doctors.py
+"""
+The doctors and clinics of the deployment, cached per worker.
+
+Every public endpoint checks the doctor it is asked about, so the (small)
+doctors table is kept in memory and read back at most every
+DOCTOR_CACHE_TTL_SECONDS, or right after an admin changes it.
+"""
+import threading
+import time as clock
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .core.config import DOCTOR_CACHE_TTL_SECONDS
+
+_lock = threading.Lock()
+# Doctor id -> {"id", "name", "clinic_id", "active"}; None until loaded
+_doctors: Optional[Dict[int, dict]] = None
+_loaded_at = 0.0
+# Bumped by invalidate(); a load that raced with an edit is not cached
+_generation = 0
+
+
+def invalidate():
+    """Drops the cached doctors; called after any doctor or clinic edit."""
+    global _doctors, _generation
+    with _lock:
+        _doctors = None
+        _generation += 1
+
+
+async def _get_all(db: AsyncSession) -> Dict[int, dict]:
+    global _doctors, _loaded_at
+    with _lock:
+        if _doctors is not None and clock.monotonic() - _loaded_at < DOCTOR_CACHE_TTL_SECONDS:
+            return _doctors
+        generation = _generation
+    result = await db.execute(select(models.Doctor))
+    loaded = {
+        doctor.id: {"id": doctor.id, "name": doctor.name, "clinic_id": doctor.clinic_id, "active": doctor.active}
+        for doctor in result.scalars().all()
+    }
+    with _lock:
+        if generation == _generation:
+            _doctors = loaded
+            _loaded_at = clock.monotonic()
+    return loaded
+
+
+async def get_doctor(db: AsyncSession, doctor_id: int) -> Optional[dict]:
+    """An active doctor, or None if there is no such doctor or they stopped taking bookings."""
+    doctor = (await _get_all(db)).get(doctor_id)
+    return doctor if doctor and doctor["active"] else None
+
+
+async def list_doctors(db: AsyncSession, clinic_id: Optional[int] = None) -> List[dict]:
+    """Active doctors, optionally of one clinic, ordered by id."""
+    return sorted(
+        (d for d in (await _get_all(db)).values() if d["active"] and clinic_id in (None, d["clinic_id"])),
+        key=lambda d: d["id"]
+    )
@@ -0,0 +1,102 @@
+# app/export.py
+"""
+Streaming export of bookings with their patients over a date range.
+
+Rows are read from a server-side cursor EXPORT_BATCH_ROWS at a time and
+written out as CSV or NDJSON batch by batch, so memory stays flat however
+long the range is. Dates in archived months are read from archive.bookings.
+Used by /admin/bookings/export and export_bookings.py.
+"""
+import csv
+import io
+import json
+from datetime import date, time, timedelta
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Table, select, text
+
+from . import archive, database, models
+from .core.config import EXPORT_BATCH_ROWS
+
+EXPORT_COLUMNS = ("booking_id", "doctor_id", "date", "session", "timeslot", "order_number", "turn_number",
+                  "user_id", "name", "phone_number")
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def bookings_query(bookings: Table, start_date: date, end_date: date, doctor_id: Optional[int] = None):
+    """Bookings joined to their users over an inclusive date range, in the order of the doctor/date/turn index."""
+    users = models.User.__table__
+    query = select(
+        bookings.c.id.label("booking_id"), bookings.c.doctor_id, bookings.c.date, bookings.c.session,
+        bookings.c.timeslot, bookings.c.order_number, bookings.c.turn_number,
+        bookings.c.user_id, users.c.name, users.c.phone_number
+    ).outerjoin(users, users.c.id == bookings.c.user_id).where(
+        bookings.c.date >= start_date,
+        bookings.c.date <= end_date
+    )
+    if doctor_id is not None:
+        query = query.where(bookings.c.doctor_id == doctor_id)
+    return query.order_by(bookings.c.doctor_id, bookings.c.date, bookings.c.turn_number)
+
+
+def split_by_archive(start_date: date, end_date: date, archived_before: Optional[date]) -> List[Tuple[Table, date, date]]:
+    """The (table, start, end) pieces of a range: archived dates first, then live ones."""
+    if archived_before is None or start_date >= archived_before:
+        return [(models.Booking.__table__, start_date, end_date)]
+    if end_date < archived_before:
+        return [(archive.archived_bookings, start_date, end_date)]
+    return [
+        (archive.archived_bookings, start_date, archived_before - timedelta(days=1)),
+        (models.Booking.__table__, archived_before, end_date),
+    ]
+
+
+# --- Formats ---
+def _json_default(value):
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def csv_header() -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(EXPORT_COLUMNS)
+    return buffer.getvalue()
+
+
+def to_csv(rows: Sequence[Sequence]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def to_ndjson(rows: Sequence[Sequence]) -> str:
+    return "".join(json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=_json_default) + "\n" for row in rows)
+
+
+FORMATTERS = {"csv": to_csv, "ndjson": to_ndjson}
+
+
+async def stream_bookings(start_date: date, end_date: date, doctor_id: Optional[int],
+                          file_format: str) -> AsyncIterator[str]:
+    """
+    Yields the export one batch of rows at a time. Opens its own read-only
+    connection (on the replica when there is one) and holds it until the
+    last batch has been sent.
+    """
+    formatter = FORMATTERS[file_format]
+    if file_format == "csv":
+        yield csv_header()
+
+    pieces = split_by_archive(start_date, end_date, await archive.archived_before())
+    engine = database.get_replica_engine()
+    async with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            await conn.execute(text("SET TRANSACTION READ ONLY"))
+        for bookings, start, end in pieces:
+            result = await conn.stream(
+                bookings_query(bookings, start, end, doctor_id).execution_options(yield_per=EXPORT_BATCH_ROWS)
+            )
+            async for rows in result.partitions():
+                yield formatter(rows)
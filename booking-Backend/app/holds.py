@@ -0,0 +1,140 @@
+# app/holds.py
+"""
+Short-lived slot holds, the first step of two-phase booking.
+
+A patient reserves a doctor's (date, timeslot) for SLOT_HOLD_SECONDS and then confirms
+it with their details. While the hold lives, availability shows the slot as
+taken and other booking requests for it are refused, so only the holder pays
+for the booking write. Holds live in the TTL store and simply expire.
+
+The TTL store says nothing when a key expires, so each worker also remembers
+the holds it created until they expire; pop_lapsed_holds() returns the ones
+that lapsed without being released or confirmed here, for the slot events
+to announce.
+"""
+import heapq
+import secrets
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .core.config import get_settings
+from .ttl_store import get_ttl_store
+
+
+class SlotHeldError(Exception):
+    """Raised when the slot is already held by someone else."""
+
+
+# Holds created on this worker by expiry time, and the ones still to be announced
+_expiring: List[Tuple[datetime, str]] = []
+_watched: Dict[str, dict] = {}
+
+
+def _slot_key(doctor_id: int, day: date, timeslot: time) -> str:
+    return f"hold:slot:{doctor_id}:{day.isoformat()}:{timeslot.strftime('%H:%M')}"
+
+
+def _hold_key(hold_id: str) -> str:
+    return f"hold:id:{hold_id}"
+
+
+async def create_hold(doctor_id: int, day: date, timeslot: time, session_name: str) -> dict:
+    """Reserves a slot and returns the hold; raises SlotHeldError if it is taken."""
+    store = get_ttl_store()
+    ttl = get_settings().slot_hold_seconds
+    hold_id = secrets.token_urlsafe(16)
+
+    if not await store.set(_slot_key(doctor_id, day, timeslot), hold_id, ttl, only_if_absent=True):
+        raise SlotHeldError("This timeslot is currently held by another patient.")
+    expires_at = datetime.now() + timedelta(seconds=ttl)
+    await store.set(
+        _hold_key(hold_id),
+        f"{doctor_id}|{day.isoformat()}|{timeslot.isoformat()}|{session_name}|{expires_at.isoformat()}",
+        ttl
+    )
+
+    hold = {
+        "hold_id": hold_id,
+        "doctor_id": doctor_id,
+        "date": day,
+        "timeslot": timeslot,
+        "session": session_name,
+        "expires_at": expires_at,
+        "expires_in_seconds": ttl,
+    }
+    heapq.heappush(_expiring, (expires_at, hold_id))
+    _watched[hold_id] = hold
+    return hold
+
+
+async def get_hold(hold_id: str) -> Optional[dict]:
+    """Returns a live hold, or None if it expired, was released or never existed."""
+    store = get_ttl_store()
+    value = await store.get(_hold_key(hold_id))
+    if value is None:
+        return None
+    doctor_id, day, timeslot, session_name, expires_at = value.split("|")
+    hold = {
+        "hold_id": hold_id,
+        "doctor_id": int(doctor_id),
+        "date": date.fromisoformat(day),
+        "timeslot": time.fromisoformat(timeslot),
+        "session": session_name,
+        "expires_at": datetime.fromisoformat(expires_at),
+    }
+    # The slot key is the source of truth; it may have expired a moment earlier
+    if await store.get(_slot_key(hold["doctor_id"], hold["date"], hold["timeslot"])) != hold_id:
+        return None
+    hold["expires_in_seconds"] = max(0, int((hold["expires_at"] - datetime.now()).total_seconds()))
+    return hold
+
+
+async def release_hold(hold_id: str) -> bool:
+    """Frees a held slot. Returns False if there was no live hold."""
+    hold = await get_hold(hold_id)
+    if hold is None:
+        return False
+    store = get_ttl_store()
+    released = await store.delete(_slot_key(hold["doctor_id"], hold["date"], hold["timeslot"]), expected_value=hold_id)
+    await store.delete(_hold_key(hold_id))
+    # Released and confirmed holds announce themselves
+    _watched.pop(hold_id, None)
+    return released
+
+
+async def pop_lapsed_holds() -> List[dict]:
+    """
+    The holds created on this worker that expired since the last call without
+    being released or confirmed here, leaving their slot held by nobody. A hold
+    confirmed by another worker is among them; the caller checks for a booking.
+    """
+    now = datetime.now()
+    due = []
+    while _expiring and _expiring[0][0] <= now:
+        _, hold_id = heapq.heappop(_expiring)
+        hold = _watched.pop(hold_id, None)
+        if hold is not None:
+            due.append(hold)
+    if not due:
+        return []
+    holders = await get_ttl_store().get_many(
+        [_slot_key(hold["doctor_id"], hold["date"], hold["timeslot"]) for hold in due]
+    )
+    return [hold for hold, holder in zip(due, holders) if holder is None]
+
+
+async def is_held(doctor_id: int, day: date, timeslot: time, hold_id: Optional[str] = None) -> bool:
+    """Whether the doctor's slot is held by anyone other than 'hold_id'."""
+    holder = await get_ttl_store().get(_slot_key(doctor_id, day, timeslot))
+    return holder is not None and holder != hold_id
+
+
+async def held_slots(doctor_id: int, day: date, day_slots: Dict[str, List[time]]) -> Dict[str, List[time]]:
+    """The held slots of a doctor's day by session, looked up in one batch. 'day_slots' is DaySchedule.slots."""
+    slots = [(name, slot) for name, session_slots in day_slots.items() for slot in session_slots]
+    holders = await get_ttl_store().get_many([_slot_key(doctor_id, day, slot) for _, slot in slots])
+    held: Dict[str, List[time]] = {}
+    for (name, slot), holder in zip(slots, holders):
+        if holder is not None:
+            held.setdefault(name, []).append(slot)
+    return held
@@ -0,0 +1,28 @@
+# app/http_cache.py
+import hashlib
+import json
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+
+
+def etag_for(payload) -> str:
+    """Builds a weak ETag from the JSON form of a response payload, or of the versions it is built from."""
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return f'W/"{hashlib.sha1(body.encode()).hexdigest()}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match header already holds this ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
@@ -0,0 +1,130 @@
+# app/idempotency.py
+"""
+Idempotency-Key support for the booking POSTs.
+
+A client that sends an Idempotency-Key header may retry the same request as
+often as it likes: the first request does the work and its response (status,
+body and headers) is kept in the TTL store for IDEMPOTENCY_TTL_SECONDS, and
+every retry with the same key is answered from there without running the
+endpoint.
+
+While the first request is still running its key is claimed ('pending').
+Duplicates that arrive meanwhile wait for it instead of doing the work again:
+on the same worker they wait on the running request directly, across workers
+(with a shared TTL_STORE_URL) they poll the store. Responses that ask the
+client to try again later (429, 5xx) are not kept, so a retry runs again.
+
+A key reused for a different request body is refused with 422.
+"""
+import asyncio
+import hashlib
+import json
+import time as clock
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
+
+from .core.config import (IDEMPOTENCY_PENDING_SECONDS, IDEMPOTENCY_POLL_SECONDS, IDEMPOTENCY_TTL_SECONDS,
+                          IDEMPOTENCY_WAIT_SECONDS)
+from .ttl_store import get_ttl_store
+
+MAX_KEY_LENGTH = 255
+
+# Set by JSONResponse from the body, so never recorded
+_BODY_HEADERS = {"content-length", "content-type"}
+
+# Store key -> future resolved when the request running on this worker finishes
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def _store_key(request: Request, key: str) -> str:
+    return f"idem:{request.method}:{request.url.path}:{key}"
+
+
+async def _fingerprint(request: Request) -> str:
+    return hashlib.sha256(await request.body()).hexdigest()
+
+
+def _is_final(status_code: int) -> bool:
+    """Whether a response answers the request for good (as opposed to 'try again later')."""
+    return status_code < 500 and status_code != status.HTTP_429_TOO_MANY_REQUESTS
+
+
+def _recorded_headers(headers: Optional[Mapping[str, str]]) -> Dict[str, str]:
+    return {name: value for name, value in (headers or {}).items() if name.lower() not in _BODY_HEADERS}
+
+
+def _respond(record: dict, replayed: bool = False) -> JSONResponse:
+    headers = dict(record.get("headers", {}))
+    if replayed:
+        headers["Idempotent-Replayed"] = "true"
+    return JSONResponse(status_code=record["status"], content=record["body"], headers=headers)
+
+
+async def run(request: Request, key: Optional[str], handler: Callable[[], Awaitable[Any]],
+              response_model: type, status_code: int, response: Optional[Response] = None):
+    """
+    Runs an endpoint's handler once per Idempotency-Key. Without a key the
+    handler simply runs; with one, its response is recorded and replayed,
+    including the headers the handler set on the endpoint's 'response'.
+    """
+    if key is None:
+        return await handler()
+    if not 0 < len(key) <= MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters.")
+
+    store = get_ttl_store()
+    store_key = _store_key(request, key)
+    fingerprint = await _fingerprint(request)
+    pending = json.dumps({"state": "pending", "fingerprint": fingerprint})
+    deadline = clock.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+
+    # 1. Claim the key, or wait for the request that holds it
+    while not await store.set(store_key, pending, IDEMPOTENCY_PENDING_SECONDS, only_if_absent=True):
+        value = await store.get(store_key)
+        # None: released or expired just now, so try to claim it again after the poll interval
+        if value is not None:
+            record = json.loads(value)
+            if record["fingerprint"] != fingerprint:
+                raise HTTPException(status_code=422, detail="This Idempotency-Key was used for a different request.")
+            if record["state"] == "done":
+                return _respond(record, replayed=True)
+
+        remaining = deadline - clock.monotonic()
+        if remaining <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still being processed.",
+                headers={"Retry-After": "1"},
+            )
+        running = _inflight.get(store_key) if value is not None else None
+        if running is not None:
+            await asyncio.wait({running}, timeout=remaining)
+        else:
+            await asyncio.sleep(min(IDEMPOTENCY_POLL_SECONDS, remaining))
+
+    # 2. Do the work and record the response
+    finished = asyncio.get_running_loop().create_future()
+    _inflight[store_key] = finished
+    try:
+        try:
+            result = await handler()
+            record = {"status": status_code,
+                      "body": response_model.model_validate(result, from_attributes=True).model_dump(mode="json"),
+                      "headers": _recorded_headers(response.headers if response is not None else None)}
+        except HTTPException as e:
+            if not _is_final(e.status_code):
+                raise
+            record = {"status": e.status_code, "body": {"detail": e.detail}, "headers": _recorded_headers(e.headers)}
+        record.update(state="done", fingerprint=fingerprint)
+        await store.set(store_key, json.dumps(record), IDEMPOTENCY_TTL_SECONDS)
+    except BaseException:
+        # Nothing worth replaying; let the next attempt run again
+        await store.delete(store_key, expected_value=pending)
+        raise
+    finally:
+        del _inflight[store_key]
+        finished.set_result(None)
+
+    return _respond(record)
@@ -1,21 +1,47 @@
 # app/main.py
 
-from fastapi import FastAPI, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, date
 from datetime import timedelta
-from . import crud, models, schemas
-from .database import engine, get_db
-from .core.config import SESSIONS, BOOKING_START_TIME, SLOT_DURATION_MINUTES
+from typing import List, Literal, Optional
+from . import crud, models, schemas, availability, admission, doctors, holds, http_cache, idempotency, query_stats, queue_engine, schedule, slot_events, sms_dispatch, ttl_store
+from . import database
+from .database import get_async_db, get_read_db
+from .core.config import (SESSIONS, BOOKING_START_TIME, SLOT_DURATION_MINUTES,
+                          AVAILABILITY_MAX_RANGE_DAYS, DEFAULT_DOCTOR_ID, get_settings)
 from fastapi.middleware.cors import CORSMiddleware
 from .routers import admin
 
-# Create database tables on startup
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Engines and clients are created here rather than at import time, so a
+    # worker process starts without touching the database until it is ready.
+    settings = get_settings()
+    database.init_async_engines()
+    if settings.auto_create_schema:
+        # Development convenience; with AUTO_CREATE_SCHEMA=false Alembic owns the schema
+        async with database.get_async_engine().begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+        async with database.AsyncSessionLocal() as db:
+            await crud.ensure_default_doctor(db)
+
+    # Background workers that deliver queued SMS notifications
+    await sms_dispatch.dispatcher.start()
+    # One LISTEN connection per worker feeds the live slot streams (Postgres only)
+    await slot_events.broker.start(database.get_listen_dsn())
+    yield
+    await slot_events.broker.stop()
+    await sms_dispatch.dispatcher.stop()
+    await ttl_store.close_ttl_store()
+    await database.dispose_engines()
 
 app = FastAPI(
     title="Doctor Booking API",
-    description="API for booking doctor appointments with daily sessions."
+    description="API for booking doctor appointments with daily sessions.",
+    lifespan=lifespan
 )
 
 origins = [
@@ -34,23 +60,110 @@ app.add_middleware(
 
 app.include_router(admin.router)
 
+@app.middleware("http")
+async def add_query_stats_headers(request: Request, call_next):
+    """Counts the SQL statements of each request and reports them in debug headers."""
+    stats = query_stats.start_request()
+    response = await call_next(request)
+    if get_settings().debug_query_stats:
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = f"{stats.duration_ms:.2f}"
+    return response
+
 @app.post("/users/", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_phone(db, phone_number=user.phone_number)
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await crud.get_user_by_phone(db, phone_number=user.phone_number)
     if db_user:
         raise HTTPException(status_code=400, detail="Phone number already registered")
-    return crud.create_user(db=db, user=user)
+    return await crud.create_user(db=db, user=user)
 
 @app.get("/users/{user_id}", response_model=schemas.User)
-def read_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = crud.get_user(db, user_id=user_id)
+async def read_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_user = await crud.get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
 
+# --- Doctors and Clinics ---
+@app.get("/clinics", response_model=List[schemas.Clinic])
+async def list_clinics(db: AsyncSession = Depends(get_read_db)):
+    return await crud.get_clinics(db)
+
+@app.get("/doctors", response_model=List[schemas.Doctor])
+async def list_doctors(clinic_id: Optional[int] = None, db: AsyncSession = Depends(get_read_db)):
+    """Doctors taking bookings, optionally only those of one clinic."""
+    return await doctors.list_doctors(db, clinic_id=clinic_id)
+
+async def _require_doctor(db: AsyncSession, doctor_id: int):
+    if await doctors.get_doctor(db, doctor_id) is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+
+
+async def _session_for_slot(db: AsyncSession, doctor_id: int, booking_date: date, timeslot) -> str:
+    """Checks a slot against the doctor's schedule for the date and returns its session."""
+    day_schedule = await schedule.get_day_schedule(db, doctor_id, booking_date)
+    if day_schedule.is_closed:
+        raise HTTPException(status_code=400, detail="The doctor is not available on this date.")
+    session_name = day_schedule.session_for(timeslot)
+    if not session_name:
+        raise HTTPException(status_code=400, detail="Selected timeslot is outside of booking hours.")
+    if not day_schedule.is_slot_start(timeslot):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid timeslot. Slots are in {SLOT_DURATION_MINUTES}-minute intervals."
+        )
+    return session_name
+
+async def _check_booking_slot(doctor_id: int, booking_date: date, timeslot) -> str:
+    """
+    Checks the doctor and the slot before a booking joins the gate, using a
+    short-lived read session so a waiting request holds no pooled connection.
+    """
+    async with database.AsyncReadSessionLocal() as db:
+        await _require_doctor(db, doctor_id)
+        return await _session_for_slot(db, doctor_id, booking_date, timeslot)
+
+def _booking_queue_full(e: admission.AdmissionRejectedError):
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail={
+            "message": str(e),
+            "queue_position": e.queue_position,
+            "estimated_wait_seconds": round(e.estimated_wait_seconds, 2),
+        },
+        headers={"Retry-After": str(max(1, int(e.estimated_wait_seconds + 0.5)))},
+    )
+
+def _conflict_detail(e: Exception) -> str:
+    if isinstance(e, admission.SlotUnavailableError):
+        return str(e)
+    return "This timeslot is already booked."
+
+@app.get("/bookings/queue", response_model=schemas.BookingQueueStatus)
+async def get_booking_queue_status():
+    """Current load of this worker's booking gate, for a waiting-room display."""
+    return admission.get_booking_gate().status()
+
+async def _created_booking(response: Response, create):
+    """Awaits a booking write and points the 201's Location at the new booking."""
+    new_booking = await create
+    response.headers["Location"] = f"/bookings/{new_booking.id}/position"
+    return new_booking
+
 @app.post("/bookings/", response_model=schemas.Booking, status_code=status.HTTP_201_CREATED)
-def create_booking(booking: schemas.BookingCreate, db: Session = Depends(get_db)):
+async def create_booking(
+    booking: schemas.BookingCreate,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, description="Makes retries of this request safe"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await idempotency.run(request, idempotency_key,
+                                 lambda: _created_booking(response, _create_booking(booking, db)),
+                                 schemas.Booking, status.HTTP_201_CREATED, response)
+
+async def _create_booking(booking: schemas.BookingCreate, db: AsyncSession):
     # --- Validation Logic ---
     # 1. Check if booking is open for the day
     if datetime.now().time() < BOOKING_START_TIME:
@@ -63,42 +176,153 @@ def create_booking(booking: schemas.BookingCreate, db: Session = Depends(get_db)
     if booking.date < date.today():
          raise HTTPException(status_code=400, detail="Cannot book appointments for past dates.")
 
-    # 3. Check if the user exists
-    db_user = crud.get_user(db, user_id=booking.user_id)
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    # 4. Validate the timeslot (is it a valid 5-minute interval?)
+    # 3. Validate the timeslot (is it a valid 5-minute interval?)
     if booking.timeslot.minute % SLOT_DURATION_MINUTES != 0:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid timeslot. Slots are in {SLOT_DURATION_MINUTES}-minute intervals."
         )
 
-    # 5. Check if the timeslot falls within any session
-    session = crud.get_session_for_timeslot(booking.timeslot)
-    if not session:
-        raise HTTPException(status_code=400, detail="Selected timeslot is outside of booking hours.")
-
-    # 6. Check if the slot is already booked
-    existing_booking = crud.get_booking_by_slot(db, booking_date=booking.date, timeslot=booking.timeslot)
-    if existing_booking:
-        raise HTTPException(status_code=409, detail="This timeslot is already booked.")
+    # 4. Check the timeslot against the doctor's opening hours for the date
+    session = await _check_booking_slot(booking.doctor_id, booking.date, booking.timeslot)
 
     # --- Create Booking ---
-    new_booking = crud.create_booking(db=db, booking=booking)
+    # Database work only starts once the request is admitted by the booking gate
+    try:
+        async with admission.booking_admission(booking.doctor_id, booking.date, booking.timeslot, session):
+            # 5. Check if the user exists
+            db_user = await crud.get_user(db, user_id=booking.user_id)
+            if not db_user:
+                raise HTTPException(status_code=404, detail="User not found")
+
+            # A taken slot is rejected by the (doctor, date, timeslot) unique constraint
+            new_booking = await crud.create_booking(db=db, booking=booking)
+    except admission.AdmissionRejectedError as e:
+        raise _booking_queue_full(e)
+    except (admission.SlotUnavailableError, crud.SlotAlreadyBookedError) as e:
+        raise HTTPException(status_code=409, detail=_conflict_detail(e))
     return new_booking
 
+async def _booking_version(db: AsyncSession, doctor_id: int, day: date) -> int:
+    """A day's booking version from the availability cache, or from the database on a miss."""
+    version = availability.cached_version(doctor_id, day)
+    if version is None:
+        version = (await crud.get_booking_versions(db, doctor_id, [day]))[day]
+    return version
+
 @app.get("/slots/{selected_date}", response_model=list[schemas.Booking])
-def get_booked_slots_for_date(selected_date: date, db: Session = Depends(get_db)):
+async def get_booked_slots_for_date(
+    selected_date: date,
+    request: Request,
+    response: Response,
+    doctor_id: int = DEFAULT_DOCTOR_ID,
+    db: AsyncSession = Depends(get_read_db)
+):
     """
-    Returns a list of all bookings for a specific date.
+    Returns a list of a doctor's bookings for a specific date.
     The frontend can then determine which slots are taken.
+    Answers 304 from the day's booking version while it is unchanged.
+    """
+    await _require_doctor(db, doctor_id)
+    version = await _booking_version(db, doctor_id, selected_date)
+    etag = http_cache.etag_for({"bookings": doctor_id, "date": selected_date, "version": version})
+    if http_cache.is_not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return await crud.get_bookings_with_users_for_date(db, doctor_id=doctor_id, target_date=selected_date)
+
+@app.get("/slots/{selected_date}/availability", response_model=schemas.DayAvailability)
+async def get_slot_availability(
+    selected_date: date,
+    request: Request,
+    response: Response,
+    doctor_id: int = DEFAULT_DOCTOR_ID,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Returns a per-session bitmap of a doctor's booked slots for a date.
+    Contains no patient details and is served from an in-process cache.
+    Slots held by other patients are shown as taken.
+    The ETag covers the day's booking version, hours and holds, so an
+    unchanged day is answered with 304 before the bitmap is looked at.
+    """
+    await _require_doctor(db, doctor_id)
+    version = await _booking_version(db, doctor_id, selected_date)
+    day_schedule = await schedule.get_day_schedule(db, doctor_id, selected_date)
+    held = await holds.held_slots(doctor_id, selected_date, day_schedule.slots)
+    etag = http_cache.etag_for({"availability": doctor_id, "date": selected_date,
+                                "version": version, "hours": day_schedule.hours, "held": held})
+    if http_cache.is_not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+
+    day = await availability.get_day_availability(db, doctor_id, selected_date, version)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return availability.with_held_slots(day, held)
+
+@app.get("/slots/{selected_date}/events")
+async def stream_slot_events(selected_date: date, doctor_id: int = DEFAULT_DOCTOR_ID):
+    """
+    Server-sent events for a doctor's date: a 'snapshot' of its availability
+    first, then 'booked', 'held', 'freed' and 'serving' deltas as they happen.
+    """
+    # Checked with a short-lived session; the stream itself holds no connection
+    async with database.AsyncReadSessionLocal() as db:
+        await _require_doctor(db, doctor_id)
+    return StreamingResponse(
+        slot_events.stream(doctor_id, selected_date),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/availability", response_model=schemas.RangeAvailability)
+async def get_availability_for_range(
+    start_date: date,
+    end_date: date,
+    request: Request,
+    response: Response,
+    doctor_id: int = DEFAULT_DOCTOR_ID,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Returns a doctor's free and total slot counts per session for each date in
+    a range, so the calendar can render a whole month with one request.
     """
-    return db.query(models.Booking).filter(models.Booking.date == selected_date).all()
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date.")
+    if (end_date - start_date).days + 1 > AVAILABILITY_MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range cannot exceed {AVAILABILITY_MAX_RANGE_DAYS} days."
+        )
+
+    await _require_doctor(db, doctor_id)
+    counts = await crud.get_booking_counts_by_session(db, doctor_id, start_date, end_date)
+    schedules = await schedule.get_schedules(db, doctor_id, start_date, end_date)
+    payload = availability.build_range_availability(doctor_id, start_date, end_date, counts, schedules)
+    etag = http_cache.etag_for(payload)
+    if http_cache.is_not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return payload
 
 @app.post("/bookings/create_with_user", response_model=schemas.Booking, status_code=status.HTTP_201_CREATED)
-def create_booking_with_user(booking_data: schemas.BookingWithUserCreate, db: Session = Depends(get_db)):
+async def create_booking_with_user(
+    booking_data: schemas.BookingWithUserCreate,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, description="Makes retries of this request safe"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await idempotency.run(request, idempotency_key,
+                                 lambda: _created_booking(response, _create_booking_with_user(booking_data, db)),
+                                 schemas.Booking, status.HTTP_201_CREATED, response)
+
+async def _create_booking_with_user(booking_data: schemas.BookingWithUserCreate, db: AsyncSession):
     
     # --- New Validation Logic ---
     now = datetime.now()
@@ -126,31 +350,35 @@ def create_booking_with_user(booking_data: schemas.BookingWithUserCreate, db: Se
             detail=f"Invalid timeslot. Slots are in {SLOT_DURATION_MINUTES}-minute intervals."
         )
 
-    # --- Logic 4: Check if the timeslot falls within any valid session ---
-    session_name = crud.get_session_for_timeslot(booking_data.timeslot)
-    if not session_name:
-        raise HTTPException(status_code=400, detail="Selected timeslot is outside of booking hours.")
+    # --- Logic 4: Check the timeslot against the doctor's opening hours for the date ---
+    session_name = await _check_booking_slot(booking_data.doctor_id, booking_data.date, booking_data.timeslot)
 
-    # --- Logic 5: Check if the slot is already booked ---
-    existing_booking = crud.get_booking_by_slot(db, booking_date=booking_data.date, timeslot=booking_data.timeslot)
-    if existing_booking:
-        raise HTTPException(status_code=409, detail="This timeslot is already booked.")
+    # Taken slots and full days are refused here, and excess requests wait
+    # their turn, before anything is written.
+    try:
+        async with admission.booking_admission(booking_data.doctor_id, booking_data.date,
+                                               booking_data.timeslot, session_name):
+            # --- Logic 5: Find or create the user ---
+            # The user is only flushed, so it is committed together with the booking
+            # and rolled back if the slot turns out to be taken.
+            user_schema = schemas.UserCreate(name=booking_data.name, phone_number=booking_data.phone_number)
+            db_user = await crud.get_or_create_user(db=db, user=user_schema)
 
-    # --- Logic 6: Find or create the user ---
-    db_user = crud.get_user_by_phone(db, phone_number=booking_data.phone_number)
-    if not db_user:
-        user_schema = schemas.UserCreate(name=booking_data.name, phone_number=booking_data.phone_number)
-        db_user = crud.create_user(db=db, user=user_schema)
+            # --- Logic 6: Create the booking for the user ---
+            booking_schema = schemas.BookingCreate(
+                doctor_id=booking_data.doctor_id,
+                date=booking_data.date,
+                timeslot=booking_data.timeslot,
+                user_id=db_user.id
+            )
 
-    # --- Logic 7: Create the booking for the user ---
-    booking_schema = schemas.BookingCreate(
-        date=booking_data.date,
-        timeslot=booking_data.timeslot,
-        user_id=db_user.id
-    )
-    
-    # This calls the crud function that calculates order_number and turn_number
-    new_booking = crud.create_booking(db=db, booking=booking_schema)
+            # This calls the crud function that calculates order_number and turn_number.
+            # A taken slot is rejected by the (doctor, date, timeslot) unique constraint.
+            new_booking = await crud.create_booking(db=db, booking=booking_schema)
+    except admission.AdmissionRejectedError as e:
+        raise _booking_queue_full(e)
+    except (admission.SlotUnavailableError, crud.SlotAlreadyBookedError) as e:
+        raise HTTPException(status_code=409, detail=_conflict_detail(e))
     
     # This check is technically redundant because of Logic 4, but it's good practice
     if not new_booking:
@@ -159,6 +387,119 @@ def create_booking_with_user(booking_data: schemas.BookingWithUserCreate, db: Se
     return new_booking
 
 
+# --- Live Queue ---
+@app.get("/queue/{selected_date}/{session}", response_model=schemas.QueueStatus)
+async def get_queue_status(
+    selected_date: date,
+    session: Literal['morning', 'evening', 'night'],
+    doctor_id: int = DEFAULT_DOCTOR_ID,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """The turn now being served. Changes are also pushed as 'serving' events on /slots/{date}/events."""
+    await _require_doctor(db, doctor_id)
+    return await queue_engine.get_queue_state(db, doctor_id, selected_date, session)
+
+@app.get("/bookings/{booking_id}/position", response_model=schemas.QueuePosition)
+async def get_booking_position(booking_id: int, db: AsyncSession = Depends(get_read_db)):
+    position = await queue_engine.get_position(db, booking_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    return position
+
+# --- Slot Holds (two-phase booking) ---
+async def _validate_requested_slot(db: AsyncSession, doctor_id: int, booking_date: date, timeslot) -> str:
+    """Applies the booking date/time rules and returns the slot's session."""
+    now = datetime.now()
+    if booking_date < now.date():
+        raise HTTPException(status_code=400, detail="Cannot book appointments for past dates.")
+    if booking_date == now.date() and timeslot < now.time():
+        raise HTTPException(status_code=400, detail="Cannot book a time slot that has already passed today.")
+    if timeslot.minute % SLOT_DURATION_MINUTES != 0:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid timeslot. Slots are in {SLOT_DURATION_MINUTES}-minute intervals."
+        )
+    await _require_doctor(db, doctor_id)
+    return await _session_for_slot(db, doctor_id, booking_date, timeslot)
+
+@app.post("/holds", response_model=schemas.SlotHold, status_code=status.HTTP_201_CREATED)
+async def create_slot_hold(hold_data: schemas.SlotHoldCreate, db: AsyncSession = Depends(get_read_db)):
+    """Reserves a slot for SLOT_HOLD_SECONDS while the patient enters their details."""
+    doctor_id = hold_data.doctor_id
+    session_name = await _validate_requested_slot(db, doctor_id, hold_data.date, hold_data.timeslot)
+
+    day = await availability.get_day_availability(db, doctor_id, hold_data.date)
+    if availability.is_slot_booked(day, session_name, hold_data.timeslot):
+        raise HTTPException(status_code=409, detail="This timeslot is already booked.")
+
+    try:
+        hold = await holds.create_hold(doctor_id, hold_data.date, hold_data.timeslot, session_name)
+    except holds.SlotHeldError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    event = slot_events.slot_event("held", doctor_id, hold_data.date, session_name, hold_data.timeslot)
+    # Lets clients free the slot themselves should the 'freed' for its expiry not arrive
+    event.update(expires_at=hold["expires_at"].isoformat(), expires_in_seconds=hold["expires_in_seconds"])
+    await slot_events.broker.publish(event)
+    return hold
+
+@app.get("/holds/{hold_id}", response_model=schemas.SlotHold)
+async def read_slot_hold(hold_id: str):
+    hold = await holds.get_hold(hold_id)
+    if hold is None:
+        raise HTTPException(status_code=404, detail="Hold not found or expired")
+    return hold
+
+@app.delete("/holds/{hold_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def release_slot_hold(hold_id: str):
+    hold = await holds.get_hold(hold_id)
+    if hold is None or not await holds.release_hold(hold_id):
+        raise HTTPException(status_code=404, detail="Hold not found or expired")
+    await slot_events.broker.publish(
+        slot_events.slot_event("freed", hold["doctor_id"], hold["date"], hold["session"], hold["timeslot"])
+    )
+
+@app.post("/holds/{hold_id}/confirm", response_model=schemas.Booking, status_code=status.HTTP_201_CREATED)
+async def confirm_slot_hold(
+    hold_id: str,
+    patient: schemas.HoldConfirm,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, description="Makes retries of this request safe"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Turns a live hold into a booking. The slot is already reserved for this
+    patient, so this skips the booking queue and is a single transaction.
+    """
+    return await idempotency.run(request, idempotency_key,
+                                 lambda: _created_booking(response, _confirm_slot_hold(hold_id, patient, db)),
+                                 schemas.Booking, status.HTTP_201_CREATED, response)
+
+async def _confirm_slot_hold(hold_id: str, patient: schemas.HoldConfirm, db: AsyncSession):
+    hold = await holds.get_hold(hold_id)
+    if hold is None:
+        raise HTTPException(status_code=410, detail="This hold has expired. Please choose a slot again.")
+    # The hold only reserves the slot; the slot may have started, or left the
+    # doctor's schedule, since it was taken
+    await _validate_requested_slot(db, hold["doctor_id"], hold["date"], hold["timeslot"])
+
+    user_schema = schemas.UserCreate(name=patient.name, phone_number=patient.phone_number)
+    db_user = await crud.get_or_create_user(db=db, user=user_schema)
+    booking_schema = schemas.BookingCreate(
+        doctor_id=hold["doctor_id"], date=hold["date"], timeslot=hold["timeslot"], user_id=db_user.id
+    )
+    try:
+        new_booking = await crud.create_booking(db=db, booking=booking_schema)
+    except crud.SlotAlreadyBookedError:
+        raise HTTPException(status_code=409, detail="This timeslot is already booked.")
+    if new_booking is None:
+        # The schedule changed between the check above and the write
+        raise HTTPException(status_code=409, detail="This timeslot is no longer available for booking.")
+
+    await holds.release_hold(hold_id)
+    return new_booking
+
+
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Welcome to the Doctor Booking API"}
\ No newline at end of file
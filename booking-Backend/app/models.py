@@ -1,9 +1,10 @@
 # app/models.py
 
-from sqlalchemy import (Column, Integer, String, Date, Time, ForeignKey,
-                        UniqueConstraint)
+from sqlalchemy import (Column, Integer, String, Boolean, Date, Time, DateTime, ForeignKey,
+                        Index, UniqueConstraint)
 from sqlalchemy.orm import relationship
 from .database import Base
+from .core.config import DEFAULT_DOCTOR_ID
 
 class User(Base):
     __tablename__ = "users"
@@ -27,18 +28,139 @@ class SuperAdmin(Base):
     username = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
 
+
+class Clinic(Base):
+    """A branch where doctors see patients."""
+    __tablename__ = "clinics"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False)
+
+    doctors = relationship("Doctor", back_populates="clinic")
+
+
+class Doctor(Base):
+    """
+    A doctor taking bookings at one clinic. Bookings, counters, the queue and
+    the schedule are all kept per doctor.
+    """
+    __tablename__ = "doctors"
+
+    id = Column(Integer, primary_key=True, index=True)
+    clinic_id = Column(Integer, ForeignKey("clinics.id"), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    active = Column(Boolean, nullable=False, default=True)
+
+    clinic = relationship("Clinic", back_populates="doctors")
+
+
 class Booking(Base):
     __tablename__ = "bookings"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    date = Column(Date, index=True)
-    session = Column(String, index=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False, default=DEFAULT_DOCTOR_ID)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    # The partition key of the monthly partitions on Postgres
+    date = Column(Date, nullable=False, index=True)
+    session = Column(String)
     timeslot = Column(Time)
     order_number = Column(Integer)
-    turn_number = Column(Integer, index=True)
-    
+    turn_number = Column(Integer)
+
     user = relationship("User", back_populates="bookings")
 
-    # Ensures that a specific timeslot on a specific date can only be booked once
-    __table_args__ = (UniqueConstraint('date', 'timeslot', name='_date_timeslot_uc'),)
\ No newline at end of file
+    __table_args__ = (
+        # Ensures that a doctor's timeslot on a specific date can only be booked once
+        UniqueConstraint('doctor_id', 'date', 'timeslot', name='_doctor_date_timeslot_uc'),
+        # Turn counting, shifting and renumbering within one doctor's session
+        Index('ix_bookings_doctor_date_session_timeslot', 'doctor_id', 'date', 'session', 'timeslot'),
+        # A doctor's day in turn order (dashboard, reminders) without a sort
+        Index('ix_bookings_doctor_date_turn_session', 'doctor_id', 'date', 'turn_number', 'session'),
+    )
+
+
+class SessionCounter(Base):
+    """
+    One row per (doctor, date, session) holding the last order number handed out.
+    Incremented with a single upsert so concurrent bookings never share a number.
+    """
+    __tablename__ = "session_counters"
+
+    doctor_id = Column(Integer, primary_key=True, default=DEFAULT_DOCTOR_ID)
+    date = Column(Date, primary_key=True)
+    session = Column(String, primary_key=True)
+    last_order_number = Column(Integer, nullable=False, default=0)
+
+
+class DailyBookingCount(Base):
+    """
+    Rollup of bookings per (doctor, date, session), maintained by the booking write path.
+    Trend queries over any window are a single primary-key range scan.
+    """
+    __tablename__ = "daily_booking_counts"
+
+    doctor_id = Column(Integer, primary_key=True, default=DEFAULT_DOCTOR_ID)
+    date = Column(Date, primary_key=True)
+    session = Column(String, primary_key=True)
+    booking_count = Column(Integer, nullable=False, default=0)
+
+
+class BookingVersion(Base):
+    """
+    One row per (doctor, date) counting the writes to that day's bookings, bumped
+    in the same transaction as the bookings. Reads derive their ETags from it, so
+    an unchanged day is answered with 304 without querying its bookings.
+    """
+    __tablename__ = "booking_versions"
+
+    doctor_id = Column(Integer, primary_key=True, default=DEFAULT_DOCTOR_ID)
+    date = Column(Date, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class QueueState(Base):
+    """
+    The turn currently being served in each (doctor, date, session).
+    Advancing creates the row if needed, then locks and updates it; patients
+    compare it with their turn_number.
+    """
+    __tablename__ = "queue_states"
+
+    doctor_id = Column(Integer, primary_key=True, default=DEFAULT_DOCTOR_ID)
+    date = Column(Date, primary_key=True)
+    session = Column(String, primary_key=True)
+    current_turn = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=True)
+
+
+class ScheduleTemplate(Base):
+    """The opening hours of one session of a doctor on one weekday (0 = Monday)."""
+    __tablename__ = "schedule_templates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False, default=DEFAULT_DOCTOR_ID)
+    weekday = Column(Integer, nullable=False)
+    session = Column(String, nullable=False)
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+
+    __table_args__ = (UniqueConstraint('doctor_id', 'weekday', 'session', name='_doctor_weekday_session_uc'),)
+
+
+class ScheduleException(Base):
+    """
+    A change to a doctor's weekly template on one date: closes the whole day
+    (session is NULL), closes one session, or sets one session's hours.
+    """
+    __tablename__ = "schedule_exceptions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False, default=DEFAULT_DOCTOR_ID)
+    date = Column(Date, nullable=False)
+    session = Column(String, nullable=True)
+    closed = Column(Boolean, nullable=False, default=False)
+    start_time = Column(Time, nullable=True)
+    end_time = Column(Time, nullable=True)
+    note = Column(String, nullable=True)
+
+    __table_args__ = (Index('ix_schedule_exceptions_doctor_date', 'doctor_id', 'date'),)
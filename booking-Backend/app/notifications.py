@@ -1,51 +1,72 @@
 # app/notifications.py
-import os
 import httpx
-from dotenv import load_dotenv
 
-load_dotenv()
+from .core.config import get_settings
+from .phones import canonical_phone_number
 
-# Load credentials from .env file
-TEXTLK_API_TOKEN = os.getenv("TEXTLK_API_TOKEN")
-TEXTLK_SENDER_ID = os.getenv("TEXTLK_SENDER_ID")
 
-# Text.lk API endpoint
-TEXTLK_API_URL = "https://app.text.lk/api/http/sms/send"
+class SmsGatewayError(Exception):
+    """A transient gateway failure (network error, timeout or 5xx) that is worth retrying."""
+
+
+# One pooled client per process, so messages reuse TCP/TLS connections
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        settings = get_settings()
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.sms_read_timeout, connect=settings.sms_connect_timeout),
+            limits=httpx.Limits(
+                max_connections=settings.sms_max_connections,
+                max_keepalive_connections=settings.sms_max_connections
+            ),
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
 
 # --- New Phone Number Formatting Function ---
 def format_sri_lankan_phone_number(phone_number: str) -> str:
     """
-    Formats a Sri Lankan phone number to the international standard required by Text.lk.
-    - Removes leading '+' if present.
-    - Replaces a leading '0' with '94'.
-    - Assumes numbers already starting with '94' are correct.
+    Formats a Sri Lankan phone number to the international standard required by Text.lk,
+    which is the canonical form numbers are stored in (e.g. 94712345678).
     """
-    # Remove any spaces or dashes first for clean processing
-    cleaned_number = phone_number.strip().replace(" ", "").replace("-", "")
+    return canonical_phone_number(phone_number)
 
-    if cleaned_number.startswith('0') and len(cleaned_number) == 10:
-        # It's a local number like 0712345678, convert it
-        return f"94{cleaned_number[1:]}"
-    elif cleaned_number.startswith('+94'):
-        # It's a number like +94712345678, just remove the '+'
-        return cleaned_number[1:]
-    
-    # Otherwise, assume the number is already in the correct format (e.g., 94712345678)
-    return cleaned_number
 
+def build_turn_reminder(patient_name: str, turn_number: int, timeslot) -> str:
+    """The reminder sent to a patient whose turn is approaching."""
+    time_slot = timeslot.strftime('%I:%M %p') # Format time to 12-hour clock
+    return (
+        f"Hi {patient_name}, this is a reminder from Maryam Medicare. "
+        f"Your turn number ({turn_number}) is approaching. "
+        f"Your appointment is at {time_slot}. Please be ready."
+    )
 
-def send_sms_notification(phone_number: str, message: str):
+
+async def send_sms_notification(phone_number: str, message: str):
     """
     Sends an SMS notification using the Text.lk gateway.
     In development, if Text.lk is not configured, it prints to the console.
+    Returns (success, message) for delivered or rejected messages and raises
+    SmsGatewayError for failures that may succeed on a retry.
     """
-    if not TEXTLK_API_TOKEN or not TEXTLK_SENDER_ID:
+    settings = get_settings()
+    if not settings.textlk_api_token or not settings.textlk_sender_id:
         print("--- SMS SIMULATION (Text.lk) ---")
         # Format the phone number even in simulation for consistency
         formatted_number = format_sri_lankan_phone_number(phone_number)
         print(f"To (Formatted): {formatted_number}")
-        print(f"From: {TEXTLK_SENDER_ID or 'Not Configured'}")
+        print(f"From: {settings.textlk_sender_id or 'Not Configured'}")
         print(f"Message: {message}")
         print("--- (Text.lk is not configured in .env) ---")
         return True, "SMS simulated successfully."
@@ -55,29 +76,32 @@ def send_sms_notification(phone_number: str, message: str):
 
     params = {
         "recipient": formatted_recipient,
-        "sender_id": TEXTLK_SENDER_ID,
+        "sender_id": settings.textlk_sender_id,
         "message": message,
-        "api_token": TEXTLK_API_TOKEN
+        "api_token": settings.textlk_api_token
     }
 
     try:
-        with httpx.Client() as client:
-            response = client.get(TEXTLK_API_URL, params=params)
-            response.raise_for_status() # Raises an exception for 4xx or 5xx status codes
-        
+        response = await get_client().get(settings.textlk_api_url, params=params)
+    except httpx.TransportError as e:
+        # Connection failures and timeouts
+        raise SmsGatewayError(f"Could not reach the SMS gateway: {e}") from e
+
+    if response.status_code >= 500 or response.status_code == 429:
+        raise SmsGatewayError(f"SMS gateway returned HTTP {response.status_code}")
+    if response.is_error:
+        print(f"HTTP error sending SMS via Text.lk: {response.status_code}")
+        return False, "The SMS gateway rejected the request."
+
+    try:
         response_data = response.json()
+    except ValueError:
+        raise SmsGatewayError("SMS gateway returned an invalid response")
+
+    if response_data.get("status") == "success":
+        print(f"SMS sent successfully via Text.lk to {formatted_recipient}")
+        return True, response_data.get("message", "Notification sent successfully.")
 
-        if response_data.get("status") == "success":
-            print(f"SMS sent successfully via Text.lk to {formatted_recipient}")
-            return True, response_data.get("message", "Notification sent successfully.")
-        else:
-            error_message = response_data.get("message", "Unknown error from Text.lk")
-            print(f"Error from Text.lk API: {error_message}")
-            return False, error_message
-
-    except httpx.HTTPStatusError as e:
-        print(f"HTTP error sending SMS via Text.lk: {e}")
-        return False, "Failed to connect to the SMS gateway."
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-        return False, "An unexpected error occurred while sending the SMS."
\ No newline at end of file
+    error_message = response_data.get("message", "Unknown error from Text.lk")
+    print(f"Error from Text.lk API: {error_message}")
+    return False, error_message
@@ -0,0 +1,31 @@
+# app/phones.py
+"""
+The canonical form of patient phone numbers: digits only with the country
+code, e.g. 94712345678 for 071 234 5678, +94 71 234 5678 or 0094712345678.
+
+Numbers are canonicalized by the request schemas, so every way of typing a
+number finds the same user, and it is also the form the SMS gateway expects.
+"""
+import re
+
+# Separators people type inside numbers
+_SEPARATORS = re.compile(r"[\s\-().]")
+
+# Sri Lankan country code, replacing the trunk '0' of local numbers
+COUNTRY_CODE = "94"
+
+
+def canonical_phone_number(phone_number: str) -> str:
+    """
+    Drops separators and any '+' or '00' international prefix, and turns a
+    local number (0 and nine digits) into its international form. Anything
+    else is returned as typed, for the caller to validate.
+    """
+    cleaned = _SEPARATORS.sub("", phone_number.strip())
+    if cleaned.startswith("+"):
+        cleaned = cleaned[1:]
+    elif cleaned.startswith("00"):
+        cleaned = cleaned[2:]
+    elif cleaned.startswith("0") and len(cleaned) == 10:
+        cleaned = COUNTRY_CODE + cleaned[1:]
+    return cleaned
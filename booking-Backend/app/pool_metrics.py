@@ -0,0 +1,64 @@
+# app/pool_metrics.py
+import threading
+import time
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class CheckoutWaitStats:
+    """Running totals of how long callers waited to check out a connection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += waited
+            if waited > self.max_wait:
+                self.max_wait = waited
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            avg = self.total_wait / self.checkouts if self.checkouts else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "wait_total_ms": round(self.total_wait * 1000, 3),
+                "wait_avg_ms": round(avg * 1000, 3),
+                "wait_max_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that times every checkout, including time spent blocked
+    waiting for a free connection when the pool and its overflow are exhausted.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = CheckoutWaitStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_stats.record(time.perf_counter() - started)
+
+
+def describe_pool(name: str, pool) -> dict:
+    """Current gauges of a connection pool, plus checkout wait totals if it is instrumented."""
+    stats = {
+        "name": name,
+        "size": pool.size() if hasattr(pool, "size") else 0,
+        "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else 0,
+        "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else 0,
+        "overflow": max(pool.overflow(), 0) if hasattr(pool, "overflow") else 0,
+    }
+    wait_stats = getattr(pool, "wait_stats", None)
+    stats.update(wait_stats.snapshot() if wait_stats else CheckoutWaitStats().snapshot())
+    return stats
@@ -0,0 +1,87 @@
+# app/query_stats.py
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryStats:
+    """Number of SQL statements and total time spent in the database."""
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+
+# Set per request by the middleware in main.py. Sync endpoints run in a
+# threadpool with a copy of the context, so they update the same object.
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+# The start time lives on the statement's execution context, which is dropped
+# with the statement, so one that raises leaves nothing behind on the connection
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    stats = _current_stats.get()
+    if stats is not None and started is not None:
+        stats.count += 1
+        stats.duration += time.perf_counter() - started
+
+
+def install(engine: Engine):
+    """Registers the statement counters on an engine."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def start_request() -> QueryStats:
+    """Starts collecting stats for the current request."""
+    stats = QueryStats()
+    _current_stats.set(stats)
+    return stats
+
+
+@contextmanager
+def assert_max_queries(engine: Engine, max_queries: int):
+    """
+    Fails if more than 'max_queries' statements run on the engine inside the block.
+    Meant for tests, so that a regression to per-row loading is caught:
+
+        with assert_max_queries(database.get_async_engine().sync_engine, 3):
+            client.get("/admin/dashboard-data", params={"date": "2025-09-01"})
+
+    Counts every statement on the engine regardless of which thread runs it,
+    so it also works with the threaded TestClient.
+    """
+    stats = QueryStats()
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        stats.count += 1
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    if stats.count > max_queries:
+        listing = "\n".join(f"  {i + 1}. {sql}" for i, sql in enumerate(statements))
+        raise AssertionError(
+            f"Expected at most {max_queries} queries, {stats.count} were executed:\n{listing}"
+        )
@@ -0,0 +1,138 @@
+# app/queue_engine.py
+"""
+The live "now serving" queue of each doctor's (date, session).
+
+The current turn is one row in queue_states and the session size comes from
+the daily_booking_counts rollup, so reading or advancing the queue touches a
+handful of rows no matter how many patients are booked. Each advance queues a
+reminder for the patients who have just come within
+QUEUE_REMINDER_TURNS_AHEAD turns of the room, and announces the new turn on
+the date's live slot stream.
+"""
+import logging
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, models, notifications, slot_events, sms_dispatch
+from .core.config import SESSION_NOTIFY_MAX_RECIPIENTS, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueueAdvanceError(Exception):
+    """Raised when the queue cannot move to the requested turn."""
+
+
+async def get_queue_state(db: AsyncSession, doctor_id: int, day: date, session: str) -> dict:
+    state = await db.get(models.QueueState, (doctor_id, day, session))
+    rollup = await db.get(models.DailyBookingCount, (doctor_id, day, session))
+    return {
+        "doctor_id": doctor_id,
+        "date": day,
+        "session": session,
+        "current_turn": state.current_turn if state else 0,
+        "total_turns": rollup.booking_count if rollup else 0,
+        "updated_at": state.updated_at if state else None,
+    }
+
+
+async def advance(db: AsyncSession, doctor_id: int, day: date, session: str,
+                  to_turn: Optional[int] = None) -> dict:
+    """
+    Moves the queue to the next turn, or to 'to_turn', and queues the
+    look-ahead reminders. Returns the new state with 'reminders_queued'.
+    """
+    # 1. Lock the session's queue row, creating it on the first advance
+    state = await crud.lock_queue_state(db, doctor_id, day, session)
+    previous_turn = state.current_turn
+    new_turn = previous_turn + 1 if to_turn is None else to_turn
+    if new_turn < previous_turn:
+        # e.g. a retried request arriving after a later one
+        await db.rollback()
+        raise QueueAdvanceError(f"Turn {previous_turn} is already being served; the queue does not move back.")
+
+    rollup = await db.get(models.DailyBookingCount, (doctor_id, day, session))
+    total_turns = rollup.booking_count if rollup else 0
+    if new_turn > total_turns:
+        await db.rollback()
+        raise QueueAdvanceError(f"There are only {total_turns} turns in this session.")
+
+    # 2. Store the new turn and announce it once committed
+    now = datetime.now()
+    state.current_turn = new_turn
+    state.updated_at = now
+    event = {
+        "type": "serving", "doctor_id": doctor_id, "date": day.isoformat(),
+        "session": session, "current_turn": new_turn
+    }
+    await slot_events.notify_in_transaction(db, event)
+    await db.commit()
+    slot_events.broker.deliver_local(event)
+
+    # 3. Remind the patients who just entered the look-ahead window
+    reminders_queued = await _queue_reminders(db, doctor_id, day, session, previous_turn, new_turn, total_turns)
+
+    return {
+        "doctor_id": doctor_id,
+        "date": day,
+        "session": session,
+        "current_turn": new_turn,
+        "total_turns": total_turns,
+        "updated_at": now,
+        "reminders_queued": reminders_queued,
+    }
+
+
+async def _queue_reminders(db: AsyncSession, doctor_id: int, day: date, session: str,
+                           previous_turn: int, new_turn: int, total_turns: int) -> int:
+    turns_ahead = get_settings().queue_reminder_turns_ahead
+    if turns_ahead <= 0:
+        return 0
+
+    # The window is (current, current + K]; before the first advance it is empty
+    previous_window_end = previous_turn + turns_ahead if previous_turn else 0
+    turn_from = max(previous_window_end, new_turn) + 1
+    turn_to = min(new_turn + turns_ahead, total_turns, turn_from + SESSION_NOTIFY_MAX_RECIPIENTS - 1)
+    if turn_from > turn_to:
+        return 0
+
+    bookings = await crud.get_bookings_for_turns(db, doctor_id=doctor_id, booking_date=day, session=session,
+                                                 turn_from=turn_from, turn_to=turn_to)
+    queued = 0
+    for booking in bookings:
+        message = notifications.build_turn_reminder(booking.user.name, booking.turn_number, booking.timeslot)
+        try:
+            sms_dispatch.dispatcher.submit(phone_number=booking.user.phone_number, message=message)
+            queued += 1
+        except sms_dispatch.QueueFullError:
+            logger.warning("SMS queue full, skipped reminder for booking %s", booking.id)
+    return queued
+
+
+async def get_position(db: AsyncSession, booking_id: int) -> Optional[dict]:
+    """Where a booking stands in its session's queue."""
+    booking = await db.get(models.Booking, booking_id)
+    if booking is None:
+        return None
+    state = await db.get(models.QueueState, (booking.doctor_id, booking.date, booking.session))
+    current_turn = state.current_turn if state else 0
+
+    if booking.turn_number < current_turn:
+        position_status = "done"
+    elif booking.turn_number == current_turn:
+        position_status = "serving"
+    else:
+        position_status = "waiting"
+    return {
+        "booking_id": booking.id,
+        "doctor_id": booking.doctor_id,
+        "date": booking.date,
+        "session": booking.session,
+        "turn_number": booking.turn_number,
+        "current_turn": current_turn,
+        # Includes the patient being served
+        "patients_ahead": max(booking.turn_number - max(current_turn, 1), 0),
+        "status": position_status,
+    }
@@ -0,0 +1,43 @@
+# app/rate_limit.py
+import time
+from collections import OrderedDict, deque
+
+
+class SlidingWindowLimiter:
+    """
+    Allows at most 'max_events' per key within 'window_seconds'.
+    Keeps the most recent 'max_keys' keys so memory stays bounded under floods
+    of distinct keys.
+    """
+
+    def __init__(self, max_events: int, window_seconds: float, max_keys: int = 10000):
+        self.max_events = max_events
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._events: "OrderedDict[str, deque]" = OrderedDict()
+
+    def hit(self, key: str) -> float:
+        """
+        Records an event for 'key'. Returns 0 if it is allowed, otherwise the
+        number of seconds until the key may try again (the event is not recorded).
+        """
+        now = time.monotonic()
+        events = self._events.get(key)
+        if events is None:
+            events = self._events[key] = deque()
+            while len(self._events) > self.max_keys:
+                self._events.popitem(last=False)
+        else:
+            self._events.move_to_end(key)
+
+        cutoff = now - self.window_seconds
+        while events and events[0] <= cutoff:
+            events.popleft()
+
+        if len(events) >= self.max_events:
+            return events[0] + self.window_seconds - now
+        events.append(now)
+        return 0.0
+
+    def reset(self, key: str):
+        self._events.pop(key, None)
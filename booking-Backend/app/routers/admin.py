@@ -1,35 +1,75 @@
 # app/routers/admin.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 
 
 from .. import dependencies
 from .. import crud, schemas, auth, database
-from datetime import date
-from .. import notifications
-from .. import models
+from datetime import date, timedelta
+from ..core.config import (DEFAULT_DOCTOR_ID, SESSION_NOTIFY_MAX_RECIPIENTS, SESSION_NOTIFY_WAIT_SECONDS,
+                           LOGIN_THROTTLE_WINDOW_SECONDS, LOGIN_MAX_ATTEMPTS_PER_IP,
+                           LOGIN_MAX_ATTEMPTS_PER_USERNAME)
+from .. import archive, export, http_cache, models, notifications, queue_engine, schedule, sms_dispatch
+from ..rate_limit import SlidingWindowLimiter
 
 router = APIRouter(
     prefix="/admin",
     tags=["admin"],
 )
 
+# Throttles checked before any password hashing happens. The per-username one
+# also counts per client IP, so failed guesses from elsewhere cannot lock an
+# admin out; the per-IP one caps what a single client can try across usernames.
+_login_ip_limiter = SlidingWindowLimiter(LOGIN_MAX_ATTEMPTS_PER_IP, LOGIN_THROTTLE_WINDOW_SECONDS)
+_login_username_limiter = SlidingWindowLimiter(LOGIN_MAX_ATTEMPTS_PER_USERNAME, LOGIN_THROTTLE_WINDOW_SECONDS)
+
+def _too_many_attempts(retry_after: float):
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many login attempts. Please try again later.",
+        headers={"Retry-After": str(max(1, int(retry_after + 0.5)))},
+    )
+
 @router.post("/login", response_model=schemas.Token)
-def login_for_access_token(form_data: schemas.LoginRequest, db: Session = Depends(database.get_db)):
+async def login_for_access_token(form_data: schemas.LoginRequest, request: Request, db: AsyncSession = Depends(database.get_async_db)):
+    client_ip = request.client.host if request.client else "unknown"
+    retry_after = _login_ip_limiter.hit(client_ip)
+    if retry_after:
+        raise _too_many_attempts(retry_after)
+    username_key = f"{form_data.role}:{form_data.username}:{client_ip}"
+    retry_after = _login_username_limiter.hit(username_key)
+    if retry_after:
+        raise _too_many_attempts(retry_after)
+
     user = None
     if form_data.role == 'superadmin':
-        user = crud.get_super_admin_by_username(db, username=form_data.username)
+        user = await crud.get_super_admin_by_username(db, username=form_data.username)
     else: # role == 'admin'
-        user = crud.get_admin_by_username(db, username=form_data.username)
+        user = await crud.get_admin_by_username(db, username=form_data.username)
+
+    try:
+        if user:
+            password_ok, new_hash = await auth.verify_password_async(form_data.password, user.hashed_password)
+        else:
+            password_ok, new_hash = await auth.verify_missing_account_async(form_data.password)
+    except auth.HashingOverloadedError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
 
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    _login_username_limiter.reset(username_key)
+
+    # Upgrade the stored hash when the configured bcrypt cost has changed
+    if new_hash:
+        await crud.update_password_hash(db, user, new_hash)
+
     access_token = auth.create_access_token(
         data={"sub": user.username, "role": form_data.role}
     )
@@ -39,93 +79,397 @@ def login_for_access_token(form_data: schemas.LoginRequest, db: Session = Depend
 # This is a simplified example. In a real app, add a dependency to verify JWT.
 
 @router.post("/create-admin", response_model=schemas.Admin, status_code=status.HTTP_201_CREATED)
-def create_new_admin(admin: schemas.AdminCreate, db: Session = Depends(database.get_db), current_user: dict = Depends(dependencies.get_current_super_admin)):
-    db_admin = crud.get_admin_by_username(db, username=admin.username)
+async def create_new_admin(admin: schemas.AdminCreate, db: AsyncSession = Depends(database.get_async_db), current_user: dict = Depends(dependencies.get_current_super_admin)):
+    db_admin = await crud.get_admin_by_username(db, username=admin.username)
     if db_admin:
         raise HTTPException(status_code=400, detail="Username already registered")
-    return crud.create_admin(db=db, admin=admin)
+    try:
+        return await crud.create_admin(db=db, admin=admin)
+    except auth.HashingOverloadedError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
 
 @router.get("/list-admins", response_model=List[schemas.Admin])
-def list_all_admins(db: Session = Depends(database.get_db), current_user: dict = Depends(dependencies.get_current_super_admin)):
-    return crud.get_admins(db=db)
+async def list_all_admins(db: AsyncSession = Depends(database.get_async_db), current_user: dict = Depends(dependencies.get_current_super_admin)):
+    return await crud.get_admins(db=db)
 
 @router.delete("/delete-admin/{admin_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_existing_admin(admin_id: int, db: Session = Depends(database.get_db), current_user: dict = Depends(dependencies.get_current_super_admin)):
-    success = crud.delete_admin(db=db, admin_id=admin_id)
+async def delete_existing_admin(admin_id: int, db: AsyncSession = Depends(database.get_async_db), current_user: dict = Depends(dependencies.get_current_super_admin)):
+    success = await crud.delete_admin(db=db, admin_id=admin_id)
     if not success:
         raise HTTPException(status_code=404, detail="Admin not found")
     return {"ok": True}
 
 @router.get("/dashboard-data", response_model=schemas.DashboardData)
-def get_dashboard_data(
+async def get_dashboard_data(
     date: date, # FastAPI will automatically parse 'YYYY-MM-DD' from the query string
-    db: Session = Depends(database.get_db),
+    request: Request,
+    response: Response,
+    n_days: int = Query(7, ge=1, le=365, description="Length of the booking trend window in days"),
+    doctor_id: int = DEFAULT_DOCTOR_ID,
+    db: AsyncSession = Depends(database.get_read_db),
     current_user: dict = Depends(dependencies.get_current_active_admin)
 ):
-    # 1. Get all bookings for the selected date
-    daily_bookings = crud.get_bookings_for_date(db=db, target_date=date)
-
-    # 2. Calculate daily stats
-    morning_count = 0
-    evening_count = 0
-    night_count = 0
-    for booking in daily_bookings:
-        session = crud.get_session_for_timeslot(booking.timeslot)
-        if session == 'morning':
-            morning_count += 1
-        elif session == 'evening':
-            evening_count += 1
-        elif session == 'night':
-            night_count += 1
-            
+    await _require_doctor(db, doctor_id)
+
+    # 0. Answer 304 while neither the date nor the trend window has new bookings
+    trend_dates = crud.trend_dates(n_days)
+    versions = await crud.get_booking_versions(db, doctor_id, [date, *trend_dates])
+    etag = http_cache.etag_for({"dashboard": doctor_id, "date": date, "versions": sorted(versions.items())})
+    if http_cache.is_not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+    # 1. Get all of the doctor's bookings for the selected date (archived months are read from the archive)
+    if await archive.is_archived(date):
+        daily_bookings = await archive.get_bookings_for_date(doctor_id=doctor_id, target_date=date)
+    else:
+        daily_bookings = await crud.get_bookings_for_date(db=db, doctor_id=doctor_id, target_date=date)
+
+    # 2. Calculate daily stats from the per-session rollup
+    session_counts = await crud.get_session_counts_for_date(db=db, doctor_id=doctor_id, target_date=date)
     stats = schemas.DashboardStats(
-        totalBookings=len(daily_bookings),
-        morning=morning_count,
-        evening=evening_count,
-        night=night_count
+        totalBookings=sum(session_counts.values()),
+        morning=session_counts.get('morning', 0),
+        evening=session_counts.get('evening', 0),
+        night=session_counts.get('night', 0)
     )
 
-    # 3. Get the 7-day booking trend
-    weekly_trend_data = crud.get_booking_counts_for_last_n_days(db=db, n_days=7)
+    # 3. Get the booking trend from the daily rollup
+    trend_data = await crud.get_booking_counts_for_last_n_days(db=db, doctor_id=doctor_id, n_days=n_days)
     
     # 4. Assemble and return the final data structure
     return schemas.DashboardData(
         stats=stats,
         bookings=daily_bookings,
-        weeklyTrend=weekly_trend_data
+        weeklyTrend=trend_data
+    )
+
+
+async def _require_doctor(db: AsyncSession, doctor_id: int):
+    # Admins may still look at doctors who no longer take bookings
+    if await crud.get_doctor(db, doctor_id) is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+
+
+@router.post("/bookings/import", response_model=schemas.BookingImportResult)
+async def import_bookings(
+    request: schemas.BookingImportRequest,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: dict = Depends(dependencies.get_current_active_admin)
+):
+    """
+    Books a batch of (name, phone, date, timeslot) rows for one doctor, e.g. a
+    paper register or a walk-in list. Each row is reported as booked, conflict
+    (slot taken) or invalid (not on the schedule); booked rows are committed
+    together.
+    """
+    await _require_doctor(db, request.doctor_id)
+    rows = await crud.import_bookings(db, request.doctor_id, request.rows)
+    return schemas.BookingImportResult(
+        doctor_id=request.doctor_id,
+        booked=sum(1 for row in rows if row["status"] == "booked"),
+        conflicts=sum(1 for row in rows if row["status"] == "conflict"),
+        invalid=sum(1 for row in rows if row["status"] == "invalid"),
+        rows=rows
+    )
+
+
+@router.get("/bookings/export")
+async def export_bookings(
+    start_date: date,
+    end_date: date,
+    file_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    doctor_id: Optional[int] = Query(None, description="Only this doctor's bookings; all doctors when omitted"),
+    current_user: dict = Depends(dependencies.get_current_active_admin)
+):
+    """
+    Streams the bookings of an inclusive date range with their patients as CSV
+    or NDJSON, ordered by doctor, date and turn. Memory use does not grow with
+    the range; the export holds one read connection while it streams.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if doctor_id is not None:
+        # Checked with a short-lived session; the stream opens its own connection
+        async with database.AsyncReadSessionLocal() as db:
+            await _require_doctor(db, doctor_id)
+
+    return StreamingResponse(
+        export.stream_bookings(start_date, end_date, doctor_id, file_format),
+        media_type=export.MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="bookings_{start_date}_{end_date}.{file_format}"'},
     )
 
 
-# --- ADD THIS NEW ENDPOINT ---
-@router.post("/notify/{booking_id}", status_code=status.HTTP_200_OK)
-def send_patient_notification(
+@router.get("/pool-stats", response_model=schemas.DatabasePoolStats)
+async def get_database_pool_stats(current_user: dict = Depends(dependencies.get_current_active_admin)):
+    """Connection pool gauges (in use, overflow) and checkout wait times per engine."""
+    return database.get_pool_stats()
+
+
+@router.post("/notify/{booking_id}", response_model=schemas.NotificationJob, status_code=status.HTTP_202_ACCEPTED)
+async def send_patient_notification(
     booking_id: int,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
     current_user: dict = Depends(dependencies.get_current_active_admin)
 ):
     # 1. Fetch the booking from the database
-    booking = db.query(models.Booking).filter(models.Booking.id == booking_id).first()
+    booking = await crud.get_booking(db, booking_id=booking_id)
     if not booking:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found")
 
     # 2. Construct the notification message
-    patient_name = booking.user.name
-    turn_number = booking.turn_number
-    time_slot = booking.timeslot.strftime('%I:%M %p') # Format time to 12-hour clock
+    message = notifications.build_turn_reminder(booking.user.name, booking.turn_number, booking.timeslot)
     
-    message = (
-        f"Hi {patient_name}, this is a reminder from Maryam Medicare. "
-        f"Your turn number ({turn_number}) is approaching. "
-        f"Your appointment is at {time_slot}. Please be ready."
+    # 3. Queue the notification; delivery happens in the background
+    try:
+        job = sms_dispatch.dispatcher.submit(phone_number=booking.user.phone_number, message=message)
+    except sms_dispatch.QueueFullError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    return job.to_dict()
+
+
+@router.get("/notify/jobs/{job_id}", response_model=schemas.NotificationJob)
+async def get_notification_job(
+    job_id: str,
+    current_user: dict = Depends(dependencies.get_current_active_admin)
+):
+    job = sms_dispatch.dispatcher.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification job not found")
+    return job.to_dict()
+
+
+@router.post("/notify-session", response_model=schemas.SessionNotifyResult)
+async def notify_session_turns(
+    notify_request: schemas.SessionNotifyRequest,
+    current_user: dict = Depends(dependencies.get_current_active_admin)
+):
+    """
+    Sends the turn reminder to every patient in a range of turns of one session
+    and reports the outcome per recipient.
+    """
+    if (notify_request.count is None) == (notify_request.turn_to is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'count' or 'turn_to'.")
+    turn_to = notify_request.turn_to if notify_request.turn_to is not None else notify_request.turn_from + notify_request.count - 1
+    if turn_to < notify_request.turn_from:
+        raise HTTPException(status_code=400, detail="'turn_to' must not be before 'turn_from'.")
+    if turn_to - notify_request.turn_from + 1 > SESSION_NOTIFY_MAX_RECIPIENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {SESSION_NOTIFY_MAX_RECIPIENTS} turns can be notified at once."
+        )
+
+    # 1. Load the bookings and their users in one query, with a short-lived session
+    #    so no connection is held while the messages are delivered
+    async with database.AsyncSessionLocal() as db:
+        await _require_doctor(db, notify_request.doctor_id)
+        bookings = await crud.get_bookings_for_turns(
+            db, doctor_id=notify_request.doctor_id, booking_date=notify_request.date, session=notify_request.session,
+            turn_from=notify_request.turn_from, turn_to=turn_to
+        )
+
+    # 2. Queue one message per distinct phone number; the dispatcher bounds concurrency
+    results = []
+    jobs = {}
+    seen_numbers = set()
+    for booking in bookings:
+        formatted_number = notifications.format_sri_lankan_phone_number(booking.user.phone_number)
+        result = schemas.RecipientResult(
+            booking_id=booking.id,
+            turn_number=booking.turn_number,
+            phone_number=booking.user.phone_number,
+            status='queued'
+        )
+        results.append(result)
+        if formatted_number in seen_numbers:
+            result.status = 'duplicate'
+            result.detail = "Already notified for an earlier turn in this batch."
+            continue
+        seen_numbers.add(formatted_number)
+
+        message = notifications.build_turn_reminder(booking.user.name, booking.turn_number, booking.timeslot)
+        try:
+            jobs[booking.id] = sms_dispatch.dispatcher.submit(phone_number=booking.user.phone_number, message=message)
+        except sms_dispatch.QueueFullError as e:
+            result.status = 'failed'
+            result.detail = str(e)
+
+    # 3. Wait for delivery and report per recipient
+    await sms_dispatch.dispatcher.wait_for(jobs.values(), timeout=SESSION_NOTIFY_WAIT_SECONDS)
+    for result in results:
+        job = jobs.get(result.booking_id)
+        if job:
+            result.status = job.status
+            result.detail = job.detail
+
+    return schemas.SessionNotifyResult(
+        requested=len(bookings),
+        sent=sum(1 for r in results if r.status == 'sent'),
+        failed=sum(1 for r in results if r.status == 'failed'),
+        results=results
     )
-    
-    # 3. Send the notification
-    success, status_message = notifications.send_sms_notification(
-        phone_number=booking.user.phone_number,
-        message=message
+
+
+@router.post("/queue/advance", response_model=schemas.QueueAdvanceResult)
+async def advance_queue(
+    advance_request: schemas.QueueAdvanceRequest,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: dict = Depends(dependencies.get_current_active_admin)
+):
+    """
+    Calls the next turn (or a given one) into the room. Patients coming within
+    QUEUE_REMINDER_TURNS_AHEAD turns are sent their reminder automatically.
+    """
+    await _require_doctor(db, advance_request.doctor_id)
+    try:
+        return await queue_engine.advance(
+            db, doctor_id=advance_request.doctor_id, day=advance_request.date, session=advance_request.session, to_turn=advance_request.to_turn
+        )
+    except queue_engine.QueueAdvanceError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+# --- Schedule ---
+@router.get("/schedule", response_model=schemas.ScheduleOverview)
+async def get_schedule(
+    start_date: date = None,
+    end_date: date = None,
+    doctor_id: int = DEFAULT_DOCTOR_ID,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: dict = Depends(dependencies.get_current_active_admin)
+):
+    """A doctor's weekly template and exceptions in a date range (default: the next 60 days)."""
+    await _require_doctor(db, doctor_id)
+    start_date = start_date or date.today()
+    end_date = end_date or start_date + timedelta(days=60)
+    template = await schedule.get_template(db, doctor_id)
+    return {
+        "doctor_id": doctor_id,
+        "weekdays": [
+            {
+                "weekday": weekday,
+                "sessions": [{"session": name, "start_time": start, "end_time": end} for name, start, end in hours],
+            }
+            for weekday, hours in sorted(template.items())
+        ],
+        "exceptions": await crud.get_schedule_exceptions(db, doctor_id, start_date, end_date),
+    }
+
+@router.put("/schedule/weekdays/{weekday}", response_model=schemas.WeekdaySchedule)
+async def set_weekday_schedule(
+    sessions: List[schemas.SessionHours],
+    weekday: int = Path(..., ge=0, le=6, description="0 = Monday"),
+    doctor_id: int = DEFAULT_DOCTOR_ID,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: dict = Depends(dependencies.get_current_super_admin)
+):
+    """Replaces the sessions of one of a doctor's weekdays; an empty list closes that weekday."""
+    await _require_doctor(db, doctor_id)
+    try:
+        hours = schedule.validate_hours((s.session, s.start_time, s.end_time) for s in sessions)
+    except schedule.ScheduleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await crud.replace_weekday_hours(db, doctor_id=doctor_id, weekday=weekday, hours=hours)
+    return {"weekday": weekday, "sessions": sessions}
+
+@router.post("/schedule/exceptions", response_model=schemas.ScheduleException, status_code=status.HTTP_201_CREATED)
+async def create_schedule_exception(
+    exception: schemas.ScheduleExceptionCreate,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: dict = Depends(dependencies.get_current_active_admin)
+):
+    """Closes a day or a session on a date (holidays, leave), or changes one session's hours."""
+    # 1. Check the exception on its own
+    if exception.closed:
+        if exception.start_time or exception.end_time:
+            raise HTTPException(status_code=400, detail="A closing exception takes no hours.")
+    elif exception.session is None:
+        raise HTTPException(status_code=400, detail="Whole-day exceptions can only close the day.")
+    elif not (exception.start_time and exception.end_time):
+        raise HTTPException(status_code=400, detail="Give both start_time and end_time for the session.")
+
+    await _require_doctor(db, exception.doctor_id)
+
+    # 2. Check the day it produces, together with the exceptions already on that date
+    template = await schedule.get_template(db, exception.doctor_id)
+    existing = await crud.get_schedule_exceptions(db, exception.doctor_id, exception.date, exception.date)
+    candidate = models.ScheduleException(
+        session=exception.session, closed=exception.closed,
+        start_time=exception.start_time, end_time=exception.end_time
     )
+    try:
+        schedule.validate_hours(schedule.apply_exceptions(template[exception.date.weekday()], existing + [candidate]))
+    except schedule.ScheduleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    if not success:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to send notification: {status_message}")
+    return await crud.create_schedule_exception(db, exception)
+
+@router.delete("/schedule/exceptions/{exception_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_schedule_exception(
+    exception_id: int,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: dict = Depends(dependencies.get_current_active_admin)
+):
+    db_exception = await crud.get_schedule_exception(db, exception_id)
+    if not db_exception:
+        raise HTTPException(status_code=404, detail="Schedule exception not found")
+
+    # The remaining exceptions must still give a valid day
+    template = await schedule.get_template(db, db_exception.doctor_id)
+    remaining = [e for e in await crud.get_schedule_exceptions(db, db_exception.doctor_id,
+                                                               db_exception.date, db_exception.date)
+                 if e.id != exception_id]
+    try:
+        schedule.validate_hours(schedule.apply_exceptions(template[db_exception.date.weekday()], remaining))
+    except schedule.ScheduleError as e:
+        raise HTTPException(status_code=409, detail=f"Removing this exception is not possible: {e}")
+
+    await crud.delete_schedule_exception(db, exception_id)
 
-    return {"message": status_message}
\ No newline at end of file
+
+# --- Doctors and Clinics ---
+@router.post("/clinics", response_model=schemas.Clinic, status_code=status.HTTP_201_CREATED)
+async def create_clinic(
+    clinic: schemas.ClinicCreate,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: dict = Depends(dependencies.get_current_super_admin)
+):
+    if await crud.get_clinic_by_name(db, name=clinic.name):
+        raise HTTPException(status_code=400, detail="A clinic with this name already exists")
+    return await crud.create_clinic(db, clinic)
+
+@router.get("/doctors", response_model=List[schemas.Doctor])
+async def list_all_doctors(
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: dict = Depends(dependencies.get_current_active_admin)
+):
+    """Every doctor, including those who no longer take bookings."""
+    return await crud.get_doctors(db)
+
+@router.post("/doctors", response_model=schemas.Doctor, status_code=status.HTTP_201_CREATED)
+async def create_doctor(
+    doctor: schemas.DoctorCreate,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: dict = Depends(dependencies.get_current_super_admin)
+):
+    """Adds a doctor; they start with the default hours until their weekly schedule is set."""
+    if not await crud.get_clinic(db, doctor.clinic_id):
+        raise HTTPException(status_code=404, detail="Clinic not found")
+    return await crud.create_doctor(db, doctor)
+
+@router.patch("/doctors/{doctor_id}", response_model=schemas.Doctor)
+async def update_doctor(
+    doctor_id: int,
+    doctor: schemas.DoctorUpdate,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: dict = Depends(dependencies.get_current_super_admin)
+):
+    db_doctor = await crud.get_doctor(db, doctor_id)
+    if not db_doctor:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    if doctor.clinic_id is not None and not await crud.get_clinic(db, doctor.clinic_id):
+        raise HTTPException(status_code=404, detail="Clinic not found")
+    return await crud.update_doctor(db, db_doctor, doctor)
@@ -0,0 +1,254 @@
+# app/schedule.py
+"""
+Opening hours per date.
+
+Each doctor's hours come from a weekly template (schedule_templates: weekday,
+session, start, end) and date exceptions (schedule_exceptions) that close a
+whole day or one session, or change a session's hours. While a doctor has no
+template rows every weekday uses SESSIONS from config, so a fresh install
+behaves as before.
+
+Each (doctor, date) is compiled into a DaySchedule with its slot lists and a
+minute-of-day index, so finding the session and slot of a time is a single
+list lookup. Compiled days are cached per doctor and date; editing the schedule drops the
+cache (in every worker, through the slot event channel) and entries also
+expire after SCHEDULE_CACHE_TTL_SECONDS.
+"""
+import threading
+import time as clock
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .core.config import (SESSIONS, SLOT_DURATION_MINUTES,
+                          SCHEDULE_CACHE_TTL_SECONDS, SCHEDULE_CACHE_MAX_DATES)
+
+MINUTES_PER_DAY = 24 * 60
+
+# (session, start, end) triples ordered by start time
+SessionHours = Tuple[Tuple[str, time, time], ...]
+
+
+class ScheduleError(Exception):
+    """Raised when submitted opening hours are not valid."""
+
+
+def build_session_slots(start: time, end: time) -> List[time]:
+    """Lists every slot start time from 'start' up to (but excluding) 'end'."""
+    slots = []
+    current = datetime.combine(date.min, start)
+    limit = datetime.combine(date.min, end)
+    while current < limit:
+        slots.append(current.time())
+        current += timedelta(minutes=SLOT_DURATION_MINUTES)
+    return slots
+
+
+def _minute_of_day(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+class DaySchedule:
+    """The sessions of one day with a precomputed minute-of-day index."""
+
+    __slots__ = ("hours", "sessions", "slots", "_minute_index")
+
+    def __init__(self, hours: SessionHours):
+        self.hours = hours
+        self.sessions: Dict[str, Tuple[time, time]] = {name: (start, end) for name, start, end in hours}
+        self.slots: Dict[str, List[time]] = {name: build_session_slots(start, end) for name, start, end in hours}
+        # minute -> (session, slot index); the index is None inside a slot
+        self._minute_index: List[Optional[Tuple[str, Optional[int]]]] = [None] * MINUTES_PER_DAY
+        for name, start, end in hours:
+            slot_starts = {_minute_of_day(slot): index for index, slot in enumerate(self.slots[name])}
+            minute = _minute_of_day(start)
+            while minute < MINUTES_PER_DAY and time(minute // 60, minute % 60) < end:
+                self._minute_index[minute] = (name, slot_starts.get(minute))
+                minute += 1
+
+    @property
+    def is_closed(self) -> bool:
+        return not self.hours
+
+    def session_for(self, timeslot: time) -> Optional[str]:
+        """The session a time falls in, or None outside opening hours."""
+        entry = self._minute_index[_minute_of_day(timeslot)]
+        return entry[0] if entry else None
+
+    def is_slot_start(self, timeslot: time) -> bool:
+        entry = self._minute_index[_minute_of_day(timeslot)]
+        return entry is not None and entry[1] is not None and timeslot.second == 0 and timeslot.microsecond == 0
+
+    def slot_index(self, session_name: str, timeslot: time) -> Optional[int]:
+        entry = self._minute_index[_minute_of_day(timeslot)]
+        if entry is None or entry[0] != session_name:
+            return None
+        return entry[1]
+
+
+@lru_cache(maxsize=256)
+def _compile(hours: SessionHours) -> DaySchedule:
+    # Days with identical hours share one compiled schedule
+    return DaySchedule(hours)
+
+
+DEFAULT_HOURS: SessionHours = tuple(
+    sorted(((name, timings["start"], timings["end"]) for name, timings in SESSIONS.items()), key=lambda s: s[1])
+)
+
+
+def validate_hours(hours: Iterable[Tuple[str, time, time]]) -> SessionHours:
+    """Checks names, order and overlaps of a day's sessions and returns them sorted."""
+    ordered = tuple(sorted(hours, key=lambda s: s[1]))
+    seen = set()
+    previous_end = None
+    for name, start, end in ordered:
+        if name not in SESSIONS:
+            raise ScheduleError(f"Unknown session '{name}'. Sessions are: {', '.join(SESSIONS)}.")
+        if name in seen:
+            raise ScheduleError(f"Session '{name}' is listed twice.")
+        if start >= end:
+            raise ScheduleError(f"Session '{name}' must end after it starts.")
+        if start.minute % SLOT_DURATION_MINUTES or start.second:
+            raise ScheduleError(f"Session '{name}' must start on a {SLOT_DURATION_MINUTES}-minute boundary.")
+        if previous_end is not None and start < previous_end:
+            raise ScheduleError(f"Session '{name}' overlaps the session before it.")
+        seen.add(name)
+        previous_end = end
+    return ordered
+
+
+def apply_exceptions(hours: SessionHours, exceptions: List[models.ScheduleException]) -> SessionHours:
+    """The hours of a day after applying its exceptions in order."""
+    sessions = {name: (start, end) for name, start, end in hours}
+    for exception in exceptions:
+        if exception.session is None:
+            if exception.closed:
+                sessions = {}
+        elif exception.closed:
+            sessions.pop(exception.session, None)
+        else:
+            sessions[exception.session] = (exception.start_time, exception.end_time)
+    return tuple(sorted(((name, start, end) for name, (start, end) in sessions.items()), key=lambda s: s[1]))
+
+
+# --- Cache ---
+_lock = threading.Lock()
+_cache: "OrderedDict[Tuple[int, date], DaySchedule]" = OrderedDict()
+# Doctor id -> (weekday -> hours), filled as doctors are first asked about
+_templates: Dict[int, Dict[int, SessionHours]] = {}
+_loaded_at = 0.0
+# Bumped by invalidate(); loads that raced with an edit are not cached
+_generation = 0
+
+
+def _clear_locked():
+    global _generation
+    _cache.clear()
+    _templates.clear()
+    _generation += 1
+
+
+def invalidate():
+    """Drops every compiled day and template; called after any schedule edit."""
+    with _lock:
+        _clear_locked()
+
+
+def _expire_if_stale():
+    # Edits made through another worker reach this one within the TTL even
+    # if the broadcast is missed. Called with _lock held.
+    if _templates and clock.monotonic() - _loaded_at > SCHEDULE_CACHE_TTL_SECONDS:
+        _clear_locked()
+
+
+async def _load_template(db: AsyncSession, doctor_id: int) -> Dict[int, SessionHours]:
+    result = await db.execute(
+        select(models.ScheduleTemplate).where(models.ScheduleTemplate.doctor_id == doctor_id)
+    )
+    rows = result.scalars().all()
+    if not rows:
+        return {weekday: DEFAULT_HOURS for weekday in range(7)}
+    template: Dict[int, list] = {weekday: [] for weekday in range(7)}
+    for row in rows:
+        template[row.weekday].append((row.session, row.start_time, row.end_time))
+    return {weekday: tuple(sorted(hours, key=lambda s: s[1])) for weekday, hours in template.items()}
+
+
+async def get_template(db: AsyncSession, doctor_id: int) -> Dict[int, SessionHours]:
+    """A doctor's weekly template by weekday (0 = Monday), defaults included."""
+    global _loaded_at
+    with _lock:
+        _expire_if_stale()
+        template = _templates.get(doctor_id)
+        if template is not None:
+            return template
+        generation = _generation
+    template = await _load_template(db, doctor_id)
+    with _lock:
+        if generation == _generation:
+            if not _templates:
+                _loaded_at = clock.monotonic()
+            _templates[doctor_id] = template
+    return template
+
+
+async def get_schedules(db: AsyncSession, doctor_id: int,
+                        start_date: date, end_date: date) -> Dict[date, DaySchedule]:
+    """A doctor's compiled schedules for every date in a range, loading missing dates with one query."""
+    with _lock:
+        _expire_if_stale()
+        found = {}
+        current = start_date
+        while current <= end_date:
+            key = (doctor_id, current)
+            if key in _cache:
+                _cache.move_to_end(key)
+                found[current] = _cache[key]
+            current += timedelta(days=1)
+        generation = _generation
+    if len(found) == (end_date - start_date).days + 1:
+        return found
+
+    template = await get_template(db, doctor_id)
+    result = await db.execute(
+        select(models.ScheduleException).where(
+            models.ScheduleException.doctor_id == doctor_id,
+            models.ScheduleException.date >= start_date,
+            models.ScheduleException.date <= end_date
+        ).order_by(models.ScheduleException.id)
+    )
+    exceptions: Dict[date, List[models.ScheduleException]] = {}
+    for exception in result.scalars().all():
+        exceptions.setdefault(exception.date, []).append(exception)
+
+    compiled = {}
+    current = start_date
+    while current <= end_date:
+        hours = apply_exceptions(template[current.weekday()], exceptions.get(current, []))
+        compiled[current] = _compile(hours)
+        current += timedelta(days=1)
+
+    with _lock:
+        if generation == _generation:
+            for day, day_schedule in compiled.items():
+                _cache[(doctor_id, day)] = day_schedule
+                _cache.move_to_end((doctor_id, day))
+            while len(_cache) > SCHEDULE_CACHE_MAX_DATES:
+                _cache.popitem(last=False)
+    return compiled
+
+
+async def get_day_schedule(db: AsyncSession, doctor_id: int, day: date) -> DaySchedule:
+    with _lock:
+        _expire_if_stale()
+        day_schedule = _cache.get((doctor_id, day))
+        if day_schedule is not None:
+            _cache.move_to_end((doctor_id, day))
+            return day_schedule
+    return (await get_schedules(db, doctor_id, day, day))[day]
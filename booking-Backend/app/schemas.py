@@ -1,14 +1,25 @@
 # app/schemas.py
 
-from pydantic import BaseModel, Field
-from datetime import date, time
-from typing import Literal
-from typing import List
+from pydantic import BaseModel, BeforeValidator, Field
+from datetime import date, datetime, time
+from typing import Annotated, Literal
+from typing import List, Optional
+
+from .core.config import BOOKING_IMPORT_MAX_ROWS, DEFAULT_DOCTOR_ID
+from .phones import canonical_phone_number
+
+
+def _canonical_phone(value):
+    return canonical_phone_number(value) if isinstance(value, str) else value
+
+# Any way of typing a number becomes its canonical form (94712345678) before validation
+PhoneNumber = Annotated[str, BeforeValidator(_canonical_phone), Field(pattern=r"^[0-9]{10,15}$")]
+
 # --- User Schemas ---
 
 class UserBase(BaseModel):
     name: str
-    phone_number: str = Field(..., pattern=r"^\+?[0-9]{10,15}$") # Simple phone regex
+    phone_number: PhoneNumber
 
 class UserCreate(UserBase):
     pass
@@ -26,13 +37,14 @@ class User(UserBase):
 class BookingBase(BaseModel):
     date: date
     timeslot: time
+    doctor_id: int = DEFAULT_DOCTOR_ID
 
 class BookingCreate(BookingBase):
     user_id: int
 
 class BookingWithUserCreate(BookingBase):
     name: str
-    phone_number: str = Field(..., pattern=r"^\+?[0-9]{10,15}$")
+    phone_number: PhoneNumber
 
 class Booking(BookingBase):
     id: int
@@ -46,6 +58,80 @@ class Booking(BookingBase):
         from_attributes = True
 
 
+class SlotHoldCreate(BookingBase):
+    pass
+
+class SlotHold(BookingBase):
+    hold_id: str
+    session: str
+    expires_at: datetime
+    expires_in_seconds: int
+
+class HoldConfirm(BaseModel):
+    name: str
+    phone_number: PhoneNumber
+
+class BookingImportRow(BaseModel):
+    name: str
+    phone_number: PhoneNumber
+    date: date
+    timeslot: time
+
+class BookingImportRequest(BaseModel):
+    doctor_id: int = DEFAULT_DOCTOR_ID
+    rows: List[BookingImportRow] = Field(..., min_length=1, max_length=BOOKING_IMPORT_MAX_ROWS)
+
+class BookingImportRowResult(BaseModel):
+    row: int  # Position in the request, from 0
+    status: Literal['booked', 'conflict', 'invalid']
+    booking_id: Optional[int] = None
+    session: Optional[str] = None
+    detail: Optional[str] = None
+
+class BookingImportResult(BaseModel):
+    doctor_id: int
+    booked: int
+    conflicts: int
+    invalid: int
+    rows: List[BookingImportRowResult]
+
+class BookingQueueStatus(BaseModel):
+    active: int
+    waiting: int
+    max_active: int
+    max_waiting: int
+    estimated_wait_seconds: float
+
+# --- Availability Schemas ---
+class SessionAvailability(BaseModel):
+    session: str
+    start: time
+    end: time
+    bitmap: str  # One character per slot from 'start': '1' booked, '0' free
+    free: int
+
+class DayAvailability(BaseModel):
+    doctor_id: int
+    date: date
+    slot_minutes: int
+    sessions: List[SessionAvailability]
+
+class SessionCapacity(BaseModel):
+    session: str
+    total: int
+    free: int
+
+class DayCapacity(BaseModel):
+    date: date
+    sessions: List[SessionCapacity]
+
+class RangeAvailability(BaseModel):
+    doctor_id: int
+    start_date: date
+    end_date: date
+    days: List[DayCapacity]
+
+
 # --- Admin Schemas ---
 class AdminBase(BaseModel):
     username: str
@@ -82,4 +168,143 @@ class WeeklyTrendItem(BaseModel):
 class DashboardData(BaseModel):
     stats: DashboardStats
     bookings: List[Booking]  # Re-uses the existing Booking schema
-    weeklyTrend: List[WeeklyTrendItem]
\ No newline at end of file
+    weeklyTrend: List[WeeklyTrendItem]
+
+
+# --- Notification Schemas ---
+class NotificationJob(BaseModel):
+    job_id: str
+    status: Literal['queued', 'sending', 'sent', 'failed']
+    attempts: int
+    detail: Optional[str] = None
+
+
+class SessionNotifyRequest(BaseModel):
+    doctor_id: int = DEFAULT_DOCTOR_ID
+    date: date
+    session: Literal['morning', 'evening', 'night']
+    turn_from: int = Field(1, ge=1)
+    # Give either the number of turns to notify or the last turn of the range
+    count: Optional[int] = Field(None, ge=1)
+    turn_to: Optional[int] = Field(None, ge=1)
+
+class RecipientResult(BaseModel):
+    booking_id: int
+    turn_number: int
+    phone_number: str
+    status: Literal['sent', 'failed', 'queued', 'sending', 'duplicate']
+    detail: Optional[str] = None
+
+class SessionNotifyResult(BaseModel):
+    requested: int
+    sent: int
+    failed: int
+    results: List[RecipientResult]
+
+
+# --- Queue Schemas ---
+class QueueAdvanceRequest(BaseModel):
+    doctor_id: int = DEFAULT_DOCTOR_ID
+    date: date
+    session: Literal['morning', 'evening', 'night']
+    # Jump straight to a turn instead of moving to the next one
+    to_turn: Optional[int] = Field(None, ge=1)
+
+class QueueStatus(BaseModel):
+    doctor_id: int
+    date: date
+    session: str
+    current_turn: int
+    total_turns: int
+    updated_at: Optional[datetime] = None
+
+class QueueAdvanceResult(QueueStatus):
+    reminders_queued: int
+
+class QueuePosition(BaseModel):
+    booking_id: int
+    doctor_id: int
+    date: date
+    session: str
+    turn_number: int
+    current_turn: int
+    patients_ahead: int
+    status: Literal['waiting', 'serving', 'done']
+
+
+# --- Schedule Schemas ---
+class SessionHours(BaseModel):
+    session: Literal['morning', 'evening', 'night']
+    start_time: time
+    end_time: time
+
+class WeekdaySchedule(BaseModel):
+    weekday: int  # 0 = Monday
+    sessions: List[SessionHours]
+
+class ScheduleExceptionCreate(BaseModel):
+    doctor_id: int = DEFAULT_DOCTOR_ID
+    date: date
+    # Leave empty to apply to the whole day (only closing is allowed then)
+    session: Optional[Literal['morning', 'evening', 'night']] = None
+    closed: bool = False
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    note: Optional[str] = None
+
+class ScheduleException(ScheduleExceptionCreate):
+    id: int
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class ScheduleOverview(BaseModel):
+    doctor_id: int
+    weekdays: List[WeekdaySchedule]
+    exceptions: List[ScheduleException]
+
+
+# --- Doctor and Clinic Schemas ---
+class ClinicCreate(BaseModel):
+    name: str
+
+class Clinic(ClinicCreate):
+    id: int
+
+    class Config:
+        from_attributes = True
+
+class DoctorCreate(BaseModel):
+    clinic_id: int
+    name: str
+
+class DoctorUpdate(BaseModel):
+    clinic_id: Optional[int] = None
+    name: Optional[str] = None
+    # False stops new bookings; existing bookings and history are kept
+    active: Optional[bool] = None
+
+class Doctor(DoctorCreate):
+    id: int
+    active: bool
+
+    class Config:
+        from_attributes = True
+
+
+# --- Diagnostics Schemas ---
+class PoolStats(BaseModel):
+    name: str
+    size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    checkouts: int
+    wait_total_ms: float
+    wait_avg_ms: float
+    wait_max_ms: float
+
+class DatabasePoolStats(BaseModel):
+    primary: PoolStats
+    replica: Optional[PoolStats] = None
@@ -0,0 +1,281 @@
+# app/slot_events.py
+"""
+Live slot changes for the booking page.
+
+Subscribers listen to one doctor's date and receive small deltas ('booked', 'held',
+'freed') as they happen. On Postgres every change is sent with NOTIFY on
+SLOT_EVENTS_CHANNEL; each worker keeps a single LISTEN connection and fans the
+payloads out to its own subscribers, so all workers see every change. Other
+databases (SQLite in development) fall back to in-process delivery.
+
+Changes coming from other workers are also applied to this worker's
+availability cache, and schedule, doctor and archive changes clear the matching
+caches. Holds that expire are announced as 'freed' by the worker that created
+them, every HOLD_SWEEP_INTERVAL_SECONDS; 'held' also carries the expiry, for
+clients to fall back on.
+"""
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from datetime import date, time
+from typing import Dict, List, Optional, Set, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import String, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import archive, availability, database, doctors, holds, schedule
+from .core.config import (HOLD_SWEEP_INTERVAL_SECONDS, SLOT_EVENTS_CHANNEL, SLOT_EVENTS_QUEUE_SIZE,
+                          SLOT_EVENTS_HEARTBEAT_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+
+def slot_event(kind: str, doctor_id: int, day: date, session_name: str, timeslot: time,
+               version: Optional[int] = None) -> dict:
+    event = {
+        "type": kind,
+        "doctor_id": doctor_id,
+        "date": day.isoformat(),
+        "session": session_name,
+        "timeslot": timeslot.strftime("%H:%M"),
+    }
+    if version is not None:
+        # The day's booking version after this write (see crud.bump_booking_versions)
+        event["version"] = version
+    return event
+
+
+class Subscriber:
+    """One streaming client. A client that falls behind is told to resync instead of buffering without limit."""
+
+    def __init__(self, doctor_id: int, day: date):
+        self.doctor_id = doctor_id
+        self.day = day
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SLOT_EVENTS_QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, event: dict):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            # Wake the reader; it sends a fresh snapshot instead of the lost deltas
+            self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync"})
+
+
+class SlotEventBroker:
+    """Fans slot events out to this worker's subscribers, fed by LISTEN on Postgres."""
+
+    RECONNECT_DELAY_SECONDS = 2.0
+
+    def __init__(self):
+        self._subscribers: Dict[Tuple[int, date], Set[Subscriber]] = {}
+        self._dsn: Optional[str] = None
+        self._connection = None
+        self._connection_lock = asyncio.Lock()
+        self._supervisor: Optional[asyncio.Task] = None
+        self._hold_sweeper: Optional[asyncio.Task] = None
+
+    @property
+    def listening(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed()
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    # --- Lifecycle ---
+    async def start(self, dsn: Optional[str]):
+        """Starts listening on Postgres; with no DSN, events stay within this process."""
+        self._dsn = dsn
+        if dsn and self._supervisor is None:
+            self._supervisor = asyncio.create_task(self._listen_forever())
+        if self._hold_sweeper is None:
+            self._hold_sweeper = asyncio.create_task(self._sweep_lapsed_holds())
+
+    async def stop(self):
+        for task in (self._hold_sweeper, self._supervisor):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._hold_sweeper = self._supervisor = None
+        await self._close_connection()
+
+    async def _close_connection(self):
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            await connection.close()
+
+    async def _listen_forever(self):
+        """Keeps one LISTEN connection open, reconnecting after failures."""
+        import asyncpg
+
+        while True:
+            lost = asyncio.Event()
+            try:
+                connection = await asyncpg.connect(self._dsn)
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(SLOT_EVENTS_CHANNEL, self._on_notify)
+                self._connection = connection
+                logger.info("Listening for slot events on '%s'", SLOT_EVENTS_CHANNEL)
+                await lost.wait()
+                logger.warning("Slot event listener connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Slot event listener failed, retrying")
+            await self._close_connection()
+            await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+    def _on_notify(self, connection, pid, channel, payload: str):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed slot event: %r", payload)
+            return
+        self._handle(event)
+
+    def _handle(self, event: dict):
+        """Applies an event to this worker's caches and passes it to subscribers."""
+        if event.get("type") == "schedule":
+            # Opening hours changed somewhere; nothing for subscribers to apply
+            schedule.invalidate()
+            availability.invalidate_all()
+            return
+        if event.get("type") == "doctors":
+            doctors.invalidate()
+            return
+        if event.get("type") == "archive":
+            # archive_bookings.py moved months out of the live table
+            archive.invalidate()
+            return
+        if event.get("type") == "booked":
+            availability.mark_booked(
+                event["doctor_id"], date.fromisoformat(event["date"]),
+                time.fromisoformat(event["timeslot"]), event["session"], event.get("version")
+            )
+        self._fan_out(event)
+
+    async def _sweep_lapsed_holds(self):
+        """Announces 'freed' for the holds made here that expired without a booking."""
+        while True:
+            await asyncio.sleep(HOLD_SWEEP_INTERVAL_SECONDS)
+            try:
+                for hold in await holds.pop_lapsed_holds():
+                    if await _is_booked(hold["doctor_id"], hold["date"], hold["session"], hold["timeslot"]):
+                        continue
+                    await self.publish(
+                        slot_event("freed", hold["doctor_id"], hold["date"], hold["session"], hold["timeslot"])
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Could not announce expired holds")
+
+    # --- Publishing ---
+    def _fan_out(self, event: dict):
+        key = (event["doctor_id"], date.fromisoformat(event["date"]))
+        for subscriber in tuple(self._subscribers.get(key, ())):
+            subscriber.offer(event)
+
+    def deliver_local(self, event: dict):
+        """Delivers an event committed by this worker when no LISTEN connection will echo it back."""
+        if not self.listening:
+            self._fan_out(event)
+
+    async def publish(self, event: dict):
+        """Sends an event outside any transaction (e.g. slot holds, schedule or doctor edits)."""
+        if not self.listening:
+            self._handle(event)
+            return
+        try:
+            async with self._connection_lock:
+                await self._connection.execute("SELECT pg_notify($1, $2)", SLOT_EVENTS_CHANNEL, json.dumps(event))
+        except Exception:
+            logger.exception("Could not publish slot event, delivering locally")
+            self._handle(event)
+
+    # --- Subscribing ---
+    @asynccontextmanager
+    async def subscribe(self, doctor_id: int, day: date):
+        key = (doctor_id, day)
+        subscriber = Subscriber(doctor_id, day)
+        self._subscribers.setdefault(key, set()).add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            subscribers = self._subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[key]
+
+
+broker = SlotEventBroker()
+
+
+async def notify_in_transaction(db: AsyncSession, event: dict):
+    """
+    Queues an event inside the caller's transaction. On Postgres it is sent by
+    NOTIFY when the transaction commits and dropped if it rolls back; elsewhere
+    the caller delivers it with broker.deliver_local() after committing.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(select(func.pg_notify(SLOT_EVENTS_CHANNEL, json.dumps(event))))
+
+
+async def notify_many_in_transaction(db: AsyncSession, events: List[dict]):
+    """notify_in_transaction() for a batch of events, in a single statement."""
+    if events and db.get_bind().dialect.name == "postgresql":
+        payloads = func.unnest(
+            bindparam("payloads", [json.dumps(event) for event in events], type_=ARRAY(String))
+        ).table_valued("payload").render_derived()
+        await db.execute(select(func.pg_notify(SLOT_EVENTS_CHANNEL, payloads.c.payload)))
+
+
+# --- Server-sent events ---
+def _sse(kind: str, data: dict) -> str:
+    return f"event: {kind}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def _is_booked(doctor_id: int, day: date, session_name: str, timeslot: time) -> bool:
+    async with database.AsyncReadSessionLocal() as db:
+        day_availability = await availability.get_day_availability(db, doctor_id, day)
+    return availability.is_slot_booked(day_availability, session_name, timeslot)
+
+
+async def _snapshot(doctor_id: int, day: date) -> dict:
+    async with database.AsyncReadSessionLocal() as db:
+        day_availability = await availability.get_day_availability(db, doctor_id, day)
+        day_schedule = await schedule.get_day_schedule(db, doctor_id, day)
+    held = await holds.held_slots(doctor_id, day, day_schedule.slots)
+    return availability.with_held_slots(day_availability, held)
+
+
+async def stream(doctor_id: int, day: date):
+    """
+    Yields a 'snapshot' of the doctor's day, then every change as it
+    happens, as server-sent events. Idle streams get a keep-alive comment.
+    """
+    async with broker.subscribe(doctor_id, day) as subscriber:
+        # Subscribed before the snapshot is read, so no change falls in between
+        yield _sse("snapshot", await _snapshot(doctor_id, day))
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), SLOT_EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event["type"] == "resync":
+                subscriber.overflowed = False
+                yield _sse("snapshot", await _snapshot(doctor_id, day))
+            else:
+                yield _sse(event["type"], event)
@@ -0,0 +1,206 @@
+# app/sms_dispatch.py
+"""
+In-process SMS dispatch queue.
+
+Messages are queued and delivered by a fixed number of worker tasks, so the
+gateway never sees more than SMS_DISPATCH_CONCURRENCY requests at a time.
+Transient failures are retried with exponential backoff, and a circuit breaker
+fails messages fast while the gateway is down instead of piling up retries.
+"""
+import asyncio
+import logging
+import random
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from . import notifications
+from .core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+SMS_JOB_HISTORY = 5000  # Finished jobs kept for polling
+
+
+class QueueFullError(Exception):
+    """Raised when the dispatch queue cannot take another message."""
+
+
+class CircuitBreaker:
+    """
+    Opens after 'failure_threshold' consecutive failures and rejects calls for
+    'reset_timeout' seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            # A failed trial re-opens the breaker for another full timeout
+            self.opened_at = time.monotonic()
+
+
+class SmsJob:
+    __slots__ = ("id", "phone_number", "message", "status", "attempts", "detail",
+                 "created_at", "finished_at", "done")
+
+    def __init__(self, phone_number: str, message: str):
+        self.id = uuid.uuid4().hex
+        self.phone_number = phone_number
+        self.message = message
+        self.status = "queued"  # queued -> sending -> sent | failed
+        self.attempts = 0
+        self.detail: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.done = asyncio.Event()
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == "sent"
+
+    def finish(self, status: str, detail: str):
+        self.status = status
+        self.detail = detail
+        self.finished_at = time.time()
+        self.done.set()
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "detail": self.detail,
+        }
+
+
+class SmsDispatcher:
+    def __init__(self):
+        self.breaker: Optional[CircuitBreaker] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._jobs: "OrderedDict[str, SmsJob]" = OrderedDict()
+
+    async def start(self):
+        if self._workers:
+            return
+        settings = get_settings()
+        self.breaker = CircuitBreaker(settings.sms_breaker_failure_threshold, settings.sms_breaker_reset_seconds)
+        self._queue = asyncio.Queue(maxsize=settings.sms_queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"sms-worker-{i}")
+            for i in range(settings.sms_dispatch_concurrency)
+        ]
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await notifications.close_client()
+
+    def submit(self, phone_number: str, message: str) -> SmsJob:
+        """Queues a message and returns its job without waiting for delivery."""
+        if self._queue is None:
+            raise RuntimeError("SMS dispatcher is not running")
+        job = SmsJob(phone_number, message)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError("The SMS queue is full, please try again shortly.")
+        self._remember(job)
+        return job
+
+    async def wait_for(self, jobs, timeout: float):
+        """Waits until every job has finished or the timeout passes."""
+        pending = [job.done.wait() for job in jobs if not job.done.is_set()]
+        if pending:
+            try:
+                await asyncio.wait_for(asyncio.gather(*pending), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def get_job(self, job_id: str) -> Optional[SmsJob]:
+        return self._jobs.get(job_id)
+
+    def _remember(self, job: SmsJob):
+        self._jobs[job.id] = job
+        while len(self._jobs) > SMS_JOB_HISTORY:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if not oldest.done.is_set():
+                break  # Never forget a job that is still in flight
+            del self._jobs[oldest_id]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._deliver(job)
+            except Exception:
+                logger.exception("Unexpected error delivering SMS job %s", job.id)
+                job.finish("failed", "An unexpected error occurred while sending the SMS.")
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, job: SmsJob):
+        settings = get_settings()
+        job.status = "sending"
+        last_error = "Failed to connect to the SMS gateway."
+        for attempt in range(settings.sms_max_retries + 1):
+            if not self.breaker.allow():
+                job.finish("failed", "SMS gateway is unavailable, message not sent.")
+                return
+
+            job.attempts += 1
+            try:
+                success, status_message = await notifications.send_sms_notification(
+                    phone_number=job.phone_number,
+                    message=job.message
+                )
+            except notifications.SmsGatewayError as e:
+                self.breaker.record_failure()
+                last_error = str(e)
+                if attempt < settings.sms_max_retries:
+                    delay = min(settings.sms_backoff_max_seconds, settings.sms_backoff_base_seconds * 2 ** attempt)
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.0))  # Jitter spreads retries
+                continue
+
+            # The gateway answered; a rejection is final and says nothing about its health
+            self.breaker.record_success()
+            job.finish("sent" if success else "failed", status_message)
+            return
+
+        job.finish("failed", last_error)
+
+
+dispatcher = SmsDispatcher()
@@ -0,0 +1,128 @@
+# app/ttl_store.py
+"""
+A small key/value store whose entries expire, used for short-lived state
+such as slot holds.
+
+MemoryTTLStore keeps everything in the worker process and is the default (and
+the local stand-in for tests and single-worker runs). Setting TTL_STORE_URL to
+a redis:// URL shares the state between workers through Redis, which needs the
+optional 'redis' package. Both expose the same async methods.
+"""
+import heapq
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .core.config import get_settings
+
+
+class MemoryTTLStore:
+    """
+    In-process store. Expiry times are also kept in a min-heap, so expired
+    entries are reclaimed in order as time passes without scanning every key.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[str, float]] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+
+    def _purge_expired(self, now: float):
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            entry = self._data.get(key)
+            # The key may have been replaced or deleted since this heap entry was pushed
+            if entry is not None and entry[1] == expires_at:
+                del self._data[key]
+
+    def _live_value(self, key: str, now: float) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= now:
+            return None
+        return entry[0]
+
+    async def set(self, key: str, value: str, ttl_seconds: float, only_if_absent: bool = False) -> bool:
+        """Stores 'value' for 'ttl_seconds'. With only_if_absent, fails if the key is live."""
+        now = time.monotonic()
+        self._purge_expired(now)
+        if only_if_absent and self._live_value(key, now) is not None:
+            return False
+        expires_at = now + ttl_seconds
+        self._data[key] = (value, expires_at)
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+        return True
+
+    async def get(self, key: str) -> Optional[str]:
+        now = time.monotonic()
+        self._purge_expired(now)
+        return self._live_value(key, now)
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        now = time.monotonic()
+        self._purge_expired(now)
+        return [self._live_value(key, now) for key in keys]
+
+    async def delete(self, key: str, expected_value: Optional[str] = None) -> bool:
+        """Deletes a key; with expected_value, only if it still holds that value."""
+        now = time.monotonic()
+        self._purge_expired(now)
+        value = self._live_value(key, now)
+        if value is None or (expected_value is not None and value != expected_value):
+            return False
+        del self._data[key]
+        return True
+
+    async def close(self):
+        self._data.clear()
+        self._expiry_heap.clear()
+
+
+class RedisTTLStore:
+    """Redis-backed store, shared by every worker pointing at the same server."""
+
+    # Delete only if the key still holds the caller's value, atomically
+    _COMPARE_AND_DELETE = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) else return 0 end"
+    )
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError:
+            raise RuntimeError("TTL_STORE_URL points at Redis but the 'redis' package is not installed")
+        self._client = redis_asyncio.from_url(url, decode_responses=True)
+
+    async def set(self, key: str, value: str, ttl_seconds: float, only_if_absent: bool = False) -> bool:
+        stored = await self._client.set(key, value, px=max(1, int(ttl_seconds * 1000)), nx=only_if_absent)
+        return bool(stored)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(key)
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        if not keys:
+            return []
+        return await self._client.mget(keys)
+
+    async def delete(self, key: str, expected_value: Optional[str] = None) -> bool:
+        if expected_value is None:
+            return bool(await self._client.delete(key))
+        return bool(await self._client.eval(self._COMPARE_AND_DELETE, 1, key, expected_value))
+
+    async def close(self):
+        await self._client.aclose()
+
+
+@lru_cache(maxsize=1)
+def get_ttl_store():
+    """The process-wide store, chosen by TTL_STORE_URL."""
+    url = get_settings().ttl_store_url
+    if url:
+        return RedisTTLStore(url)
+    return MemoryTTLStore()
+
+
+async def close_ttl_store():
+    if get_ttl_store.cache_info().currsize:
+        await get_ttl_store().close()
+        get_ttl_store.cache_clear()
@@ -0,0 +1,52 @@
+# app/users.py
+"""
+Phone number to user lookups, cached per worker.
+
+Every booking with patient details starts by finding the patient by phone
+number. Returning patients are answered from a bounded LRU of canonical phone
+number -> (user id, name), so their booking skips the user query entirely.
+
+Only users that were read back from the database are cached, never ones still
+inside an uncommitted transaction. A user's id and phone number do not change
+once written, so other workers' writes cannot make an entry wrong; writes on
+this worker still drop the entries they touch.
+"""
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from .core.config import USER_CACHE_MAX_ENTRIES
+
+_lock = threading.Lock()
+# Canonical phone number -> (user id, name), least recently used first
+_cache: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+
+
+def lookup(phone_number: str) -> Optional[Tuple[int, str]]:
+    """The cached (user id, name) for a phone number, or None."""
+    with _lock:
+        entry = _cache.get(phone_number)
+        if entry is not None:
+            _cache.move_to_end(phone_number)
+        return entry
+
+
+def remember(user_id: int, name: str, phone_number: str):
+    """Caches a user that was read from the database."""
+    with _lock:
+        _cache[phone_number] = (user_id, name)
+        _cache.move_to_end(phone_number)
+        while len(_cache) > USER_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def invalidate(phone_numbers: Iterable[str]):
+    """Drops the entries of users that were just written."""
+    with _lock:
+        for phone_number in phone_numbers:
+            _cache.pop(phone_number, None)
+
+
+def invalidate_all():
+    with _lock:
+        _cache.clear()
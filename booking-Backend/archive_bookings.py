@@ -0,0 +1,283 @@
+# archive_bookings.py
+"""
+Manages the monthly partitions of the bookings table (Postgres only).
+
+    python archive_bookings.py list
+    python archive_bookings.py create-partitions [--from 2025-01] [--months-ahead 3]
+    python archive_bookings.py archive --before 2025-01 [--export-dir DIR] [--format csv|parquet] [--drop]
+
+create-partitions adds the missing months up to --months-ahead past the current
+one, moving their rows out of bookings_default if any landed there. Run it from
+cron (monthly is enough) so new bookings always find their month.
+
+archive takes every month before --before out of the live table. Each month is
+detached, optionally exported to DIR (bookings_2025_01.csv.gz, or .parquet with
+pyarrow installed), and then either attached to archive.bookings, where the
+dashboard can still read it, or dropped with --drop (which requires an export).
+Every month is its own transaction and is recorded in archive.archived_months.
+Detaching briefly locks the bookings table, so run it outside opening hours.
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import re
+import sys
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+# Add app path to allow imports
+sys.path.append('./')
+
+from sqlalchemy import insert, text
+
+from app.archive import archived_months, next_month
+from app.core.config import ARCHIVE_SCHEMA, BOOKING_PARTITION_MONTHS_AHEAD, SLOT_EVENTS_CHANNEL
+from app.database import get_engine
+
+BOOKING_COLUMNS = ["id", "doctor_id", "user_id", "date", "session", "timeslot", "order_number", "turn_number"]
+
+# Rows fetched from the server per round trip while exporting
+EXPORT_BATCH_ROWS = 10000
+
+MONTH_PARTITION = re.compile(r"^bookings_y(\d{4})m(\d{2})$")
+
+
+def _month(value: str) -> date:
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a month (YYYY-MM)")
+
+
+def _partition_name(month: date) -> str:
+    return f"bookings_y{month:%Y}m{month:%m}"
+
+
+def _bounds(month: date) -> str:
+    return f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+
+
+# --- Partitions ---
+def _children(conn, parent: str) -> List[Tuple[str, str]]:
+    """(name, relkind) of the partitions directly under a table."""
+    return conn.execute(text(
+        "SELECT c.relname, c.relkind FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid"
+        " WHERE i.inhparent = CAST(:parent AS regclass) ORDER BY c.relname"
+    ), {"parent": parent}).all()
+
+
+def live_months(conn) -> List[date]:
+    """The months that have a partition in the live bookings table, oldest first."""
+    months = []
+    for name, _ in _children(conn, "bookings"):
+        match = MONTH_PARTITION.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def doctor_partitions(conn) -> int:
+    """Doctor hash sub-partitions per month (set up by the migrations), 0 if none."""
+    for name, relkind in _children(conn, "bookings"):
+        if relkind == "p":
+            return len(_children(conn, name))
+    return 0
+
+
+def create_month(conn, month: date, doctor_sub_partitions: int) -> int:
+    """Creates one month's partition and moves its rows out of the default partition; returns the rows moved."""
+    name = _partition_name(month)
+    in_range = {"start": month, "end": next_month(month)}
+    stray = conn.execute(text(
+        "SELECT count(*) FROM bookings_default WHERE date >= :start AND date < :end"
+    ), in_range).scalar()
+    # The new bounds may not overlap rows the default partition holds
+    if stray:
+        conn.execute(text("ALTER TABLE bookings DETACH PARTITION bookings_default"))
+
+    if doctor_sub_partitions:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF bookings {_bounds(month)} PARTITION BY HASH (doctor_id)"))
+        for remainder in range(doctor_sub_partitions):
+            conn.execute(text(
+                f"CREATE TABLE {name}_p{remainder} PARTITION OF {name} "
+                f"FOR VALUES WITH (MODULUS {doctor_sub_partitions}, REMAINDER {remainder})"
+            ))
+    else:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF bookings {_bounds(month)}"))
+
+    if stray:
+        columns = ", ".join(BOOKING_COLUMNS)
+        conn.execute(text(
+            f"INSERT INTO bookings ({columns}) SELECT {columns} FROM bookings_default"
+            " WHERE date >= :start AND date < :end"
+        ), in_range)
+        conn.execute(text("DELETE FROM bookings_default WHERE date >= :start AND date < :end"), in_range)
+        conn.execute(text("ALTER TABLE bookings ATTACH PARTITION bookings_default DEFAULT"))
+    return stray
+
+
+def create_partitions(engine, first: Optional[date], months_ahead: int):
+    last = date.today().replace(day=1)
+    for _ in range(months_ahead):
+        last = next_month(last)
+
+    with engine.connect() as conn:
+        existing = set(live_months(conn))
+        sub_partitions = doctor_partitions(conn)
+    month = first or (min(existing) if existing else date.today().replace(day=1))
+
+    created = 0
+    while month <= last:
+        if month not in existing:
+            with engine.begin() as conn:
+                moved = create_month(conn, month, sub_partitions)
+            created += 1
+            print(f"Created {_partition_name(month)}" + (f", moved {moved} rows from bookings_default" if moved else ""))
+        month = next_month(month)
+    print(f"{created} partitions created; months through {last:%Y-%m} are partitioned.")
+
+
+# --- Export ---
+def _export_csv(rows, path: str):
+    with gzip.open(path, "wt", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(BOOKING_COLUMNS)
+        for batch in rows:
+            writer.writerows(batch)
+
+
+def _export_parquet(rows, path: str):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int32()), ("doctor_id", pa.int32()), ("user_id", pa.int32()), ("date", pa.date32()),
+        ("session", pa.string()), ("timeslot", pa.time64("us")),
+        ("order_number", pa.int32()), ("turn_number", pa.int32()),
+    ])
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for batch in rows:
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays([pa.array(c, type=f.type) for c, f in zip(columns, schema)],
+                                                    schema=schema))
+
+
+def export_month(conn, table: str, month: date, export_dir: str, file_format: str) -> str:
+    """Streams one detached month to a compressed file and returns its path."""
+    suffix = "parquet" if file_format == "parquet" else "csv.gz"
+    path = os.path.join(export_dir, f"bookings_{month:%Y_%m}.{suffix}")
+    result = conn.execution_options(stream_results=True).execute(text(
+        f"SELECT {', '.join(BOOKING_COLUMNS)} FROM {table} ORDER BY date, doctor_id, turn_number"
+    ))
+    rows = (list(batch) for batch in result.partitions(EXPORT_BATCH_ROWS))
+    if file_format == "parquet":
+        _export_parquet(rows, path)
+    else:
+        _export_csv(rows, path)
+    return path
+
+
+# --- Archive ---
+def archive_month(conn, month: date, export_dir: Optional[str], file_format: str, drop: bool) -> int:
+    name = _partition_name(month)
+    conn.execute(text(f"ALTER TABLE bookings DETACH PARTITION {name}"))
+    row_count = conn.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+    exported_to = export_month(conn, name, month, export_dir, file_format) if export_dir else None
+
+    if drop:
+        conn.execute(text(f"DROP TABLE {name}"))
+        # The month's days now read as empty; clients must not keep their cached copies
+        conn.execute(text(
+            "UPDATE booking_versions SET version = version + 1 WHERE date >= :start AND date < :end"
+        ), {"start": month, "end": next_month(month)})
+    else:
+        for child, _ in _children(conn, name):
+            conn.execute(text(f"ALTER TABLE {child} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        conn.execute(text(
+            f"ALTER TABLE {ARCHIVE_SCHEMA}.bookings ATTACH PARTITION {ARCHIVE_SCHEMA}.{name} {_bounds(month)}"
+        ))
+
+    conn.execute(insert(archived_months).values(
+        month=month, row_count=row_count, exported_to=exported_to, dropped=drop, archived_at=datetime.now()
+    ))
+    return row_count
+
+
+def archive(engine, before: date, export_dir: Optional[str], file_format: str, drop: bool):
+    if before > date.today().replace(day=1):
+        raise SystemExit("Only months before the current one can be archived.")
+    if drop and not export_dir:
+        raise SystemExit("--drop deletes the rows; give an --export-dir to keep a copy.")
+    if file_format == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet export needs pyarrow (pip install pyarrow); use --format csv instead.")
+    if export_dir:
+        os.makedirs(export_dir, exist_ok=True)
+
+    with engine.connect() as conn:
+        months = [month for month in live_months(conn) if month < before]
+    if not months:
+        print(f"No live months before {before:%Y-%m}.")
+        return
+
+    for month in months:
+        with engine.begin() as conn:
+            row_count = archive_month(conn, month, export_dir, file_format, drop)
+        print(f"Archived {month:%Y-%m}: {row_count} bookings" + (", dropped" if drop else ""))
+
+    # Running workers stop looking for these months in the live table
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                     {"channel": SLOT_EVENTS_CHANNEL, "payload": json.dumps({"type": "archive"})})
+
+
+def list_partitions(engine):
+    with engine.connect() as conn:
+        months = live_months(conn)
+        stray = conn.execute(text("SELECT count(*) FROM bookings_default")).scalar()
+        archived = conn.execute(archived_months.select().order_by(archived_months.c.month)).all()
+
+    print("Live months: " + (f"{months[0]:%Y-%m} to {months[-1]:%Y-%m}" if months else "none"))
+    print(f"Rows in bookings_default: {stray}" + (" (run create-partitions)" if stray else ""))
+    for row in archived:
+        where = "dropped" if row.dropped else f"{ARCHIVE_SCHEMA}.{_partition_name(row.month)}"
+        print(f"Archived {row.month:%Y-%m}: {row.row_count} bookings, {where}"
+              + (f", exported to {row.exported_to}" if row.exported_to else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Show live and archived months")
+
+    create = commands.add_parser("create-partitions", help="Add the missing monthly partitions")
+    create.add_argument("--from", dest="first", type=_month, help="First month to cover (default: the oldest one)")
+    create.add_argument("--months-ahead", type=int, default=BOOKING_PARTITION_MONTHS_AHEAD,
+                        help="Months past the current one to create")
+
+    move = commands.add_parser("archive", help="Move old months out of the live table")
+    move.add_argument("--before", type=_month, required=True, help="Archive every month before this one (YYYY-MM)")
+    move.add_argument("--export-dir", help="Write each month to a compressed file in this directory")
+    move.add_argument("--format", dest="file_format", choices=("csv", "parquet"), default="csv")
+    move.add_argument("--drop", action="store_true", help="Drop the months after exporting instead of keeping them")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("Booking partitions need PostgreSQL.")
+
+    if args.command == "list":
+        list_partitions(engine)
+    elif args.command == "create-partitions":
+        create_partitions(engine, args.first, args.months_ahead)
+    else:
+        archive(engine, args.before, args.export_dir, args.file_format, args.drop)
+
+
+if __name__ == "__main__":
+    main()
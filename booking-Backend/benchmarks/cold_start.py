@@ -0,0 +1,91 @@
+# benchmarks/cold_start.py
+"""
+Measures worker cold start: time from a fresh interpreter importing app.main
+to the first request being served (lifespan startup included).
+
+Each run happens in a new subprocess so nothing is warm. Run from the backend
+folder with DATABASE_URL pointing at the database the workers will use:
+
+    python benchmarks/cold_start.py --runs 10
+    python benchmarks/cold_start.py --path /slots/2025-09-01/availability
+
+Set AUTO_CREATE_SCHEMA=false to measure the Alembic-managed startup mode.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(path: str):
+    """Runs inside the subprocess: import, start up, serve one request, report timings."""
+    started = time.perf_counter()
+    sys.path.insert(0, BACKEND_DIR)
+    from app.main import app
+    imported = time.perf_counter()
+
+    from fastapi.testclient import TestClient
+    with TestClient(app) as client:
+        ready = time.perf_counter()
+        response = client.get(path)
+        served = time.perf_counter()
+
+    print(json.dumps({
+        "status": response.status_code,
+        "import_ms": (imported - started) * 1000,
+        "startup_ms": (ready - imported) * 1000,
+        "first_request_ms": (served - ready) * 1000,
+        "total_ms": (served - started) * 1000,
+    }))
+
+
+def summarize(name: str, values):
+    values = sorted(values)
+    return (f"{name:>18}: min {values[0]:8.1f}  median {statistics.median(values):8.1f}"
+            f"  max {values[-1]:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/", help="Request served after startup")
+    parser.add_argument("--output", help="Optional JSON file for the raw results")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.path)
+        return
+
+    results = []
+    for run in range(args.runs):
+        spawned = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "--path", args.path],
+            cwd=BACKEND_DIR, capture_output=True, text=True
+        )
+        wall_ms = (time.perf_counter() - spawned) * 1000
+        if completed.returncode != 0:
+            sys.exit(f"Run {run + 1} failed:\n{completed.stderr}")
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result["process_wall_ms"] = wall_ms
+        results.append(result)
+        if result["status"] >= 400:
+            print(f"warning: run {run + 1} answered HTTP {result['status']}", file=sys.stderr)
+
+    print(f"Cold start over {args.runs} runs (request: GET {args.path})")
+    for key in ("import_ms", "startup_ms", "first_request_ms", "total_ms", "process_wall_ms"):
+        print(summarize(key, [r[key] for r in results]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"path": args.path, "runs": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+# benchmarks/load.py
+"""
+Load and contention benchmark for the booking API.
+
+Runs against the app in-process (default) or a running server (--base-url),
+using the database in DATABASE_URL. Seed it first with benchmarks/seed.py.
+
+    python benchmarks/load.py --clients 50 --requests 1000
+    python benchmarks/load.py --base-url http://127.0.0.1:8000 --token <admin jwt>
+    python benchmarks/load.py --compare benchmarks/results/baseline.json
+
+Scenarios:
+  booking    - POST /bookings/create_with_user, new patients on random slots
+  slots      - GET /slots/{date} for seeded dates
+  dashboard  - GET /admin/dashboard-data with a 30 day trend
+  rush       - hundreds of clients released at once on the first slots of one
+               session, as happens when booking opens at BOOKING_START_TIME
+
+After the run the database is checked for double-booked slots, duplicate order
+numbers, broken turn sequences and drifted counters. Results (throughput and
+latency percentiles per scenario) are written to benchmarks/results/ as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+
+import httpx
+from sqlalchemy import func
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+sys.path.append(BACKEND_DIR)
+
+from app import models
+from app.availability import SESSION_SLOTS
+from app.database import SessionLocal, get_engine
+
+SCENARIOS = ("booking", "slots", "dashboard", "rush")
+
+
+class ScenarioResult:
+    """Latencies and status codes collected for one scenario."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies_ms = []
+        self.statuses = Counter()
+        self.wall_seconds = 0.0
+
+    def record(self, started: float, status):
+        self.latencies_ms.append((time.perf_counter() - started) * 1000)
+        self.statuses[str(status)] += 1
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies_ms)
+        errors = sum(n for status, n in self.statuses.items() if not status.isdigit() or int(status) >= 500)
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "throughput_rps": len(latencies) / self.wall_seconds if self.wall_seconds else 0.0,
+            "p50_ms": percentile(latencies, 50),
+            "p90_ms": percentile(latencies, 90),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": latencies[-1] if latencies else 0.0,
+            "statuses": dict(self.statuses),
+        }
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def timed(result: ScenarioResult, coro):
+    started = time.perf_counter()
+    try:
+        response = await coro
+        result.record(started, response.status_code)
+    except httpx.HTTPError as exc:
+        result.record(started, type(exc).__name__)
+
+
+async def run_workers(result: ScenarioResult, clients: int, total: int, make_request):
+    """Issues 'total' requests from 'clients' concurrent workers."""
+    remaining = iter(range(total))
+
+    async def worker():
+        for index in remaining:
+            await timed(result, make_request(index))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    result.wall_seconds = time.perf_counter() - started
+
+
+def booking_body(index: int, day: date, timeslot) -> dict:
+    return {
+        "name": f"Bench Patient {index}",
+        "phone_number": f"09{random.randrange(10 ** 8):08d}",
+        "date": day.isoformat(),
+        "timeslot": timeslot.isoformat(),
+    }
+
+
+async def scenario_booking(client, args) -> ScenarioResult:
+    result = ScenarioResult("booking")
+    all_slots = [slot for slots in SESSION_SLOTS.values() for slot in slots]
+
+    def request(index):
+        body = booking_body(index, args.date, random.choice(all_slots))
+        return client.post("/bookings/create_with_user", json=body)
+
+    await run_workers(result, args.clients, args.requests, request)
+    return result
+
+
+async def scenario_slots(client, args) -> ScenarioResult:
+    result = ScenarioResult("slots")
+
+    def request(index):
+        day = args.date - timedelta(days=random.randrange(60))
+        return client.get(f"/slots/{day.isoformat()}")
+
+    await run_workers(result, args.clients, args.requests, request)
+    return result
+
+
+async def scenario_dashboard(client, args) -> ScenarioResult:
+    result = ScenarioResult("dashboard")
+    headers = {"Authorization": f"Bearer {args.token}"}
+
+    def request(index):
+        day = args.date - timedelta(days=random.randrange(60))
+        return client.get("/admin/dashboard-data", params={"date": day.isoformat(), "n_days": 30}, headers=headers)
+
+    await run_workers(result, args.clients, args.requests, request)
+    return result
+
+
+async def scenario_rush(client, args) -> ScenarioResult:
+    """Every client waits on one event, then all try the first slots of the session together."""
+    result = ScenarioResult("rush")
+    hot_slots = SESSION_SLOTS[args.rush_session][:args.rush_slots]
+    opened = asyncio.Event()
+
+    async def patient(index):
+        body = booking_body(index, args.rush_date, random.choice(hot_slots))
+        await opened.wait()
+        await timed(result, client.post("/bookings/create_with_user", json=body))
+
+    tasks = [asyncio.create_task(patient(index)) for index in range(args.rush_clients)]
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    opened.set()
+    await asyncio.gather(*tasks)
+    result.wall_seconds = time.perf_counter() - started
+    return result
+
+
+# --- Invariants ---
+def check_invariants(days) -> dict:
+    """Checks the booking tables for states the API must never produce."""
+    db = SessionLocal()
+    try:
+        Booking = models.Booking
+        double_booked = db.query(Booking.doctor_id, Booking.date, Booking.timeslot).group_by(
+            Booking.doctor_id, Booking.date, Booking.timeslot
+        ).having(func.count() > 1).count()
+        duplicate_orders = db.query(Booking.doctor_id, Booking.date, Booking.session, Booking.order_number).group_by(
+            Booking.doctor_id, Booking.date, Booking.session, Booking.order_number
+        ).having(func.count() > 1).count()
+
+        broken_turns, drifted_counters = [], []
+        doctor_ids = [doctor_id for (doctor_id,) in db.query(models.Doctor.id)]
+        for doctor_id, day in ((doctor_id, day) for doctor_id in doctor_ids for day in days):
+            for session_name in SESSION_SLOTS:
+                rows = db.query(Booking.turn_number, Booking.order_number).filter(
+                    Booking.doctor_id == doctor_id, Booking.date == day, Booking.session == session_name
+                ).order_by(Booking.timeslot).all()
+                if [turn for turn, _ in rows] != list(range(1, len(rows) + 1)):
+                    broken_turns.append(f"{doctor_id} {day} {session_name}")
+
+                counter = db.get(models.SessionCounter, (doctor_id, day, session_name))
+                rollup = db.get(models.DailyBookingCount, (doctor_id, day, session_name))
+                max_order = max((order for _, order in rows), default=0)
+                if (counter.last_order_number if counter else 0) < max_order \
+                        or (rollup.booking_count if rollup else 0) != len(rows):
+                    drifted_counters.append(f"{doctor_id} {day} {session_name}")
+    finally:
+        db.close()
+
+    return {
+        "double_booked_slots": double_booked,
+        "duplicate_order_numbers": duplicate_orders,
+        "broken_turn_sequences": broken_turns,
+        "drifted_counters": drifted_counters,
+        "ok": not (double_booked or duplicate_orders or broken_turns or drifted_counters),
+    }
+
+
+# --- Reporting ---
+def print_report(report: dict, baseline: dict = None):
+    print(f"{'scenario':>10} {'reqs':>6} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}  statuses")
+    for name, stats in report["scenarios"].items():
+        line = (f"{name:>10} {stats['requests']:6d} {stats['errors']:5d} {stats['throughput_rps']:9.1f}"
+                f" {stats['p50_ms']:9.1f} {stats['p90_ms']:9.1f} {stats['p99_ms']:9.1f}  {stats['statuses']}")
+        print(line)
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if previous:
+            print(f"{'vs base':>10} {'':6} {'':5} {delta(stats, previous, 'throughput_rps'):>9}"
+                  f" {delta(stats, previous, 'p50_ms'):>9} {'':9} {delta(stats, previous, 'p99_ms'):>9}")
+
+    invariants = report.get("invariants")
+    if invariants:
+        print("Invariants:", "OK" if invariants["ok"] else json.dumps(invariants, indent=2))
+
+
+def delta(current: dict, previous: dict, key: str) -> str:
+    if not previous[key]:
+        return "n/a"
+    return f"{(current[key] - previous[key]) / previous[key] * 100:+.0f}%"
+
+
+@asynccontextmanager
+async def open_client(args):
+    """An HTTP client for a live server, or one wired straight into the app with its lifespan running."""
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+            yield client
+        return
+
+    from app import auth
+    from app.main import app
+    if not args.token:
+        args.token = auth.create_access_token(data={"sub": "benchmark", "role": "admin"})
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+            yield client
+
+
+async def run(args) -> dict:
+    report = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "target": args.base_url or "in-process",
+        "database": get_engine().dialect.name if not args.skip_checks else None,
+        "settings": {
+            "clients": args.clients, "requests": args.requests, "rush_clients": args.rush_clients,
+            "rush_slots": args.rush_slots, "rush_session": args.rush_session, "seed": args.seed,
+        },
+        "scenarios": {},
+    }
+    handlers = {
+        "booking": scenario_booking, "slots": scenario_slots,
+        "dashboard": scenario_dashboard, "rush": scenario_rush,
+    }
+    async with open_client(args) as client:
+        for name in args.scenarios:
+            if name == "dashboard" and not args.token:
+                print("Skipping dashboard: pass --token for a live server", file=sys.stderr)
+                continue
+            result = await handlers[name](client, args)
+            report["scenarios"][name] = result.summary()
+
+    if not args.skip_checks:
+        report["invariants"] = check_invariants([args.date, args.rush_date])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Benchmark a running server instead of the in-process app")
+    parser.add_argument("--token", help="Admin bearer token for the dashboard scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent clients per scenario")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--rush-clients", type=int, default=300)
+    parser.add_argument("--rush-slots", type=int, default=20, help="How many of the first slots the rush fights over")
+    parser.add_argument("--rush-session", choices=list(SESSION_SLOTS), default="morning")
+    parser.add_argument("--date", type=date.fromisoformat, help="Booking date (default: 30 days from today)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-checks", action="store_true", help="Do not read the database afterwards")
+    parser.add_argument("--compare", help="Earlier results file to print deltas against")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    args.date = args.date or date.today() + timedelta(days=30)
+    # The rush gets a day of its own so every slot starts out free
+    args.rush_date = args.date + timedelta(days=1)
+
+    report = asyncio.run(run(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if report.get("invariants") and not report["invariants"]["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
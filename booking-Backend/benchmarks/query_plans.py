@@ -0,0 +1,59 @@
+# benchmarks/query_plans.py
+"""
+Query-plan report for the hot paths in app/crud.py.
+
+Prints, for the database in DATABASE_URL, how many statements each hot crud
+function sends and whether their plans scan or sort. The checks themselves
+live in tests/query_plans.py and run in the test suite
+(tests/test_query_plans.py); this is the same check as a readable report.
+Seed the database first with benchmarks/seed.py and bring it to the latest
+migration.
+
+    python benchmarks/query_plans.py
+    python benchmarks/query_plans.py --verbose
+
+Exits with code 1 when a plan reads a whole table or index, or sorts.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import database
+from tests.query_plans import NotSeededError, check_plans
+
+
+async def run(verbose: bool) -> bool:
+    try:
+        sample, checks = await check_plans(database.get_async_engine())
+    except NotSeededError as e:
+        raise SystemExit(str(e))
+    finally:
+        await database.dispose_engines()
+
+    print(f"Sample: doctor {sample.doctor_id}, {sample.day} {sample.session} {sample.timeslot}")
+    print(f"{'query':>20} {'stmts':>6}  result")
+    for check in checks:
+        print(f"{check.name:>20} {len(check.plans):6d}  "
+              f"{'FAIL: ' + '; '.join(check.problems) if check.problems else 'ok'}")
+        if verbose or check.problems:
+            for statement, plan in check.plans:
+                print("    " + " ".join(statement.split()))
+                print("      " + plan.replace("\n", "\n      "))
+    return not any(check.problems for check in checks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true", help="Print every statement and its plan")
+    args = parser.parse_args()
+
+    ok = asyncio.run(run(args.verbose))
+    print("Query plans: OK" if ok else "Query plans: sequential scans or sorts found on hot paths")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/seed.py
+"""
+Seeds synthetic users and bookings for benchmarking.
+
+    DATABASE_URL=sqlite:///./bench.db python benchmarks/seed.py --months 6 --fill 0.6
+
+Bookings are spread over the given number of months before (and --future-days
+after) today, filling roughly --fill of every session's slots for each of
+--doctors doctors. Order numbers,
+turn numbers, session counters and the daily rollup are written consistently,
+so the API behaves exactly as it would on real data.
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import models
+from app.availability import SESSION_SLOTS
+from app.core.config import DEFAULT_CLINIC_ID, DEFAULT_DOCTOR_ID
+from app.database import Base, SessionLocal, get_engine
+from app.phones import canonical_phone_number
+
+
+def phone_for(index: int) -> str:
+    # Stored in the form the API looks users up by, so seeded patients are found again
+    return canonical_phone_number(f"07{index:08d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months", type=int, default=3, help="Months of history to generate")
+    parser.add_argument("--future-days", type=int, default=14, help="Days after today to pre-book")
+    parser.add_argument("--fill", type=float, default=0.5, help="Share of slots booked per session (0-1)")
+    parser.add_argument("--users", type=int, default=20000, help="Distinct patients")
+    parser.add_argument("--doctors", type=int, default=1, help="Doctors to book, starting with the default one")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed, for reproducible data")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables first")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    engine = get_engine()
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+
+    # 1. Users
+    existing_users = db.query(models.User).count()
+    new_users = [
+        {"name": f"Patient {i}", "phone_number": phone_for(i)}
+        for i in range(existing_users, args.users)
+    ]
+    if new_users:
+        db.bulk_insert_mappings(models.User, new_users)
+        db.commit()
+    user_ids = [user_id for (user_id,) in db.query(models.User.id)]
+    print(f"Users: {len(user_ids)}")
+
+    # 2. Doctors, all at the default clinic
+    if not db.get(models.Clinic, DEFAULT_CLINIC_ID):
+        db.add(models.Clinic(id=DEFAULT_CLINIC_ID, name="Main clinic"))
+        db.flush()
+    doctor_ids = list(range(DEFAULT_DOCTOR_ID, DEFAULT_DOCTOR_ID + args.doctors))
+    for doctor_id in doctor_ids:
+        if not db.get(models.Doctor, doctor_id):
+            db.add(models.Doctor(id=doctor_id, clinic_id=DEFAULT_CLINIC_ID, name=f"Doctor {doctor_id}", active=True))
+    db.commit()
+    print(f"Doctors: {len(doctor_ids)}")
+
+    # 3. Bookings, one doctor-day at a time so memory stays flat
+    today = date.today()
+    start = today - timedelta(days=30 * args.months)
+    end = today + timedelta(days=args.future_days)
+    booked_days = set(db.query(models.Booking.doctor_id, models.Booking.date).distinct())
+
+    total = 0
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    for doctor_id, current in ((doctor_id, day) for doctor_id in doctor_ids for day in days):
+        if (doctor_id, current) in booked_days:
+            continue
+        bookings, counters, rollup = [], [], []
+        for session_name, slots in SESSION_SLOTS.items():
+            chosen = sorted(random.sample(range(len(slots)), int(len(slots) * args.fill)))
+            # Patients book in random order; turns follow the timeslot order
+            order = list(range(1, len(chosen) + 1))
+            random.shuffle(order)
+            for turn, (slot_index, order_number) in enumerate(zip(chosen, order), start=1):
+                bookings.append({
+                    "doctor_id": doctor_id,
+                    "user_id": random.choice(user_ids),
+                    "date": current,
+                    "session": session_name,
+                    "timeslot": slots[slot_index],
+                    "order_number": order_number,
+                    "turn_number": turn,
+                })
+            if chosen:
+                counters.append({"doctor_id": doctor_id, "date": current, "session": session_name,
+                                 "last_order_number": len(chosen)})
+                rollup.append({"doctor_id": doctor_id, "date": current, "session": session_name,
+                               "booking_count": len(chosen)})
+
+        db.bulk_insert_mappings(models.Booking, bookings)
+        db.bulk_insert_mappings(models.SessionCounter, counters)
+        db.bulk_insert_mappings(models.DailyBookingCount, rollup)
+        db.commit()
+        total += len(bookings)
+
+    print(f"Bookings added: {total} ({start} to {end})")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
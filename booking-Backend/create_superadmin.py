@@ -3,7 +3,7 @@ import sys
 # Add app path to allow imports
 sys.path.append('./')
 
-from app.database import SessionLocal, engine
+from app.database import SessionLocal
 from app.models import SuperAdmin
 from app.auth import get_password_hash
 
@@ -0,0 +1,80 @@
+# export_bookings.py
+"""
+Exports bookings with their patients over a date range as CSV or NDJSON.
+
+    python export_bookings.py --start 2025-01-01 --end 2025-03-31
+    python export_bookings.py --start 2025-01-01 --end 2025-12-31 --doctor 2 --format ndjson --output 2025.ndjson.gz
+
+Rows are streamed from a server-side cursor and written batch by batch, so
+memory stays flat for any range. Output goes to stdout unless --output is
+given; a name ending in .gz is gzip-compressed. Archived months are read from
+the archive (see archive_bookings.py).
+"""
+import argparse
+import gzip
+import sys
+from datetime import date
+
+# Add app path to allow imports
+sys.path.append('./')
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import DBAPIError
+
+from app import archive, export
+from app.core.config import EXPORT_BATCH_ROWS
+from app.database import get_engine
+
+
+def _archived_before(conn):
+    if conn.dialect.name != "postgresql":
+        return None
+    try:
+        with conn.begin_nested():
+            newest = conn.execute(select(func.max(archive.archived_months.c.month))).scalar()
+    except DBAPIError:
+        # No archive schema yet
+        return None
+    return archive.next_month(newest) if newest is not None else None
+
+
+def export_bookings(out, start_date: date, end_date: date, doctor_id, file_format: str) -> int:
+    formatter = export.FORMATTERS[file_format]
+    if file_format == "csv":
+        out.write(export.csv_header())
+
+    written = 0
+    with get_engine().connect() as conn:
+        pieces = export.split_by_archive(start_date, end_date, _archived_before(conn))
+        for bookings, start, end in pieces:
+            result = conn.execution_options(yield_per=EXPORT_BATCH_ROWS).execute(
+                export.bookings_query(bookings, start, end, doctor_id)
+            )
+            for rows in result.partitions():
+                out.write(formatter(rows))
+                written += len(rows)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", type=date.fromisoformat, required=True, help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, required=True, help="Last date, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--doctor", type=int, help="Only this doctor's bookings (default: all doctors)")
+    parser.add_argument("--format", dest="file_format", choices=("csv", "ndjson"), default="csv")
+    parser.add_argument("--output", help="File to write (default: stdout); .gz names are compressed")
+    args = parser.parse_args()
+    if args.end < args.start:
+        raise SystemExit("--end must not be before --start.")
+
+    if args.output is None:
+        written = export_bookings(sys.stdout, args.start, args.end, args.doctor, args.file_format)
+    else:
+        opener = gzip.open if args.output.endswith(".gz") else open
+        with opener(args.output, "wt", newline="") as out:
+            written = export_bookings(out, args.start, args.end, args.doctor, args.file_format)
+    print(f"Exported {written} bookings.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# import_bookings.py
+"""
+Books the rows of a CSV file (a paper register, a walk-in list) for one doctor.
+
+    python import_bookings.py register.csv --doctor 2
+
+The file needs a header with name, phone_number, date (YYYY-MM-DD) and
+timeslot (HH:MM) columns. Rows are booked --batch-size at a time, each batch in
+one transaction; a taken slot or a slot off the doctor's schedule is reported
+with its line number and does not stop the import.
+"""
+import argparse
+import asyncio
+import csv
+import sys
+
+# Add app path to allow imports
+sys.path.append('./')
+
+from pydantic import ValidationError
+
+from app import crud, database, schemas
+from app.core.config import BOOKING_IMPORT_MAX_ROWS, DEFAULT_DOCTOR_ID
+
+
+def read_rows(path: str):
+    """Yields (line number, row or None, problem) for every data line of the file."""
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        reader = csv.DictReader(handle)
+        for record in reader:
+            try:
+                yield reader.line_num, schemas.BookingImportRow(**record), None
+            except ValidationError as e:
+                problem = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+                yield reader.line_num, None, problem
+
+
+async def import_file(path: str, doctor_id: int, batch_size: int) -> dict:
+    totals = {"booked": 0, "conflict": 0, "invalid": 0}
+
+    async def flush(batch):
+        async with database.AsyncSessionLocal() as db:
+            results = await crud.import_bookings(db, doctor_id, [row for _, row in batch])
+        for (line, _), result in zip(batch, results):
+            totals[result["status"]] += 1
+            if result["status"] != "booked":
+                print(f"line {line}: {result['status']}: {result['detail']}")
+
+    async with database.AsyncSessionLocal() as db:
+        if await crud.get_doctor(db, doctor_id) is None:
+            raise SystemExit(f"Doctor {doctor_id} not found.")
+
+    batch = []
+    for line, row, problem in read_rows(path):
+        if row is None:
+            totals["invalid"] += 1
+            print(f"line {line}: invalid: {problem}")
+            continue
+        batch.append((line, row))
+        if len(batch) == batch_size:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+
+    await database.dispose_engines()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV file to import")
+    parser.add_argument("--doctor", type=int, default=DEFAULT_DOCTOR_ID, help="Doctor to book the rows with")
+    parser.add_argument("--batch-size", type=int, default=500,
+                        help=f"Rows per transaction (at most {BOOKING_IMPORT_MAX_ROWS})")
+    args = parser.parse_args()
+    if not 1 <= args.batch_size <= BOOKING_IMPORT_MAX_ROWS:
+        raise SystemExit(f"--batch-size must be between 1 and {BOOKING_IMPORT_MAX_ROWS}.")
+
+    totals = asyncio.run(import_file(args.path, args.doctor, args.batch_size))
+    print(f"Booked {totals['booked']}, conflicts {totals['conflict']}, invalid {totals['invalid']}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# sms_stub_gateway.py
+"""
+Local stand-in for the Text.lk HTTP API, for tests and load runs.
+
+    uvicorn sms_stub_gateway:app --port 9000
+
+Then point the backend at it in .env:
+
+    TEXTLK_API_URL="http://127.0.0.1:9000/api/http/sms/send"
+    TEXTLK_API_TOKEN="stub"
+    TEXTLK_SENDER_ID="stub"
+
+The gateway's behaviour can be switched at runtime with POST /_stub/mode:
+  ok     - every message succeeds (default)
+  down   - every request returns HTTP 503
+  flaky  - a share of requests (failure_rate) returns HTTP 503
+  reject - every message is refused with status "error"
+A fixed latency can be added with ?latency_ms=.
+"""
+import asyncio
+import random
+from typing import Literal
+
+from fastapi import FastAPI, HTTPException
+
+app = FastAPI(title="Text.lk Stub Gateway")
+
+state = {
+    "mode": "ok",
+    "failure_rate": 0.5,
+    "latency_ms": 0,
+    "messages": [],
+}
+
+
+@app.get("/api/http/sms/send")
+async def send_sms(recipient: str, sender_id: str, message: str, api_token: str):
+    if state["latency_ms"]:
+        await asyncio.sleep(state["latency_ms"] / 1000)
+
+    mode = state["mode"]
+    if mode == "down" or (mode == "flaky" and random.random() < state["failure_rate"]):
+        raise HTTPException(status_code=503, detail="Gateway unavailable")
+    if mode == "reject":
+        return {"status": "error", "message": "Invalid recipient"}
+
+    state["messages"].append({"recipient": recipient, "sender_id": sender_id, "message": message})
+    return {"status": "success", "message": "Your message was successfully delivered"}
+
+
+@app.post("/_stub/mode")
+async def set_mode(
+    mode: Literal["ok", "down", "flaky", "reject"],
+    failure_rate: float = 0.5,
+    latency_ms: int = 0
+):
+    state.update(mode=mode, failure_rate=failure_rate, latency_ms=latency_ms)
+    return {"mode": mode, "failure_rate": failure_rate, "latency_ms": latency_ms}
+
+
+@app.get("/_stub/messages")
+async def list_messages():
+    """Messages accepted so far, in arrival order."""
+    return state["messages"]
+
+
+@app.delete("/_stub/messages")
+async def clear_messages():
+    state["messages"].clear()
+    return {"ok": True}
@@ -0,0 +1,67 @@
+# tests/conftest.py
+"""
+Runs the app on a throwaway SQLite database (aiosqlite) through TestClient.
+The settings are read once per process, so the environment is set before
+anything from the app is imported.
+"""
+import os
+import tempfile
+from datetime import date, datetime, time, timedelta
+
+# The query-plan tests use the (seeded, Postgres) database the suite was started with
+QUERY_PLANS_DATABASE_URL = os.environ.get("DATABASE_URL", "")
+
+_db_dir = tempfile.mkdtemp(prefix="booking-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+# The cheapest bcrypt cost keeps login tests fast; test_login relies on it
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import auth
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def admin_headers():
+    token = auth.create_access_token({"sub": "test-admin", "role": "admin"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def open_day(client, after: date) -> date:
+    """The first day after 'after' with at least one session."""
+    day = after + timedelta(days=1)
+    while not client.get(f"/slots/{day}/availability").json()["sessions"]:
+        day += timedelta(days=1)
+    return day
+
+
+def free_slot(client, day: date) -> time:
+    """The first free slot of a day's first session."""
+    session = client.get(f"/slots/{day}/availability").json()["sessions"][0]
+    start = datetime.combine(day, time.fromisoformat(session["start"]))
+    return (start + timedelta(minutes=5 * session["bitmap"].index("0"))).time()
+
+
+@pytest.fixture(scope="session")
+def booked_day(client):
+    """The first open day from tomorrow on, with a few bookings of different patients."""
+    day = open_day(client, date.today())
+    for i in range(3):
+        booking = {
+            "date": day.isoformat(),
+            "timeslot": free_slot(client, day).isoformat(),
+            "name": f"Patient {i}",
+            "phone_number": f"07712345{i:02d}",
+        }
+        assert client.post("/bookings/create_with_user", json=booking).status_code == 201
+    return day
@@ -0,0 +1,175 @@
+"""
+Query-plan checks for the hot paths in app/crud.py, shared by
+tests/test_query_plans.py and the benchmarks/query_plans.py report.
+
+Each hot crud function is run against a seeded database at the latest
+migration, the SQL it sends is recorded and every statement is EXPLAINed. A
+plan fails when it reads a whole table or index, or sorts. On Postgres the
+plans are made with enable_seqscan and enable_sort off, so a scan or sort
+that still shows up has no index that avoids it, however small the seeded
+tables are. On SQLite 'SCAN <table>' and 'USE TEMP B-TREE' entries fail.
+
+Writes run inside a transaction that is rolled back, so the database is left
+as it was.
+"""
+import json
+from datetime import date, time, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app import crud, models, schedule, schemas
+from app.core.config import DEFAULT_DOCTOR_ID
+
+PG_PROBLEM_NODES = ("Seq Scan", "Sort", "Incremental Sort")
+
+
+class Sample:
+    """Real values from the seeded database for the queries to look up."""
+
+    def __init__(self, doctor_id: int, day: date, session: str, timeslot: time,
+                 free_timeslot, user_id: int, phone_number: str):
+        self.doctor_id = doctor_id
+        self.day = day
+        self.session = session
+        self.timeslot = timeslot
+        self.free_timeslot = free_timeslot
+        self.user_id = user_id
+        self.phone_number = phone_number
+
+
+class PlanCheck:
+    """The statements one case sent, their plans, and the problems found in them."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.plans: List[Tuple[str, str]] = []
+        self.problems: List[str] = []
+
+
+async def _create_booking(db, sample: Sample):
+    if sample.free_timeslot is None:
+        return
+    booking = schemas.BookingCreate(
+        doctor_id=sample.doctor_id, date=sample.day, timeslot=sample.free_timeslot, user_id=sample.user_id
+    )
+    await crud.create_booking(db, booking)
+
+
+# Name -> coroutine running the crud function the way the endpoints do
+CASES = {
+    "user by phone": lambda db, s: crud.get_user_by_phone(db, s.phone_number),
+    "slot lookup": lambda db, s: crud.get_booking_by_slot(db, s.doctor_id, s.day, s.timeslot),
+    "day bookings": lambda db, s: crud.get_bookings_with_users_for_date(db, s.doctor_id, s.day),
+    "dashboard bookings": lambda db, s: crud.get_bookings_for_date(db, s.doctor_id, s.day),
+    "dashboard counts": lambda db, s: crud.get_session_counts_for_date(db, s.doctor_id, s.day),
+    "booking trend": lambda db, s: crud.get_booking_counts_for_last_n_days(db, s.doctor_id, 30),
+    "range availability": lambda db, s: crud.get_booking_counts_by_session(
+        db, s.doctor_id, s.day, s.day + timedelta(days=30)),
+    "turn reminders": lambda db, s: crud.get_bookings_for_turns(db, s.doctor_id, s.day, s.session, 1, 10),
+    "renumber session": lambda db, s: crud.renumber_session_turns(db, s.doctor_id, s.day, s.session),
+    "create booking": _create_booking,
+}
+
+
+class NotSeededError(Exception):
+    """Raised when the database has no bookings to take the sample from."""
+
+
+async def find_sample(db: AsyncSession) -> Sample:
+    """Picks the busiest seeded day of the default doctor."""
+    day = (await db.execute(
+        select(models.Booking.date).where(models.Booking.doctor_id == DEFAULT_DOCTOR_ID)
+        .group_by(models.Booking.date).order_by(func.count().desc()).limit(1)
+    )).scalar()
+    if day is None:
+        raise NotSeededError("No bookings found. Seed the database first with benchmarks/seed.py.")
+    booking = (await db.execute(
+        select(models.Booking).where(models.Booking.doctor_id == DEFAULT_DOCTOR_ID, models.Booking.date == day)
+        .limit(1)
+    )).scalars().first()
+    user = await db.get(models.User, booking.user_id)
+
+    day_schedule = await schedule.get_day_schedule(db, DEFAULT_DOCTOR_ID, day)
+    booked = set((await db.execute(
+        select(models.Booking.timeslot).where(models.Booking.doctor_id == DEFAULT_DOCTOR_ID, models.Booking.date == day)
+    )).scalars().all())
+    free = next((slot for slots in day_schedule.slots.values() for slot in slots if slot not in booked), None)
+
+    return Sample(DEFAULT_DOCTOR_ID, day, booking.session, booking.timeslot, free, user.id, user.phone_number)
+
+
+async def explain(conn, dialect: str, statement: str, parameters) -> Tuple[List[str], str]:
+    """Returns the problems found in the plan of one statement, and the plan itself."""
+    if dialect == "postgresql":
+        result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = result.scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        problems = []
+
+        def walk(node):
+            if node["Node Type"] in PG_PROBLEM_NODES:
+                problems.append(f"{node['Node Type']} {node.get('Relation Name', '')}".strip())
+            for child in node.get("Plans", ()):
+                walk(child)
+
+        walk(plan[0]["Plan"])
+        return problems, json.dumps(plan[0]["Plan"], indent=2)
+
+    result = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+    details = [row[-1] for row in result.all()]
+    problems = [detail for detail in details if _scans_a_table(detail) or "USE TEMP B-TREE" in detail]
+    return problems, "\n".join(details)
+
+
+def _scans_a_table(detail: str) -> bool:
+    """A SQLite 'SCAN <table>' entry; scans of subqueries and constant rows read no table."""
+    words = detail.split()
+    return len(words) > 1 and words[0] == "SCAN" and words[1] in models.Base.metadata.tables
+
+
+async def check_plans(engine: AsyncEngine) -> Tuple[Sample, List[PlanCheck]]:
+    """Runs every case against the engine's database and checks the plans of what it sent."""
+    dialect = engine.dialect.name
+    captured = []
+    capturing = [False]
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if capturing[0] and statement.lstrip().upper().startswith(("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")):
+            captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    checks = []
+    try:
+        async with engine.connect() as conn:
+            transaction = await conn.begin()
+            if dialect == "postgresql":
+                await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+                await conn.exec_driver_sql("SET LOCAL enable_sort = off")
+
+            async with AsyncSession(bind=conn, join_transaction_mode="create_savepoint") as db:
+                sample = await find_sample(db)
+
+            for name, case in CASES.items():
+                captured.clear()
+                capturing[0] = True
+                try:
+                    # Savepoints stand in for the commits the crud functions make
+                    async with AsyncSession(bind=conn, join_transaction_mode="create_savepoint",
+                                            expire_on_commit=False) as db:
+                        await case(db, sample)
+                finally:
+                    capturing[0] = False
+
+                check = PlanCheck(name)
+                for statement, parameters in captured:
+                    problems, plan = await explain(conn, dialect, statement, parameters)
+                    check.problems.extend(problems)
+                    check.plans.append((statement, plan))
+                checks.append(check)
+
+            await transaction.rollback()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+    return sample, checks
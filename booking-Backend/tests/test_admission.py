@@ -0,0 +1,113 @@
+"""
+The booking gate: a fixed number of booking transactions at a time, the rest
+admitted in arrival order, and requests beyond the queue turned away.
+"""
+import asyncio
+
+import pytest
+
+from app import admission
+from app.admission import AdmissionGate, AdmissionRejectedError
+
+from .conftest import free_slot, open_day
+
+
+async def _queue_behind_holder(gate: AdmissionGate, waiters: int):
+    """Holds the gate's only turn and queues 'waiters' requests behind it, in order."""
+    holder_release = asyncio.Event()
+    admitted = []
+
+    async def holder():
+        async with gate.admit():
+            await holder_release.wait()
+
+    async def waiter(i):
+        async with gate.admit():
+            admitted.append(i)
+            await asyncio.sleep(0)
+
+    tasks = [asyncio.create_task(holder())]
+    await asyncio.sleep(0)
+    for i in range(waiters):
+        tasks.append(asyncio.create_task(waiter(i)))
+        await asyncio.sleep(0)
+    return holder_release, admitted, tasks
+
+
+def test_waiters_are_admitted_in_arrival_order():
+    async def run():
+        gate = AdmissionGate(max_active=1, max_waiting=10, max_wait_seconds=5)
+        release, admitted, tasks = await _queue_behind_holder(gate, 5)
+        assert gate.status()["waiting"] == 5
+        release.set()
+        await asyncio.gather(*tasks)
+        return admitted, gate.status()
+
+    admitted, status = asyncio.run(run())
+    assert admitted == [0, 1, 2, 3, 4]
+    assert status["active"] == 0 and status["waiting"] == 0
+
+
+def test_requests_beyond_the_queue_are_rejected():
+    async def run():
+        gate = AdmissionGate(max_active=1, max_waiting=2, max_wait_seconds=5)
+        release, admitted, tasks = await _queue_behind_holder(gate, 2)
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            async with gate.admit():
+                pass
+        release.set()
+        await asyncio.gather(*tasks)
+        return rejected.value, admitted
+
+    rejected, admitted = asyncio.run(run())
+    assert rejected.queue_position == 3
+    assert rejected.estimated_wait_seconds > 0
+    # The queued requests still get their turns
+    assert admitted == [0, 1]
+
+
+def test_waiter_that_times_out_gives_up_its_place():
+    async def run():
+        gate = AdmissionGate(max_active=1, max_waiting=5, max_wait_seconds=0.05)
+        release, admitted, tasks = await _queue_behind_holder(gate, 1)
+        results = await asyncio.gather(tasks[1], return_exceptions=True)
+        waiting_after_timeout = gate.status()["waiting"]
+        release.set()
+        await tasks[0]
+        # The turn was not handed to the request that left
+        async with gate.admit():
+            pass
+        return results, waiting_after_timeout, gate.status()
+
+    results, waiting_after_timeout, status = asyncio.run(run())
+    assert isinstance(results[0], AdmissionRejectedError)
+    assert waiting_after_timeout == 0
+    assert status["active"] == 0
+
+
+def test_cancelled_waiter_passes_its_turn_on():
+    async def run():
+        gate = AdmissionGate(max_active=1, max_waiting=5, max_wait_seconds=5)
+        release, admitted, tasks = await _queue_behind_holder(gate, 3)
+        tasks[1].cancel()
+        release.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return admitted, gate.status()
+
+    admitted, status = asyncio.run(run())
+    assert admitted == [1, 2]
+    assert status["active"] == 0
+
+
+def test_full_gate_answers_503_with_retry_after(client, booked_day, monkeypatch):
+    day = open_day(client, booked_day)
+    # Its only turn is taken and nobody may queue for it
+    gate = AdmissionGate(max_active=1, max_waiting=0, max_wait_seconds=1)
+    gate._active = 1
+    monkeypatch.setattr(admission, "get_booking_gate", lambda: gate)
+    booking = {"date": day.isoformat(), "timeslot": free_slot(client, day).isoformat(),
+               "name": "Turned away", "phone_number": "0776660000"}
+    response = client.post("/bookings/create_with_user", json=booking)
+    assert response.status_code == 503
+    assert response.json()["detail"]["queue_position"] == 1
+    assert int(response.headers["Retry-After"]) >= 1
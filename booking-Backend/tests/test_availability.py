@@ -0,0 +1,60 @@
+"""Free and total slot counts for a range of dates, as the booking calendar loads them."""
+from datetime import date, timedelta
+
+from app.core.config import AVAILABILITY_MAX_RANGE_DAYS
+
+
+def _range(client, start: date, end: date, **headers):
+    return client.get("/availability", params={"start_date": start.isoformat(), "end_date": end.isoformat()},
+                      headers=headers)
+
+
+def test_range_matches_the_day_bitmaps(client, booked_day):
+    start = booked_day - timedelta(days=2)
+    end = booked_day + timedelta(days=4)
+    response = _range(client, start, end)
+    assert response.status_code == 200
+    days = response.json()["days"]
+    assert [d["date"] for d in days] == [(start + timedelta(days=i)).isoformat() for i in range(7)]
+
+    for day in days:
+        bitmaps = {s["session"]: s["bitmap"]
+                   for s in client.get(f"/slots/{day['date']}/availability").json()["sessions"]}
+        assert {s["session"]: (s["total"], s["free"]) for s in day["sessions"]} == {
+            session: (len(bitmap), bitmap.count("0")) for session, bitmap in bitmaps.items()
+        }
+    booked = next(d for d in days if d["date"] == booked_day.isoformat())
+    assert sum(s["total"] - s["free"] for s in booked["sessions"]) >= 3
+
+
+def test_range_of_the_maximum_length(client):
+    start = date.today()
+    response = _range(client, start, start + timedelta(days=AVAILABILITY_MAX_RANGE_DAYS - 1))
+    assert response.status_code == 200
+    assert len(response.json()["days"]) == AVAILABILITY_MAX_RANGE_DAYS
+
+
+def test_range_too_long_is_refused(client):
+    start = date.today()
+    response = _range(client, start, start + timedelta(days=AVAILABILITY_MAX_RANGE_DAYS))
+    assert response.status_code == 400
+    assert str(AVAILABILITY_MAX_RANGE_DAYS) in response.json()["detail"]
+
+
+def test_range_ending_before_it_starts_is_refused(client):
+    start = date.today()
+    assert _range(client, start, start - timedelta(days=1)).status_code == 400
+
+
+def test_unknown_doctor(client):
+    start = date.today()
+    response = client.get("/availability", params={"start_date": start.isoformat(),
+                                                   "end_date": start.isoformat(), "doctor_id": 9999})
+    assert response.status_code == 404
+
+
+def test_unchanged_range_is_not_modified(client, booked_day):
+    first = _range(client, booked_day, booked_day + timedelta(days=6))
+    again = _range(client, booked_day, booked_day + timedelta(days=6), **{"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.content == b""
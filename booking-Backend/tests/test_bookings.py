@@ -0,0 +1,101 @@
+"""
+Concurrent bookings of one doctor's session: order numbers come from the
+session counter, turns from the slot's position, and a taken slot is refused
+without leaving the counter or the daily rollup ahead of the bookings.
+"""
+import asyncio
+import os
+import random
+from datetime import datetime, time, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import crud, database, models, schemas
+from app.core.config import DEFAULT_DOCTOR_ID
+
+from .conftest import open_day
+
+BOOKINGS = 12
+
+
+@pytest.fixture(scope="module")
+def session_day(client, booked_day):
+    """A day none of the other tests book, with its first session's name and free slots."""
+    day = booked_day
+    for _ in range(4):
+        day = open_day(client, day)
+    session = client.get(f"/slots/{day}/availability").json()["sessions"][0]
+    start = datetime.combine(day, time.fromisoformat(session["start"]))
+    slots = [(start + timedelta(minutes=5 * i)).time() for i, bit in enumerate(session["bitmap"]) if bit == "0"]
+    assert len(slots) >= BOOKINGS
+    return day, session["session"], slots[:BOOKINGS]
+
+
+async def _book_concurrently(day, timeslots):
+    """Books every timeslot at once, each in its own session; returns the results or errors in order."""
+    engine = create_async_engine(database._to_async_url(os.environ["DATABASE_URL"]))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with sessions() as db:
+            patients = [models.User(name=f"Rush patient {i}", phone_number=f"9477100{i:04d}")
+                        for i in range(len(timeslots))]
+            db.add_all(patients)
+            await db.commit()
+
+        async def book(user, timeslot):
+            async with sessions() as db:
+                booking = schemas.BookingCreate(doctor_id=DEFAULT_DOCTOR_ID, date=day, timeslot=timeslot,
+                                                user_id=user.id)
+                return await crud.create_booking(db, booking)
+
+        return await asyncio.gather(*(book(user, timeslot) for user, timeslot in zip(patients, timeslots)),
+                                    return_exceptions=True)
+    finally:
+        await engine.dispose()
+
+
+async def _session_state(day, session_name):
+    engine = create_async_engine(database._to_async_url(os.environ["DATABASE_URL"]))
+    try:
+        async with async_sessionmaker(engine)() as db:
+            key = (models.SessionCounter.doctor_id == DEFAULT_DOCTOR_ID, models.SessionCounter.date == day,
+                   models.SessionCounter.session == session_name)
+            counter = (await db.execute(select(models.SessionCounter.last_order_number).where(*key))).scalar_one()
+            rollup = (await db.execute(select(models.DailyBookingCount.booking_count).where(
+                models.DailyBookingCount.doctor_id == DEFAULT_DOCTOR_ID, models.DailyBookingCount.date == day,
+                models.DailyBookingCount.session == session_name
+            ))).scalar_one()
+            bookings = (await db.execute(
+                select(models.Booking.timeslot, models.Booking.order_number, models.Booking.turn_number).where(
+                    models.Booking.doctor_id == DEFAULT_DOCTOR_ID, models.Booking.date == day,
+                    models.Booking.session == session_name
+                ).order_by(models.Booking.timeslot)
+            )).all()
+            return counter, rollup, bookings
+    finally:
+        await engine.dispose()
+
+
+def test_concurrent_bookings_of_one_session(session_day):
+    day, session_name, slots = session_day
+    # Out of timeslot order, so later slots are booked first and their turns shift;
+    # the last slot is requested twice and only one of the two can win
+    timeslots = random.Random(7).sample(slots, len(slots)) + [slots[-1]]
+
+    results = asyncio.run(_book_concurrently(day, timeslots))
+
+    errors = [r for r in results if isinstance(r, Exception)]
+    assert len(errors) == 1
+    assert isinstance(errors[0], crud.SlotAlreadyBookedError)
+    assert all(r.session == session_name for r in results if not isinstance(r, Exception))
+
+    counter, rollup, bookings = asyncio.run(_session_state(day, session_name))
+    assert [timeslot for timeslot, _, _ in bookings] == slots
+    # Order numbers are unique and the loser's reservation was rolled back with it
+    assert sorted(order for _, order, _ in bookings) == list(range(1, len(slots) + 1))
+    assert counter == len(slots)
+    assert rollup == len(slots)
+    # Turns follow the timeslots with no gaps
+    assert [turn for _, _, turn in bookings] == list(range(1, len(slots) + 1))
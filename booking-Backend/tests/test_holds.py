@@ -0,0 +1,124 @@
+# tests/test_holds.py
+"""
+Expired holds are announced as 'freed' by the worker that created them, so
+live booking pages do not keep showing an abandoned hold as taken. A hold is
+confirmed only while its slot is still bookable.
+"""
+import asyncio
+import heapq
+import time as clock
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import holds, main, slot_events
+from app.ttl_store import get_ttl_store
+
+from .conftest import free_slot, open_day
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Every slot event the app publishes while the test runs."""
+    events = []
+
+    async def record(event):
+        events.append(event)
+
+    monkeypatch.setattr(slot_events.broker, "publish", record)
+    return events
+
+
+@pytest.fixture(scope="module")
+def hold_day(client, booked_day):
+    return open_day(client, booked_day)
+
+
+def _hold(client, day: date) -> dict:
+    response = client.post("/holds", json={"date": day.isoformat(), "timeslot": free_slot(client, day).isoformat()})
+    assert response.status_code == 201
+    return response.json()
+
+
+def _lapse(hold: dict):
+    """Drops the hold's slot key as its TTL would, without the sweep noticing yet."""
+    slot_key = holds._slot_key(hold["doctor_id"], date.fromisoformat(hold["date"]),
+                               datetime.strptime(hold["timeslot"], "%H:%M:%S").time())
+    asyncio.run(get_ttl_store().delete(slot_key))
+
+
+def _make_due(hold: dict):
+    """Makes the next sweep look at the hold instead of after SLOT_HOLD_SECONDS."""
+    heapq.heappush(holds._expiring, (datetime.now(), hold["hold_id"]))
+
+
+def _freed(events, hold: dict, wait: float = 3.0) -> list:
+    deadline = clock.monotonic() + wait
+    timeslot = hold["timeslot"][:5]
+    while True:
+        matches = [e for e in events if e["type"] == "freed" and e["timeslot"] == timeslot]
+        if matches or clock.monotonic() > deadline:
+            return matches
+        clock.sleep(0.1)
+
+
+def test_held_event_carries_the_expiry(client, hold_day, published):
+    hold = _hold(client, hold_day)
+    held = next(e for e in published if e["type"] == "held")
+    assert held["expires_in_seconds"] == hold["expires_in_seconds"]
+    assert held["expires_at"]
+
+
+def test_expired_hold_is_freed(client, hold_day, published):
+    hold = _hold(client, hold_day)
+    _lapse(hold)
+    _make_due(hold)
+    assert len(_freed(published, hold)) == 1
+
+
+def test_released_hold_is_freed_once(client, hold_day, published):
+    hold = _hold(client, hold_day)
+    assert client.delete(f"/holds/{hold['hold_id']}").status_code == 204
+    _make_due(hold)
+    assert len(_freed(published, hold, wait=2.5)) == 1
+
+
+def test_expired_hold_booked_meanwhile_is_not_freed(client, hold_day, published):
+    # As if another worker confirmed it: booked, and the slot key gone
+    hold = _hold(client, hold_day)
+    _lapse(hold)
+    booking = {"date": hold["date"], "timeslot": hold["timeslot"], "name": "Walk-in", "phone_number": "0775550000"}
+    assert client.post("/bookings/create_with_user", json=booking).status_code == 201
+    _make_due(hold)
+    assert _freed(published, hold, wait=2.5) == []
+
+
+def _confirm(client, hold: dict, **headers):
+    patient = {"name": "Held patient", "phone_number": "0775550001"}
+    return client.post(f"/holds/{hold['hold_id']}/confirm", json=patient, headers=headers)
+
+
+def test_hold_is_not_confirmed_after_its_slot_started(client, hold_day, monkeypatch):
+    hold = _hold(client, hold_day)
+    started = datetime.combine(hold_day, datetime.strptime(hold["timeslot"], "%H:%M:%S").time()) + timedelta(minutes=1)
+
+    class SlotStarted(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return started
+
+    monkeypatch.setattr(main, "datetime", SlotStarted)
+    response = _confirm(client, hold)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cannot book a time slot that has already passed today."
+
+
+def test_slot_closed_while_confirming_is_a_conflict(client, hold_day, monkeypatch):
+    hold = _hold(client, hold_day)
+
+    async def not_on_schedule(db, booking):
+        return None
+
+    monkeypatch.setattr(main.crud, "create_booking", not_on_schedule)
+    response = _confirm(client, hold, **{"Idempotency-Key": "closed-while-confirming"})
+    assert response.status_code == 409
@@ -0,0 +1,83 @@
+"""ETags and 304 Not Modified on the slot and dashboard reads."""
+import pytest
+from starlette.requests import Request
+
+from app import http_cache
+
+from .conftest import free_slot, open_day
+
+
+def _request(if_none_match=None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest.fixture(scope="module")
+def day(client, booked_day):
+    return open_day(client, open_day(client, open_day(client, booked_day)))
+
+
+def _book(client, day):
+    booking = {"date": day.isoformat(), "timeslot": free_slot(client, day).isoformat(),
+               "name": "Cached patient", "phone_number": "0778880000"}
+    assert client.post("/bookings/create_with_user", json=booking).status_code == 201
+
+
+def test_etag_is_weak_and_independent_of_key_order():
+    etag = http_cache.etag_for({"a": 1, "b": [2, 3]})
+    assert etag.startswith('W/"')
+    assert etag == http_cache.etag_for({"b": [2, 3], "a": 1})
+    assert etag != http_cache.etag_for({"a": 1, "b": [3, 2]})
+
+
+@pytest.mark.parametrize("if_none_match, matches", [
+    (None, False),
+    ('W/"other"', False),
+    ('W/"other", W/"current"', True),
+    ('W/"current"', True),
+    ("*", True),
+])
+def test_if_none_match(if_none_match, matches):
+    assert http_cache.is_not_modified(_request(if_none_match), 'W/"current"') is matches
+
+
+def test_day_bookings_not_modified_until_booked(client, day):
+    first = client.get(f"/slots/{day}")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    again = client.get(f"/slots/{day}", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.content == b""
+
+    _book(client, day)
+    after = client.get(f"/slots/{day}", headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
+    assert len(after.json()) == len(first.json()) + 1
+
+
+def test_dashboard_not_modified_until_booked(client, admin_headers, day):
+    params = {"date": day.isoformat()}
+    first = client.get("/admin/dashboard-data", params=params, headers=admin_headers)
+    etag = first.headers["ETag"]
+    again = client.get("/admin/dashboard-data", params=params, headers={**admin_headers, "If-None-Match": etag})
+    assert again.status_code == 304
+
+    _book(client, day)
+    after = client.get("/admin/dashboard-data", params=params, headers={**admin_headers, "If-None-Match": etag})
+    assert after.status_code == 200
+    assert len(after.json()["bookings"]) == len(first.json()["bookings"]) + 1
+
+
+def test_hold_changes_the_availability_etag(client, day):
+    path = f"/slots/{day}/availability"
+    etag = client.get(path).headers["ETag"]
+    response = client.post("/holds", json={"date": day.isoformat(), "timeslot": free_slot(client, day).isoformat()})
+    assert response.status_code == 201
+
+    held = client.get(path, headers={"If-None-Match": etag})
+    assert held.status_code == 200
+    assert client.delete(f"/holds/{response.json()['hold_id']}").status_code == 204
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
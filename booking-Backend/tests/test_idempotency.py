@@ -0,0 +1,87 @@
+"""
+Retries of the booking POSTs with an Idempotency-Key: replayed, refused when
+the key is reused for another request, and 409 while the first still runs.
+"""
+import asyncio
+import hashlib
+import json
+import time as clock
+
+import pytest
+
+from app import idempotency
+from app.ttl_store import get_ttl_store
+
+from .conftest import free_slot, open_day
+
+PATH = "/bookings/create_with_user"
+
+
+@pytest.fixture(scope="module")
+def day(client, booked_day):
+    return open_day(client, booked_day)
+
+
+def _body(client, day, phone_number: str) -> bytes:
+    return json.dumps({"date": day.isoformat(), "timeslot": free_slot(client, day).isoformat(),
+                       "name": "Retrying patient", "phone_number": phone_number}).encode()
+
+
+def _post(client, body: bytes, key: str):
+    return client.post(PATH, content=body, headers={"Idempotency-Key": key, "Content-Type": "application/json"})
+
+
+def test_retry_replays_the_first_response(client, day):
+    body = _body(client, day, "0771110001")
+    first = _post(client, body, "replay-key")
+    assert first.status_code == 201
+    assert first.headers["Location"] == f"/bookings/{first.json()['id']}/position"
+
+    retry = _post(client, body, "replay-key")
+    assert retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.headers["Location"] == first.headers["Location"]
+    assert len([b for b in client.get(f"/slots/{day}").json() if b["id"] == first.json()["id"]]) == 1
+
+
+def test_key_reused_for_another_request_is_refused(client, day):
+    assert _post(client, _body(client, day, "0771110002"), "reused-key").status_code == 201
+    response = _post(client, _body(client, day, "0771110003"), "reused-key")
+    assert response.status_code == 422
+
+
+def test_duplicate_of_a_pending_request_gets_409(client, day, monkeypatch):
+    # As if the first request were still running on another worker
+    body = _body(client, day, "0771110004")
+    pending = json.dumps({"state": "pending", "fingerprint": hashlib.sha256(body).hexdigest()})
+    asyncio.run(get_ttl_store().set(f"idem:POST:{PATH}:pending-key", pending, 30))
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_SECONDS", 0.3)
+
+    response = _post(client, body, "pending-key")
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_flapping_key_times_out(client, day, monkeypatch):
+    # The key is never claimable, yet gone whenever it is read
+    body = _body(client, day, "0771110005")
+    store = get_ttl_store()
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_SECONDS", 0.3)
+    reads = []
+
+    async def never_claimed(key, value, ttl_seconds, only_if_absent=False):
+        return False
+
+    async def gone(key):
+        reads.append(key)
+        return None
+
+    monkeypatch.setattr(store, "set", never_claimed)
+    monkeypatch.setattr(store, "get", gone)
+    started = clock.monotonic()
+    response = _post(client, body, "flapping-key")
+    assert response.status_code == 409
+    assert clock.monotonic() - started < 2
+    # Polled at IDEMPOTENCY_POLL_SECONDS rather than spinning
+    assert len(reads) <= 0.3 / idempotency.IDEMPOTENCY_POLL_SECONDS + 2
@@ -0,0 +1,74 @@
+"""Admin login: rehashing on login, and throttling that does not reveal or lock out accounts."""
+import os
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+
+from app import auth
+from app.main import app
+from app.routers import admin as admin_router
+
+
+@pytest.fixture(scope="module")
+def superadmin_headers():
+    token = auth.create_access_token({"sub": "test-superadmin", "role": "superadmin"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _create_admin(client, superadmin_headers, username: str, password: str):
+    response = client.post("/admin/create-admin", json={"username": username, "password": password},
+                           headers=superadmin_headers)
+    assert response.status_code == 201
+
+
+def _login(client, username: str, password: str):
+    return client.post("/admin/login", json={"username": username, "password": password, "role": "admin"})
+
+
+def _stored_hash(username: str) -> str:
+    path = os.environ["DATABASE_URL"][len("sqlite:///"):]
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT hashed_password FROM admins WHERE username = ?", (username,)).fetchone()[0]
+
+
+def test_login_upgrades_a_hash_of_another_cost(client, superadmin_headers, monkeypatch):
+    older = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=5)
+    with monkeypatch.context() as m:
+        m.setattr(auth, "get_pwd_context", lambda: older)
+        _create_admin(client, superadmin_headers, "rehash-admin", "correct horse")
+    assert _stored_hash("rehash-admin").startswith("$2b$05$")
+
+    assert _login(client, "rehash-admin", "correct horse").status_code == 200
+    upgraded = _stored_hash("rehash-admin")
+    assert upgraded.startswith("$2b$04$")
+    assert auth.get_pwd_context().verify("correct horse", upgraded)
+
+
+def test_unknown_username_costs_a_password_check(client, monkeypatch):
+    checks = []
+    run_hashing = auth._run_hashing
+
+    async def counted(func, *args):
+        checks.append(func)
+        return await run_hashing(func, *args)
+
+    monkeypatch.setattr(auth, "_run_hashing", counted)
+    assert _login(client, "nobody-by-this-name", "guess").status_code == 401
+    assert checks[-1] == auth.get_pwd_context().verify_and_update
+
+
+def test_failed_attempts_lock_out_only_the_guessing_client(client, superadmin_headers):
+    _create_admin(client, superadmin_headers, "throttled-admin", "right password")
+    limit = admin_router._login_username_limiter.max_events
+    for _ in range(limit):
+        assert _login(client, "throttled-admin", "wrong password").status_code == 401
+
+    response = _login(client, "throttled-admin", "right password")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+    # The real admin, from another address, still gets in
+    elsewhere = TestClient(app, client=("203.0.113.7", 50000))
+    assert _login(elsewhere, "throttled-admin", "right password").status_code == 200
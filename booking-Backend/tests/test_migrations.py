@@ -0,0 +1,62 @@
+"""
+Migrations on SQLite, the development database. Alembic runs in a subprocess
+on its own database file, since the app's settings (and so env.py's URL) are
+fixed for the test process.
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def migrate(tmp_path):
+    """Runs an alembic command against a fresh SQLite file; returns the path."""
+    path = tmp_path / "migrations.db"
+
+    def run(*args):
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{path}"}
+        result = subprocess.run([sys.executable, "-m", "alembic", *args], cwd=BACKEND_DIR, env=env,
+                                capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        return result
+
+    run.path = path
+    return run
+
+
+def test_duplicate_phone_numbers_are_merged(migrate):
+    migrate("upgrade", "f3b6d0a2c958")
+    with sqlite3.connect(migrate.path) as conn:
+        conn.executemany("INSERT INTO users (id, name, phone_number) VALUES (?, ?, ?)", [
+            (1, "First", "0712345678"),
+            (2, "Second", "+94 71 234 5678"),
+            (3, "Other", "077-777-7777"),
+            (4, "Third", "0094712345678"),
+        ])
+        conn.executemany(
+            "INSERT INTO bookings (doctor_id, user_id, date, session, timeslot, order_number, turn_number)"
+            " VALUES (1, ?, '2025-09-01', 'morning', ?, ?, ?)",
+            [(2, "08:00:00", 1, 1), (3, "08:05:00", 2, 2), (4, "08:10:00", 3, 3)],
+        )
+
+    migrate("upgrade", "b2d7f4c9e613")
+    with sqlite3.connect(migrate.path) as conn:
+        assert conn.execute("SELECT id, name, phone_number FROM users ORDER BY id").fetchall() == [
+            (1, "First", "94712345678"),
+            (3, "Other", "94777777777"),
+        ]
+        assert conn.execute("SELECT user_id FROM bookings ORDER BY timeslot").fetchall() == [(1,), (3,), (1,)]
+
+
+def test_schema_at_head_matches_the_models(migrate):
+    migrate("upgrade", "head")
+    migrate("check")
+    # And back down and up again
+    migrate("downgrade", "base")
+    migrate("upgrade", "head")
+    migrate("check")
@@ -0,0 +1,78 @@
+# tests/test_query_budgets.py
+"""
+Query budgets of the hot read endpoints. A change that goes back to loading
+users (or anything else) per booking row runs more statements and fails here
+with the list of what ran.
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app import database, query_stats
+from app.query_stats import assert_max_queries
+
+from .conftest import free_slot
+
+
+def _engine():
+    return database.get_async_engine().sync_engine
+
+
+def test_day_bookings_load_users_in_the_same_query(client, booked_day):
+    with assert_max_queries(_engine(), 2):
+        response = client.get(f"/slots/{booked_day}")
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+
+
+def test_availability_cache_hit(client, booked_day):
+    # A cache hit, ETag included, does no database work
+    client.get(f"/slots/{booked_day}/availability")
+    with assert_max_queries(_engine(), 0):
+        response = client.get(f"/slots/{booked_day}/availability")
+    assert response.status_code == 200
+
+
+def test_dashboard_budget_does_not_grow_with_bookings(client, admin_headers, booked_day):
+    with assert_max_queries(_engine(), 5):
+        response = client.get("/admin/dashboard-data", params={"date": booked_day.isoformat()},
+                              headers=admin_headers)
+    assert response.status_code == 200
+    assert len(response.json()["bookings"]) == 3
+
+
+def test_not_modified_skips_the_booking_queries(client, admin_headers, booked_day):
+    # The day's version comes from the availability cache, the dashboard's window from one query
+    client.get(f"/slots/{booked_day}/availability")
+    for path, headers, budget in ((f"/slots/{booked_day}", {}, 0),
+                                  (f"/admin/dashboard-data?date={booked_day}", admin_headers, 2)):
+        etag = client.get(path, headers=headers).headers["ETag"]
+        with assert_max_queries(_engine(), budget):
+            response = client.get(path, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+
+
+def test_booking_changes_the_etag(client, booked_day):
+    path = f"/slots/{booked_day}/availability"
+    response = client.get(path)
+    index = response.json()["sessions"][0]["bitmap"].index("0")
+    booking = {"date": booked_day.isoformat(), "timeslot": free_slot(client, booked_day).isoformat(),
+               "name": "Late patient", "phone_number": "0779999999"}
+    assert client.post("/bookings/create_with_user", json=booking).status_code == 201
+
+    after = client.get(path, headers={"If-None-Match": response.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.json()["sessions"][0]["bitmap"][index] == "1"
+
+
+def test_failed_statement_leaves_no_timing_behind():
+    engine = create_engine("sqlite://")
+    query_stats.install(engine)
+    stats = query_stats.start_request()
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        conn.execute(text("SELECT 1"))
+        assert "query_start" not in conn.info
+    assert stats.count == 1
+    assert 0 <= stats.duration < 1
@@ -0,0 +1,39 @@
+"""
+The hot queries keep using their indexes. Runs against the seeded Postgres
+database at the latest migration given in DATABASE_URL (see
+benchmarks/seed.py) and is skipped without one; the rest of the suite uses
+its own SQLite database either way.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import database
+
+from .conftest import QUERY_PLANS_DATABASE_URL
+from .query_plans import CASES, check_plans
+
+pytestmark = pytest.mark.skipif(
+    not QUERY_PLANS_DATABASE_URL.startswith("postgresql"),
+    reason="needs DATABASE_URL pointing at a seeded Postgres database",
+)
+
+
+@pytest.fixture(scope="module")
+def plan_checks():
+    async def run():
+        engine = create_async_engine(database._to_async_url(QUERY_PLANS_DATABASE_URL))
+        try:
+            return (await check_plans(engine))[1]
+        finally:
+            await engine.dispose()
+
+    return {check.name: check for check in asyncio.run(run())}
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_no_scans_or_sorts(plan_checks, name):
+    check = plan_checks[name]
+    plans = "\n".join(f"{' '.join(statement.split())}\n{plan}" for statement, plan in check.plans)
+    assert not check.problems, f"{name}: {'; '.join(check.problems)}\n{plans}"
@@ -0,0 +1,25 @@
+# tests/test_queue.py
+"""Advancing the live queue of a session."""
+
+
+def _advance(client, admin_headers, day, session, to_turn=None):
+    body = {"date": day.isoformat(), "session": session}
+    if to_turn is not None:
+        body["to_turn"] = to_turn
+    return client.post("/admin/queue/advance", json=body, headers=admin_headers)
+
+
+def test_queue_moves_forward_only(client, admin_headers, booked_day):
+    session = client.get(f"/slots/{booked_day}/availability").json()["sessions"][0]["session"]
+
+    # The first advance creates the session's queue row
+    response = _advance(client, admin_headers, booked_day, session)
+    assert response.status_code == 200
+    assert response.json()["current_turn"] == 1
+
+    assert _advance(client, admin_headers, booked_day, session, to_turn=3).json()["current_turn"] == 3
+
+    # A late retry of an earlier call must not move the queue back
+    response = _advance(client, admin_headers, booked_day, session, to_turn=2)
+    assert response.status_code == 409
+    assert _advance(client, admin_headers, booked_day, session, to_turn=3).status_code == 200
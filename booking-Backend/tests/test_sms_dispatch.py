@@ -0,0 +1,128 @@
+"""
+SMS delivery: transient gateway failures are retried with growing delays, and
+the circuit breaker fails messages fast while the gateway keeps failing.
+"""
+import asyncio
+import dataclasses
+import time as clock
+
+import pytest
+
+from app import notifications, sms_dispatch
+from app.core.config import get_settings
+from app.sms_dispatch import CircuitBreaker, SmsDispatcher
+
+BASE_DELAY = 0.02
+MAX_DELAY = 0.05
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    """A scripted gateway: each call takes the next outcome (an exception or a result) and is timed."""
+    calls = []
+    outcomes = []
+
+    async def send(phone_number, message):
+        calls.append(clock.monotonic())
+        outcome = outcomes.pop(0) if outcomes else (True, "sent")
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(notifications, "send_sms_notification", send)
+    return calls, outcomes
+
+
+def _use_settings(monkeypatch, **overrides):
+    settings = dataclasses.replace(get_settings(), sms_backoff_base_seconds=BASE_DELAY,
+                                   sms_backoff_max_seconds=MAX_DELAY, sms_dispatch_concurrency=1, **overrides)
+    monkeypatch.setattr(sms_dispatch, "get_settings", lambda: settings)
+
+
+def _deliver(*phone_numbers):
+    """Sends messages one after another through a fresh dispatcher; returns the jobs and the breaker."""
+    async def run():
+        dispatcher = SmsDispatcher()
+        await dispatcher.start()
+        jobs = []
+        try:
+            for phone_number in phone_numbers:
+                job = dispatcher.submit(phone_number, "Your turn is approaching.")
+                await dispatcher.wait_for([job], timeout=5)
+                jobs.append(job)
+        finally:
+            await dispatcher.stop()
+        return jobs, dispatcher.breaker
+
+    return asyncio.run(run())
+
+
+def test_transient_failures_are_retried_with_backoff(gateway, monkeypatch):
+    calls, outcomes = gateway
+    _use_settings(monkeypatch, sms_max_retries=3, sms_breaker_failure_threshold=10)
+    outcomes.extend([notifications.SmsGatewayError("timeout")] * 3)
+
+    (job,), breaker = _deliver("94771234567")
+    assert job.status == "sent"
+    assert job.attempts == 4
+    assert breaker.state == "closed"
+    # Jittered between half and all of base * 2^attempt, capped at the maximum
+    gaps = [later - earlier for earlier, later in zip(calls, calls[1:])]
+    for attempt, gap in enumerate(gaps):
+        assert gap >= 0.5 * min(MAX_DELAY, BASE_DELAY * 2 ** attempt)
+    assert gaps[-1] < MAX_DELAY + 0.05
+
+
+def test_gives_up_after_the_last_retry(gateway, monkeypatch):
+    calls, outcomes = gateway
+    _use_settings(monkeypatch, sms_max_retries=2, sms_breaker_failure_threshold=10)
+    outcomes.extend([notifications.SmsGatewayError("HTTP 503")] * 5)
+
+    (job,), _ = _deliver("94771234567")
+    assert job.status == "failed"
+    assert job.attempts == 3
+    assert job.detail == "HTTP 503"
+
+
+def test_rejected_message_is_not_retried(gateway, monkeypatch):
+    calls, outcomes = gateway
+    _use_settings(monkeypatch, sms_max_retries=3, sms_breaker_failure_threshold=1)
+    outcomes.append((False, "Invalid number"))
+
+    (job,), breaker = _deliver("94771234567")
+    assert job.status == "failed"
+    assert job.attempts == 1
+    # A rejection says nothing about the gateway's health
+    assert breaker.state == "closed"
+
+
+def test_open_breaker_fails_messages_without_calling_the_gateway(gateway, monkeypatch):
+    calls, outcomes = gateway
+    _use_settings(monkeypatch, sms_max_retries=0, sms_breaker_failure_threshold=2, sms_breaker_reset_seconds=60)
+    outcomes.extend([notifications.SmsGatewayError("down")] * 2)
+
+    jobs, breaker = _deliver("94771000001", "94771000002", "94771000003")
+    assert [job.status for job in jobs] == ["failed"] * 3
+    assert len(calls) == 2
+    assert jobs[2].attempts == 0
+    assert jobs[2].detail == "SMS gateway is unavailable, message not sent."
+    assert breaker.state == "open"
+
+
+def test_breaker_lets_one_trial_through_after_the_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.sleep(0.06)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()  # Only one trial at a time
+
+    # A failed trial opens it for another full timeout, a successful one closes it
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
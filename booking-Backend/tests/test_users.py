@@ -0,0 +1,86 @@
+"""
+Patients are found by their canonical phone number however it was typed, and
+returning ones come from the worker's user cache without a query.
+"""
+import pytest
+from sqlalchemy import event
+
+from app import database, users
+from app.phones import canonical_phone_number
+
+from .conftest import free_slot, open_day
+
+
+@pytest.fixture(scope="module")
+def day(client, booked_day):
+    return open_day(client, open_day(client, booked_day))
+
+
+@pytest.fixture
+def statements():
+    """The SQL the app runs while the test does."""
+    engine = database.get_async_engine().sync_engine
+    ran = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        ran.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield ran
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def _book(client, day, phone_number: str, name: str = "Returning patient"):
+    booking = {"date": day.isoformat(), "timeslot": free_slot(client, day).isoformat(),
+               "name": name, "phone_number": phone_number}
+    response = client.post("/bookings/create_with_user", json=booking)
+    assert response.status_code == 201
+    return response.json()
+
+
+def _user_queries(statements) -> list:
+    return [s for s in statements if "FROM users" in s and "phone_number" in s]
+
+
+@pytest.mark.parametrize("typed", ["0712345678", "+94 71 234 5678", "0094712345678", "94-71-234-5678"])
+def test_canonical_phone_number(typed):
+    assert canonical_phone_number(typed) == "94712345678"
+
+
+def test_ways_of_typing_a_number_find_one_user(client, day):
+    first = _book(client, day, "0712345678")
+    second = _book(client, day, "+94 71 234 5678", name="Same patient")
+    assert first["user"]["phone_number"] == "94712345678"
+    assert second["user"]["id"] == first["user"]["id"]
+    # An existing patient keeps their name
+    assert second["user"]["name"] == "Returning patient"
+
+
+def test_returning_patient_is_not_queried(client, day, statements):
+    # Only users read back from the database are cached, not ones just created
+    first = _book(client, day, "0712000001")
+    assert users.lookup("94712000001") is None
+    _book(client, day, "0712000001")
+    assert users.lookup("94712000001") == (first["user"]["id"], "Returning patient")
+
+    statements.clear()
+    again = _book(client, day, "071 200 0001")
+    assert again["user"]["id"] == first["user"]["id"]
+    assert again["user"]["name"] == "Returning patient"
+    assert _user_queries(statements) == []
+
+
+def test_writes_drop_cached_users(client, admin_headers, day):
+    first = _book(client, day, "0712000002")
+    _book(client, day, "0712000002")
+    assert users.lookup("94712000002") is not None
+
+    row = {"name": "Imported", "phone_number": "0712000002", "date": day.isoformat(),
+           "timeslot": free_slot(client, day).isoformat()}
+    response = client.post("/admin/bookings/import", json={"rows": [row]}, headers=admin_headers)
+    assert response.json()["booked"] == 1
+    assert users.lookup("94712000002") is None
+
+    # The next booking reads the user again and caches it anew
+    assert _book(client, day, "0712000002")["user"]["id"] == first["user"]["id"]
+    assert users.lookup("94712000002") == (first["user"]["id"], "Returning patient")
@@ -126,7 +126,7 @@ export default function AdminDashboardPage() {
         const errorData = await response.json();
         throw new Error(errorData.detail || "Failed to send notification.");
       }
-      toast.success("Notification Sent", { description: `Message sent to ${booking.user.name}.` });
+      toast.success("Notification Queued", { description: `Message to ${booking.user.name} is being sent.` });
     } catch (error: unknown) {
       let message = "An unknown error occurred.";
       if (error instanceof Error) {
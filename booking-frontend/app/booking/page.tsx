@@ -1,6 +1,6 @@
 "use client";
 
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import { Calendar } from "@/components/ui/calendar";
 import {
   Dialog, DialogContent, DialogHeader, DialogTitle, DialogDescription, DialogFooter
@@ -18,13 +18,33 @@ const SESSIONS = {
   night: { start: 17, end: 24 },
 };
 
-type ApiBooking = {
-  id: number;
-  date: string;
-  timeslot: string;
+type ApiSessionAvailability = {
   session: string;
-  order_number: number;
-  turn_number: number;
+  start: string;
+  end: string;
+  bitmap: string; // '1' = booked, one character per slot from 'start'
+  free: number;
+};
+
+type ApiDayAvailability = {
+  date: string;
+  slot_minutes: number;
+  sessions: ApiSessionAvailability[];
+};
+
+// Expands the per-session bitmaps into a list of booked 'HH:MM' slots
+const bookedSlotsFromAvailability = (data: ApiDayAvailability): string[] => {
+  const booked: string[] = [];
+  data.sessions.forEach(({ start, bitmap }) => {
+    const [startHour, startMinute] = start.split(':').map(Number);
+    const startMinutes = startHour * 60 + startMinute;
+    for (let i = 0; i < bitmap.length; i++) {
+      if (bitmap[i] !== '1') continue;
+      const minutes = startMinutes + i * data.slot_minutes;
+      booked.push(`${String(Math.floor(minutes / 60)).padStart(2, '0')}:${String(minutes % 60).padStart(2, '0')}`);
+    }
+  });
+  return booked;
 };
 
 // --- NEW HELPER FUNCTION ---
@@ -54,10 +74,9 @@ export default function BookingPage() {
     }
     const dateString = toLocalDateString(selectedDate);
     try {
-      const response = await fetch(`http://127.0.0.1:8000/slots/${dateString}`);
-      const data: ApiBooking[] = await response.json();
-      const slots = data.map((booking) => booking.timeslot.substring(0, 5));
-      setBookedSlots(slots);
+      const response = await fetch(`http://127.0.0.1:8000/slots/${dateString}/availability`);
+      const data: ApiDayAvailability = await response.json();
+      setBookedSlots(bookedSlotsFromAvailability(data));
     } catch (error) {
       console.error("Failed to fetch booked slots:", error);
       // --- CHANGE HERE: Use Sonner's error toast ---
@@ -65,6 +84,49 @@ export default function BookingPage() {
     }
   };
   
+  // Live updates: the server pushes slot changes for the selected date
+  useEffect(() => {
+    if (!date) return;
+    const source = new EventSource(`http://127.0.0.1:8000/slots/${toLocalDateString(date)}/events`);
+    // Held slots are released locally once their hold runs out, in case the
+    // server's 'freed' for the expiry never arrives
+    const holdTimers = new Map<string, ReturnType<typeof setTimeout>>();
+    const clearHoldTimer = (timeslot: string) => {
+      clearTimeout(holdTimers.get(timeslot));
+      holdTimers.delete(timeslot);
+    };
+    const freeSlot = (timeslot: string) => {
+      clearHoldTimer(timeslot);
+      setBookedSlots((slots) => slots.filter((slot) => slot !== timeslot));
+    };
+    const applySnapshot = (event: MessageEvent) => {
+      setBookedSlots(bookedSlotsFromAvailability(JSON.parse(event.data)));
+    };
+    const markTaken = (event: MessageEvent) => {
+      const { timeslot } = JSON.parse(event.data);
+      clearHoldTimer(timeslot);
+      setBookedSlots((slots) => (slots.includes(timeslot) ? slots : [...slots, timeslot]));
+    };
+    const markHeld = (event: MessageEvent) => {
+      markTaken(event);
+      const { timeslot, expires_in_seconds } = JSON.parse(event.data);
+      if (typeof expires_in_seconds === "number") {
+        holdTimers.set(timeslot, setTimeout(() => freeSlot(timeslot), (expires_in_seconds + 2) * 1000));
+      }
+    };
+    const markFreed = (event: MessageEvent) => {
+      freeSlot(JSON.parse(event.data).timeslot);
+    };
+    source.addEventListener("snapshot", applySnapshot);
+    source.addEventListener("booked", markTaken);
+    source.addEventListener("held", markHeld);
+    source.addEventListener("freed", markFreed);
+    return () => {
+      source.close();
+      holdTimers.forEach((timer) => clearTimeout(timer));
+    };
+  }, [date]);
+
   const handleSlotClick = (time: string) => {
     setSelectedSlot(time);
     setIsModalOpen(true);